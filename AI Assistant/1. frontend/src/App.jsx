@@ -6,6 +6,7 @@ export default function App() {
   const [prompt, setPrompt] = useState(""); 
   const [gameName, setGameName] = useState(""); 
   const [loading, setLoading] = useState(false); 
+  const [stage, setStage] = useState(""); 
   const [error, setError] = useState(""); 
   const [isDetecting, setIsDetecting] = useState(false); 
   const [manualEntry, setManualEntry] = useState(false); 
@@ -43,10 +44,10 @@ export default function App() {
     detectGame();
   }, []);
 
-  // Function to ask a question to the backend API
-  const askQuestion = async (question, gameName) => {
+  // Function to ask a question to the backend API, streaming the answer as it is generated
+  const askQuestion = async (question, gameName, onEvent) => {
     try {
-      const response = await fetch('http://localhost:8000/ask', {
+      const response = await fetch('http://localhost:8000/ask/stream', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
         body: JSON.stringify({ 
@@ -54,18 +55,44 @@ export default function App() {
           gameName: gameName,
         }),
       });
-      return await response.json();
+
+      // Parse server-sent events ("event: ...\ndata: ...\n\n") as they arrive
+      const reader = response.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      while (true) {
+        const { value, done } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const events = buffer.split("\n\n");
+        buffer = events.pop();
+        for (const rawEvent of events) {
+          const lines = rawEvent.split("\n");
+          const eventLine = lines.find((line) => line.startsWith("event: "));
+          const dataLine = lines.find((line) => line.startsWith("data: "));
+          if (eventLine && dataLine) {
+            onEvent(eventLine.slice(7), JSON.parse(dataLine.slice(6)));
+          }
+        }
+      }
     } catch (error) {
       console.error("Connection error details:", error);
       throw error;
     }
   };
 
+  const stageLabels = {
+    retrieving: "Searching game data...",
+    searching_web: "Searching the web...",
+    generating: "Writing answer...",
+  };
+
   const handleSubmit = async (e) => {
     e.preventDefault();  
     
     setError("");
     setResponse("");
+    setStage("");
     setLoading(true);
 
     if (prompt.trim() === "") {
@@ -81,18 +108,24 @@ export default function App() {
       return;
     }
     
-    const combinedQuestion = `${prompt} ${gameName}`;
-
     try {
-      const data = await askQuestion(combinedQuestion, gameName);
-
-      if (data) {
-        setResponse(data.response); 
-      }
+      // The backend scopes the question to gameName itself
+      await askQuestion(prompt, gameName, (event, data) => {
+        if (event === "stage") {
+          setStage(data.stage);
+        } else if (event === "token") {
+          setResponse((previous) => previous + data.token);
+        } else if (event === "done") {
+          setResponse(data.response);
+        } else if (event === "error") {
+          setError(data.detail || "Error answering question");
+        }
+      });
     } catch (err) {
       setError("Error connecting to server");
     } finally {
       setLoading(false);
+      setStage("");
     }
   };
 
@@ -192,7 +225,7 @@ export default function App() {
                   <circle className="opacity-25" cx="12" cy="12" r="10" stroke="currentColor" strokeWidth="4"></circle>
                   <path className="opacity-75" fill="currentColor" d="M4 12a8 8 0 018-8V0C5.373 0 0 5.373 0 12h4zm2 5.291A7.962 7.962 0 014 12H0c0 3.042 1.135 5.824 3 7.938l3-2.647z"></path>
                 </svg>
-                <span>Thinking...</span>
+                <span>{stageLabels[stage] || "Thinking..."}</span>
               </>
             ) : 'Submit'}
           </button>
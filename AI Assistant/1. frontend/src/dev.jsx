@@ -9,8 +9,10 @@ function DevApp() {
   const [dataUploaded, setDataUploaded] = useState(false);
   const [dataName, setDataName] = useState("");
   const [dataType, setDataType] = useState("");
+  const [dataGame, setDataGame] = useState("");
   const [importType, setImportType] = useState("json");
   const [url, setUrl] = useState("");
+  const [gameName, setGameName] = useState("");
   const [showUrlInput, setShowUrlInput] = useState(false);
   
   const fileInputRef = useRef(null);
@@ -28,6 +30,33 @@ function DevApp() {
     }
   };
 
+  // Ingestion runs as a background job on the server; poll it until it finishes
+  const waitForJob = async (jobId, label) => {
+    while (true) {
+      const response = await fetch(`http://localhost:8000/jobs/${jobId}`);
+      const job = await response.json();
+      if (!response.ok) {
+        throw new Error(job.detail || `Job lookup failed with status ${response.status}`);
+      }
+      if (job.state === "done") {
+        return job;
+      }
+      if (job.state === "failed") {
+        throw new Error(job.error || "Processing failed");
+      }
+
+      let progress = job.stage;
+      if (job.chunks_split > 0) {
+        const total = job.chunks_total ?? `${job.chunks_split}+`;
+        progress += ` - ${job.chunks_done}/${total} chunks (${job.chunks_per_second.toFixed(1)}/s)`;
+      } else if (job.source_total) {
+        progress += ` - ${Math.round((100 * job.source_done) / job.source_total)}% read`;
+      }
+      setUploadStatus(`${label}: ${progress}`);
+      await new Promise((resolve) => setTimeout(resolve, 1000));
+    }
+  };
+
   const handleDataUpload = async (file) => {
     if (!file) {
       setUploadStatus("No file selected.");
@@ -52,6 +81,10 @@ function DevApp() {
     const formData = new FormData();
     formData.append("file", file);
     formData.append("type", importType);
+    // Chunks without a game are shared across every game
+    if (gameName.trim()) {
+      formData.append("game_name", gameName.trim());
+    }
   
     try {
       // Correctly set the endpoint
@@ -65,9 +98,11 @@ function DevApp() {
       const data = await response.json();
   
       if (response.ok) {
+        await waitForJob(data.job_id, `Processing ${file.name}`);
         setDataUploaded(true);
         setDataName(file.name);
         setDataType(importType.toUpperCase());
+        setDataGame(gameName.trim());
         setUploadStatus(`${importType.toUpperCase()} uploaded successfully: ${file.name}`);
   
         // Reset file input to allow re-uploading the same file
@@ -75,11 +110,11 @@ function DevApp() {
           fileInputRef.current.value = "";
         }
       } else {
-        setUploadStatus(`Upload failed: ${data.error || "Unknown error"}`);
+        setUploadStatus(`Upload failed: ${data.detail || data.error || "Unknown error"}`);
       }
     } catch (err) {
       console.error("Error uploading data:", err);
-      setUploadStatus("Error connecting to server for upload");
+      setUploadStatus(err instanceof TypeError ? "Error connecting to server for upload" : `Upload failed: ${err.message}`);
     } finally {
       setUploading(false);
     }
@@ -99,7 +134,7 @@ function DevApp() {
       const response = await fetch('http://localhost:8000/import-from-url', {
         method: 'POST',
         headers: { 'Content-Type': 'application/json' },
-        body: JSON.stringify({ url: url }),
+        body: JSON.stringify({ url: url, gameName: gameName.trim() || null }),
       });
       
       // Parse the response JSON
@@ -108,15 +143,18 @@ function DevApp() {
       // Check if the response is not OK (status code is not in 200-299 range)
       if (!response.ok) {
         // Use the error message from the backend or provide a generic error
-        const errorMessage = data.message || data.error || `URL import failed with status ${response.status}`;
+        const errorMessage = data.detail || data.message || data.error || `URL import failed with status ${response.status}`;
         setUploadStatus(`Error: ${errorMessage}`);
         setUploading(false);
         return;
       }
       
+      await waitForJob(data.job_id, "Importing from URL");
       setDataUploaded(true);
-      setDataName(new URL(url).hostname);
+      // The page's URL, so clearing it removes only this page
+      setDataName(url.trim());
       setDataType('URL');
+      setDataGame(gameName.trim());
       setUploadStatus(`URL data imported successfully from: ${url}`);
       setUrl("");
       setShowUrlInput(false); // Hide URL input after successful import
@@ -126,7 +164,7 @@ function DevApp() {
       // Provide a more detailed error message
       const errorMessage = err instanceof TypeError 
         ? "Network error. Please check your connection." 
-        : "Unexpected error during URL import";
+        : err.message || "Unexpected error during URL import";
       
       setUploadStatus(`Error: ${errorMessage}`);
     } finally {
@@ -153,6 +191,7 @@ function DevApp() {
         body: JSON.stringify({ 
           file_name: dataName,
           type: dataType.toLowerCase(),
+          gameName: dataGame,
         }),
       });
   
@@ -162,13 +201,14 @@ function DevApp() {
         setDataUploaded(false);
         setDataName("");
         setDataType("");
+        setDataGame("");
         setUploadStatus(""); 
         
         // Reset URL input state
         setUrl("");
         setShowUrlInput(false);
       } else {
-        setUploadStatus(`Failed to clear data: ${data.error || "Unknown error"}`);
+        setUploadStatus(`Failed to clear data: ${data.detail || data.error || "Unknown error"}`);
       }
     } catch (err) {
       console.error("Error clearing data:", err);
@@ -200,6 +240,15 @@ function DevApp() {
           <p className="text-white mb-3">No data currently imported.</p>
         )}
         
+        <input
+          type="text"
+          placeholder="Game (leave empty for general data)"
+          className="p-2 border rounded mb-2 w-full"
+          value={gameName}
+          onChange={(e) => setGameName(e.target.value)}
+          disabled={uploading}
+        />
+
         <div className="mb-2">
           <select 
             value={importType} 
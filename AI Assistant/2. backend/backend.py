@@ -1,65 +1,198 @@
-from pypdf import PdfReader
 from contextlib import asynccontextmanager
 from langchain_text_splitters import RecursiveCharacterTextSplitter
 from pinecone import Pinecone, ServerlessSpec
-from litellm import completion
+from litellm import acompletion
 from dotenv import load_dotenv
 from duckduckgo_search import DDGS
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import StreamingResponse
 from typing import Optional
-from pydantic import BaseModel
+from pydantic import BaseModel, ConfigDict, Field
 from crawl4ai import AsyncWebCrawler
-from urllib.parse import urlparse
+from urllib.parse import urlparse, urlunparse
+from caching import EmbeddingCache, KnownChunkSet, SemanticAnswerCache
+from lexical_index import LexicalIndex, tokenize
+from jobs import JobQueue
+from pdf_extract import PdfExtractor, page_count as pdf_page_count
+from records import iter_csv_records, iter_json_records, render_record
+from manifest import ChunkManifest
+from rate_limit import RateLimiter
+from validation import ResponseAuditor
+from vector_store import (
+    GENERAL_GAME, LocalVectorStore, PineconeVectorStore, VectorStore, delete_in_batches, game_key, upsert_in_batches,
+)
 import logging
 import datetime
 import pygetwindow as gw
 import psutil
-import requests
+import httpx
+import asyncio
 import json
 import time
 import os
+import shutil
 import re
 import uuid
 import hashlib
+import threading
 import uvicorn
+import numpy as np
+import random
+import tiktoken
 
 
 # Initialize index_name at the module level
 index_name = "example-index"
 
+# Vector store used for retrieval and ingestion, chosen by VECTOR_BACKEND at startup
+vector_store: Optional[VectorStore] = None
+# The server's event loop; ingestion jobs run on their own loops and hand work back to it
+server_loop: Optional[asyncio.AbstractEventLoop] = None
+
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    global pc, index
-    # Pinecone API Setup
-    PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
-    if not PINECONE_API_KEY:
-        print("❌ ERROR: Missing PINECONE_API_KEY.")
-        return
+    global pc, vector_store, server_loop
+    server_loop = asyncio.get_running_loop()
+    if os.getenv("VECTOR_BACKEND", "pinecone").lower() == "local":
+        # In-process vector store, no external service needed
+        store_dir = os.path.join(DATA_DIR, "vectors")
+        vector_store = LocalVectorStore(
+            store_dir,
+            index=os.getenv("VECTOR_INDEX", "flat").lower(),
+            index_params={
+                "M": int(os.getenv("HNSW_M", "16")),
+                "ef_construction": int(os.getenv("HNSW_EF_CONSTRUCTION", "100")),
+                "ef_search": int(os.getenv("HNSW_EF_SEARCH", "64")),
+            },
+            quantization=os.getenv("VECTOR_QUANTIZATION", "none").lower(),
+            quantization_params={
+                "rerank": int(os.getenv("VECTOR_RERANK", "10")),
+                "pq_subspaces": int(os.getenv("PQ_SUBSPACES", "96")),
+            },
+        )
+        # Deleting the store directory forgets what was ingested into it too
+        open_store_records(store_dir)
+        print("✅ Local Vector Store Ready.")
+    else:
+        # Pinecone API Setup
+        PINECONE_API_KEY = os.getenv("PINECONE_API_KEY")
+        if not PINECONE_API_KEY:
+            print("❌ ERROR: Missing PINECONE_API_KEY.")
+            return
 
-    pc = Pinecone(api_key=PINECONE_API_KEY)
-    
-    # Create index if it doesn't exist
-    if index_name not in pc.list_indexes().names():
-        pc.create_index(
-            name=index_name,
+        pc = Pinecone(api_key=PINECONE_API_KEY)
+        
+        # Connect straight to a known host; the control-plane lookups only run the first time
+        host = os.getenv("PINECONE_INDEX_HOST") or cached_index_host(index_name)
+        created = False
+        if not host:
+            host, created = await resolve_index_host(pc, index_name)
+            cache_index_host(index_name, host)
+
+        vector_store = PineconeVectorStore(pc.Index(host=host))
+        # A newly created index starts empty, whatever was recorded for an earlier one of the same name
+        open_store_records(pinecone_records_dir(index_name, host), reset=created)
+        print("✅ Pinecone Index Ready.")
+
+    job_queue.start()
+
+    # Open connections in the background so the first question doesn't pay for them
+    warmup_task = None
+    if os.getenv("WARM_UP", "true").lower() == "true":
+        warmup_task = asyncio.create_task(warm_up())
+    else:
+        warmup_status["state"] = "skipped"
+
+    yield
+
+    # Shutdown logic
+    if warmup_task is not None and not warmup_task.done():
+        warmup_task.cancel()
+    job_queue.stop()
+    pdf_extractor.close()
+    await response_auditor.stop()
+    vector_store.save()
+    lexical_index.save()
+    print("🔌 Shutting down vector store.")
+    if _http_client is not None:
+        await _http_client.aclose()
+
+
+async def resolve_index_host(pc, name: str) -> tuple:
+    """Create the Pinecone index if needed, wait until it is ready and return (its host, whether it was created)"""
+    # The Pinecone client is synchronous, keep its calls off the event loop
+    created = name not in (await asyncio.to_thread(pc.list_indexes)).names()
+    if created:
+        await asyncio.to_thread(
+            pc.create_index,
+            name=name,
             dimension=1536,  # Must match embedding size
             metric="cosine",
             spec=ServerlessSpec(cloud="aws", region="us-east-1")
         )
 
     # Wait for index to be ready
-    while not pc.describe_index(index_name).status["ready"]:
+    while True:
+        description = await asyncio.to_thread(pc.describe_index, name)
+        if description.status["ready"]:
+            return description.host, created
         print("⏳ Waiting for Pinecone index to be ready...")
-        time.sleep(2)
+        await asyncio.sleep(2)
 
-    index = pc.Index(index_name)
-    print("✅ Pinecone Index Ready.")
 
-    yield
+def cached_index_host(name: str) -> Optional[str]:
+    try:
+        with open(INDEX_HOST_CACHE, encoding="utf-8") as f:
+            return json.load(f).get(name)
+    except (OSError, ValueError):
+        return None
+
+
+def cache_index_host(name: str, host: Optional[str]):
+    """Remember (or with host None, forget) the resolved host of an index"""
+    try:
+        with open(INDEX_HOST_CACHE, encoding="utf-8") as f:
+            hosts = json.load(f)
+    except (OSError, ValueError):
+        hosts = {}
+    if host is None:
+        hosts.pop(name, None)
+    else:
+        hosts[name] = host
+    os.makedirs(DATA_DIR, exist_ok=True)
+    with open(f"{INDEX_HOST_CACHE}.tmp", "w", encoding="utf-8") as f:
+        json.dump(hosts, f)
+    os.replace(f"{INDEX_HOST_CACHE}.tmp", INDEX_HOST_CACHE)
 
-    # Shutdown logic
-    print("🔌 Shutting down Pinecone client.")
+
+# Warm-up progress, reported by /health
+warmup_status = {"state": "pending", "seconds": None, "error": None}
+
+async def warm_up():
+    """Open pooled connections to the embeddings API, the vector store and the LLM with one small request each"""
+    warmup_status["state"] = "running"
+    start = time.perf_counter()
+    step = "embedding"
+    try:
+        # Bypass the embedding cache so the request really goes out
+        embedded = await request_embeddings(["warm-up"], priority=True)
+        if embedded is None:
+            raise RuntimeError("embedding request failed")
+        step = "vector store query"
+        await vector_store.aquery(embedded[0]["embedding"], 1, "game_docs")
+        if os.getenv("WARM_UP_COMPLETION", "true").lower() == "true":
+            step = "completion"
+            await acompletion(model="gpt-4o-mini", messages=[{"role": "user", "content": "Hi"}], max_tokens=1)
+    except Exception as e:
+        warmup_status.update(state="failed", error=f"{step}: {e}", seconds=time.perf_counter() - start)
+        print(f"⚠️ Warm-up failed during {step}: {e}")
+        # A cached host may point at an index that no longer exists; resolve it again next start
+        if step == "vector store query" and isinstance(vector_store, PineconeVectorStore):
+            cache_index_host(index_name, None)
+        return
+    warmup_status.update(state="ready", seconds=time.perf_counter() - start)
+    print(f"🔥 Warm-up finished in {warmup_status['seconds']:.2f}s.")
 
 
 app = FastAPI(
@@ -80,6 +213,100 @@ app.add_middleware(
 
 load_dotenv()
 
+# Where the backend keeps its local state (caches, indexes)
+DATA_DIR = os.getenv("BACKEND_DATA_DIR", "data")
+
+# Pinecone index hosts resolved on earlier starts
+INDEX_HOST_CACHE = os.path.join(DATA_DIR, "pinecone_hosts.json")
+
+# Persistent embedding cache shared by search and ingestion
+embedding_cache = EmbeddingCache(
+    os.path.join(DATA_DIR, "embedding_cache"),
+    max_entries=int(os.getenv("EMBEDDING_CACHE_MAX_ENTRIES", "100000")),
+    memory_entries=int(os.getenv("EMBEDDING_CACHE_MEMORY_ENTRIES", "2048")),
+)
+
+# Hashes of chunks known to be in the vector store, so re-uploads skip them without a fetch
+known_chunks: Optional[KnownChunkSet] = None
+EXISTENCE_FETCH_BATCH = int(os.getenv("EXISTENCE_FETCH_BATCH", "100"))
+
+# Which chunks each uploaded file or imported site contributed, so it can be deleted again
+manifest: Optional[ChunkManifest] = None
+
+# BM25 keyword index built at ingest, searched alongside the vector store
+lexical_index: Optional[LexicalIndex] = None
+
+# All three describe the contents of one vector store, so they are opened with it at startup
+def open_store_records(directory: str, reset: bool = False):
+    """Open the known chunks, manifest and keyword index kept in directory for the current vector store; reset discards them first"""
+    global known_chunks, manifest, lexical_index
+    names = ("known_chunks.sqlite3", "manifest.sqlite3")
+    if reset:
+        for name in names:
+            for suffix in ("", "-wal", "-shm"):
+                path = os.path.join(directory, name + suffix)
+                if os.path.exists(path):
+                    os.remove(path)
+        shutil.rmtree(os.path.join(directory, "lexical"), ignore_errors=True)
+    known_chunks = KnownChunkSet(os.path.join(directory, names[0]))
+    manifest = ChunkManifest(os.path.join(directory, names[1]))
+    lexical_index = LexicalIndex(os.path.join(directory, "lexical"))
+
+def pinecone_records_dir(name: str, host: str) -> str:
+    """Records directory of a Pinecone index, keyed by its name and host"""
+    return os.path.join(DATA_DIR, "pinecone", f"{name}-{hashlib.md5(host.encode('utf-8')).hexdigest()[:8]}")
+
+# Upsert batching: Pinecone rejects requests over 2 MB or 1000 vectors
+UPSERT_BATCH_MAX_BYTES = int(os.getenv("UPSERT_BATCH_MAX_BYTES", "1500000"))
+UPSERT_BATCH_MAX_VECTORS = int(os.getenv("UPSERT_BATCH_MAX_VECTORS", "100"))
+UPSERT_CONCURRENCY = int(os.getenv("UPSERT_CONCURRENCY", "4"))
+UPSERT_MAX_RETRIES = int(os.getenv("UPSERT_MAX_RETRIES", "3"))
+# Streaming ingestion: chunks per pipeline batch, and batches buffered between stages
+INGEST_BATCH_CHUNKS = int(os.getenv("INGEST_BATCH_CHUNKS", "256"))
+INGEST_QUEUE_BATCHES = int(os.getenv("INGEST_QUEUE_BATCHES", "4"))
+INGEST_EMBED_CONCURRENCY = int(os.getenv("INGEST_EMBED_CONCURRENCY", "4"))
+UPLOAD_READ_BYTES = 1 << 20
+# PDF text is extracted in worker processes, a range of pages per task (0 workers extracts in-process)
+pdf_extractor = PdfExtractor(
+    workers=int(os.getenv("PDF_WORKERS", str(min(4, os.cpu_count() or 1)))),
+    pages_per_task=int(os.getenv("PDF_PAGES_PER_TASK", "16")),
+)
+# JSON items and CSV rows up to this many tokens are embedded whole, one chunk per record
+RECORD_MAX_TOKENS = int(os.getenv("RECORD_MAX_TOKENS", "512"))
+# Pinecone deletes at most 1000 IDs per request
+DELETE_BATCH_SIZE = int(os.getenv("DELETE_BATCH_SIZE", "1000"))
+
+# Semantic cache of answers, partitioned per game
+answer_cache = SemanticAnswerCache(
+    threshold=float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.95")),
+    doc_ttl=float(os.getenv("ANSWER_CACHE_DOC_TTL", "86400")),
+    web_ttl=float(os.getenv("ANSWER_CACHE_WEB_TTL", "3600")),
+    max_entries=int(os.getenv("ANSWER_CACHE_MAX_ENTRIES", "1000")),
+)
+# Retrieval settings: matches per namespace and the similarity floor for context
+RETRIEVAL_TOP_K = int(os.getenv("RETRIEVAL_TOP_K", "3"))
+RETRIEVAL_MIN_SCORE = float(os.getenv("RETRIEVAL_MIN_SCORE", "0.25"))
+
+# Keyword search alongside vector search, over the lexical index opened with the store records
+HYBRID_SEARCH = os.getenv("HYBRID_SEARCH", "true").lower() == "true"
+
+# Local relevance gate: similarity range mapped onto 0-1, and the score thresholds
+# outside of which the decision LLM is skipped. Tune from relevance_log.jsonl.
+RELEVANCE_SIM_LOW = float(os.getenv("RELEVANCE_SIM_LOW", "0.2"))
+RELEVANCE_SIM_HIGH = float(os.getenv("RELEVANCE_SIM_HIGH", "0.6"))
+RELEVANCE_ACCEPT = float(os.getenv("RELEVANCE_ACCEPT", "0.6"))
+RELEVANCE_REJECT = float(os.getenv("RELEVANCE_REJECT", "0.3"))
+# Weights of the similarity, keyword overlap and game name features; keep their sum at 1.
+# Hand-picked, not calibrated: a best match at RELEVANCE_SIM_HIGH accepts on its own
+# (0.55 + 0.10 * 0.5 without a game name = RELEVANCE_ACCEPT), keyword overlap alone never does
+RELEVANCE_WEIGHT_SIMILARITY = float(os.getenv("RELEVANCE_WEIGHT_SIMILARITY", "0.55"))
+RELEVANCE_WEIGHT_OVERLAP = float(os.getenv("RELEVANCE_WEIGHT_OVERLAP", "0.35"))
+RELEVANCE_WEIGHT_GAME = float(os.getenv("RELEVANCE_WEIGHT_GAME", "0.10"))
+RELEVANCE_LOG_PATH = os.path.join(DATA_DIR, "relevance_log.jsonl")
+
+# Only cache answers once the background auditor has validated them
+CACHE_VALIDATED_ONLY = os.getenv("ANSWER_CACHE_VALIDATED_ONLY", "false").lower() == "true"
+
 # Function to fetch content from a PDF file
 # def fetch_pdf_content(pdf: str):
 #     """Fetch content from a PDF file."""
@@ -118,86 +345,549 @@ def clean_text(text: str) -> str:
     text = text.replace('\n', ' ').replace('\r', ' ')
     return re.sub(r'\s+', ' ', text).strip()
 
-# Generate embeddings
-def get_embeddings(texts, model="text-embedding-3-small", api_key=os.getenv("OPENAI_API_KEY")):
-    """Fetch OpenAI embeddings."""
+# Shared async HTTP client so embedding calls don't block the event loop.
+# Connections are kept alive and reused, so only the first request pays for the TLS handshake.
+_http_client: Optional[httpx.AsyncClient] = None
+
+# httpx clients are bound to the event loop that opened their connections,
+# so every ingestion worker thread keeps its own
+_worker_state = threading.local()
+
+def new_http_client() -> httpx.AsyncClient:
+    return httpx.AsyncClient(
+        timeout=httpx.Timeout(
+            float(os.getenv("EMBEDDING_TIMEOUT", "30")),
+            connect=float(os.getenv("EMBEDDING_CONNECT_TIMEOUT", "5")),
+        ),
+        limits=httpx.Limits(
+            max_connections=int(os.getenv("HTTP_MAX_CONNECTIONS", "20")),
+            max_keepalive_connections=int(os.getenv("HTTP_MAX_KEEPALIVE", "10")),
+            keepalive_expiry=60,
+        ),
+    )
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the async HTTP client for the current event loop, creating the shared one on first use."""
+    global _http_client
+    worker_client = getattr(_worker_state, "http_client", None)
+    if worker_client is not None:
+        return worker_client
+    if _http_client is None:
+        _http_client = new_http_client()
+    return _http_client
+
+async def open_worker_http_client():
+    _worker_state.http_client = new_http_client()
+
+async def close_worker_http_client():
+    await _worker_state.http_client.aclose()
+    _worker_state.http_client = None
+
+# Uploads and URL imports run as background jobs on their own threads and event loops,
+# so bulk loads never hold up questions being answered
+job_queue = JobQueue(
+    workers=int(os.getenv("INGEST_WORKERS", "1")),
+    on_worker_start=open_worker_http_client,
+    on_worker_stop=close_worker_http_client,
+)
+
+# Client-side limit matching the account's embedding quota, so bursts wait instead of getting 429s.
+# A share is kept for questions, which would otherwise queue behind an upload running at the limit
+embedding_rate_limiter = RateLimiter(
+    tokens_per_minute=int(os.getenv("EMBEDDING_TOKENS_PER_MINUTE", "1000000")),
+    requests_per_minute=int(os.getenv("EMBEDDING_REQUESTS_PER_MINUTE", "3000")),
+    priority_share=float(os.getenv("EMBEDDING_PRIORITY_SHARE", "0.1")),
+)
+EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "5"))
+# Status codes worth retrying: rate limited or a transient server error
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+# Texts are packed into requests by token count, within the API's per-request limits
+EMBEDDING_BATCH_MAX_TOKENS = int(os.getenv("EMBEDDING_BATCH_MAX_TOKENS", "60000"))
+EMBEDDING_BATCH_MAX_INPUTS = int(os.getenv("EMBEDDING_BATCH_MAX_INPUTS", "2048"))
+EMBEDDING_CONCURRENCY = int(os.getenv("EMBEDDING_CONCURRENCY", "8"))
+
+_embedding_encoding = None
+
+def token_counts(texts) -> list:
+    """Number of tokens the embeddings API will count for each text."""
+    global _embedding_encoding
+    if _embedding_encoding is None:
+        _embedding_encoding = tiktoken.get_encoding("cl100k_base")
+    # encode_ordinary_batch submits every text to a thread pool, which costs more than encoding short chunks
+    return [len(_embedding_encoding.encode_ordinary(text)) for text in texts]
+
+def count_tokens(texts) -> int:
+    return sum(token_counts(texts))
+
+def retry_after_seconds(response) -> Optional[float]:
+    """Delay requested by the API in the retry-after-ms or Retry-After header, if any."""
+    headers = getattr(response, "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        if headers.get("retry-after"):
+            return float(headers["retry-after"])
+    except ValueError:
+        pass
+    return None
+
+class EmbeddingError(Exception):
+    """Raised when embeddings could not be generated."""
+
+# Request embeddings from the API, bypassing the cache
+async def request_embeddings(texts, model="text-embedding-3-small", api_key=None, tokens=None, priority=False):
+    """
+    Fetch OpenAI embeddings.
+
+    Waits for rate limit capacity first, in the priority lane if priority is
+    set, then retries rate limited, failed and timed out requests with
+    exponential backoff, honouring Retry-After. tokens is the token count of
+    the texts, if the caller already knows it. Returns None if every attempt
+    fails.
+    """
+    # Read the key per call so it reflects the environment after load_dotenv()
+    api_key = api_key or os.getenv("OPENAI_API_KEY")
     url = "https://api.openai.com/v1/embeddings"
     headers = {"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"}
     data = {"input": texts, "model": model}
-    response = requests.post(url, headers=headers, data=json.dumps(data))
-    
-    if response.status_code == 200:
-        return response.json()["data"]
-    else:
-        print(f"❌ Embedding Error {response.status_code}: {response.text}")
-        return None
+    content = json.dumps(data)
+    await embedding_rate_limiter.acquire(tokens if tokens is not None else count_tokens(texts), priority)
+
+    for attempt in range(EMBEDDING_MAX_RETRIES + 1):
+        delay = None
+        try:
+            response = await get_http_client().post(url, headers=headers, content=content)
+        except httpx.TransportError as e:
+            error = f"{type(e).__name__}: {e}"
+        else:
+            if response.status_code == 200:
+                return sorted(response.json()["data"], key=lambda item: item["index"])
+            error = f"{response.status_code}: {response.text}"
+            if response.status_code not in RETRYABLE_STATUS_CODES:
+                break
+            delay = retry_after_seconds(response)
+
+        if attempt == EMBEDDING_MAX_RETRIES:
+            break
+        if delay is None:
+            delay = min(30.0, 0.5 * 2 ** attempt) * random.uniform(0.5, 1.0)
+        print(f"⚠️ Embedding request failed ({error[:200]}), retrying in {delay:.1f}s...")
+        await asyncio.sleep(delay)
+
+    print(f"❌ Embedding Error {error}")
+    return None
+
+def pack_embedding_batches(counts, max_tokens=None, max_inputs=None) -> list:
+    """
+    Split texts with the given token counts into consecutive (start, end, tokens)
+    batches of at most max_tokens tokens and max_inputs texts. A text larger
+    than max_tokens gets a batch of its own.
+    """
+    max_tokens = max_tokens or EMBEDDING_BATCH_MAX_TOKENS
+    max_inputs = max_inputs or EMBEDDING_BATCH_MAX_INPUTS
+    batches = []
+    start, tokens = 0, 0
+    for i, count in enumerate(counts):
+        if i > start and (tokens + count > max_tokens or i - start >= max_inputs):
+            batches.append((start, i, tokens))
+            start, tokens = i, 0
+        tokens += count
+    if len(counts) > start:
+        batches.append((start, len(counts), tokens))
+    return batches
+
+# Generate embeddings
+async def get_embeddings(texts, model="text-embedding-3-small", priority=False):
+    """
+    Fetch OpenAI embeddings, only calling the API for texts not already cached.
+
+    Uncached texts are packed into token-limited batches, up to
+    EMBEDDING_CONCURRENCY of which are in flight at once under the rate
+    limiter. Batches that succeed are cached even if another one fails.
+    Set priority for embeddings a user is waiting on, such as questions.
+    """
+    # The cache's lock is shared with ingestion threads that write to it, so never wait on it on the event loop
+    vectors = await asyncio.to_thread(embedding_cache.get_many, model, texts)
+
+    # Embed each distinct uncached text once
+    missing = list(dict.fromkeys(text for text, vector in zip(texts, vectors) if vector is None))
+    if missing:
+        semaphore = asyncio.Semaphore(EMBEDDING_CONCURRENCY)
+
+        async def fetch(start, end, tokens):
+            async with semaphore:
+                fetched = await request_embeddings(missing[start:end], model, tokens=tokens, priority=priority)
+            if fetched is None:
+                return None
+            batch_vectors = [item["embedding"] for item in fetched]
+            await asyncio.to_thread(embedding_cache.put_many, model, missing[start:end], batch_vectors)
+            return batch_vectors
+
+        # Tokenizing thousands of chunks takes a while, so keep it off the event loop
+        batches = pack_embedding_batches(await asyncio.to_thread(token_counts, missing))
+        results = await asyncio.gather(*(fetch(*batch) for batch in batches))
+        if any(result is None for result in results):
+            return None
+        # Batches are consecutive slices of missing, so their results line up with it in order
+        fetched_vectors = [vector for result in results for vector in result]
+        by_text = dict(zip(missing, fetched_vectors))
+        vectors = [vector if vector is not None else by_text[text] for text, vector in zip(texts, vectors)]
+
+    return [{"embedding": vector, "index": i} for i, vector in enumerate(vectors)]
+
+async def embed_text(text: str) -> list:
+    """Embedding of a single text a user is waiting on, raising EmbeddingError if the API keeps failing."""
+    embeddings = await get_embeddings([text], priority=True)
+    if embeddings is None:
+        raise EmbeddingError("Failed to generate an embedding")
+    return embeddings[0]["embedding"]
     
-# Background task to process uploaded file content
-def process_data_content(file_content, file_name, file_type, temp_file_path):
-    """Process file content in the background"""
-    try:
-        # Split text
-        text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+# Splitting is stateless, so one splitter (and its tokenizer) serves every upload
+_text_splitter = None
+
+def get_text_splitter():
+    global _text_splitter
+    if _text_splitter is None:
+        _text_splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
             model_name="gpt-4",
             chunk_size=150,  # Token size
             chunk_overlap=20,  # Small overlap to maintain context between chunks
         )
-        
-        # Clean and split text
-        text_chunks = [clean_text(chunk) for chunk in text_splitter.split_text(file_content)]
-        print(f"✅ Total Chunks from {file_type.upper()}: {len(text_chunks)}")
-        
-        # Generate embeddings
-        embeddings_objects = get_embeddings(text_chunks)
-        if embeddings_objects is None:
-            print(f"❌ Failed to generate embeddings for {file_name}.")
-            return
-        
-        # Upsert into Pinecone
-        vectors_to_upsert = []
-        for text, embedding in zip(text_chunks, embeddings_objects):
-            # Generate a hash for the content to be used as the vector ID
-            content_hash = generate_content_hash(text)
-            
-            # Check if this hash already exists in the Pinecone index
-            if not check_if_exists(index, content_hash):
-                # Prepare the record to upsert
-                record = {
-                    "id": content_hash,
-                    "values": embedding["embedding"],
-                    "metadata": {
-                        "source_text": text, 
-                        "file_name": file_name,
-                        "file_type": file_type
-                    }
-                }
-                vectors_to_upsert.append(record)
-        
-        # Batch upsert to Pinecone (more efficient)
-        if vectors_to_upsert:
-            index.upsert(vectors=vectors_to_upsert, namespace="game_docs")
-            print(f"✅ {len(vectors_to_upsert)} new chunks from {file_name} successfully inserted into Pinecone.")
+    return _text_splitter
+
+def iter_pdf_pages(path, job=None):
+    """Yield the text of each PDF page in order, extracted across the PDF worker processes."""
+    total_pages = pdf_page_count(path)
+    if job is not None:
+        job.update(units="pages", source_total=total_pages)
+    on_pages = (lambda count: job.advance(source_done=count)) if job is not None else None
+    return pdf_extractor.iter_pages(path, on_pages=on_pages, total_pages=total_pages)
+
+def iter_text_file(path, block_chars=1 << 16, job=None):
+    """Yield a text file in blocks of block_chars characters, counting bytes on the job if given."""
+    if job is not None:
+        job.update(units="bytes", source_total=os.path.getsize(path))
+    with open(path, "r", encoding="utf-8") as f:
+        while block := f.read(block_chars):
+            yield block
+            if job is not None:
+                job.advance(source_done=len(block.encode("utf-8")))
+
+def iter_chunk_batches(blocks, batch_size):
+    """
+    Split a stream of text blocks into lists of at most batch_size cleaned chunks.
+
+    The last chunk of every block is carried into the next one, so chunks
+    span block boundaries as if the whole text had been split at once.
+    """
+    splitter = get_text_splitter()
+    batch, carry = [], ""
+    for block in blocks:
+        pieces = splitter.split_text(carry + block)
+        carry = pieces.pop() if pieces else ""
+        for piece in pieces:
+            batch.append(clean_text(piece))
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if carry.strip():
+        batch.append(clean_text(carry))
+    if batch:
+        yield batch
+
+def iter_record_batches(records, batch_size):
+    """
+    Turn a stream of (label, text) records into lists of at most batch_size
+    chunks, one chunk per record. Records longer than RECORD_MAX_TOKENS are
+    split, every piece keeping the record's label.
+    """
+    splitter = get_text_splitter()
+    batch = []
+    for label, text in records:
+        if count_tokens([text]) <= RECORD_MAX_TOKENS:
+            chunks = [render_record(label, text)]
         else:
-            print(f"⚠️ No new content to insert from {file_name}.")
-    
+            chunks = [render_record(label, piece) for piece in splitter.split_text(text)]
+        for chunk in chunks:
+            batch.append(chunk)
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+def iter_file_records(path, file_type, job=None):
+    """Yield (label, text) records from a JSON or CSV file, counting bytes on the job if given."""
+    if job is not None:
+        job.update(units="bytes", source_total=os.path.getsize(path))
+    on_progress = (lambda position: job.update(source_done=position)) if job is not None else None
+    reader = iter_json_records if file_type == "json" else iter_csv_records
+    return reader(path, on_progress=on_progress)
+
+def chunk_hash(text: str, game: str) -> str:
+    """Vector ID of a chunk. Game chunks include the game so the same text can be stored for several games."""
+    return generate_content_hash(text if game == GENERAL_GAME else f"{game}\n{text}")
+
+async def run_stages(*coroutines):
+    """Run coroutines concurrently; if one fails, cancel the rest so none is left blocked on a queue"""
+    tasks = [asyncio.ensure_future(coroutine) for coroutine in coroutines]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        raise
+
+async def delete_chunks(hashes, namespace="game_docs", save=True):
+    """Delete chunks from the vector store and the keyword index, in batches, saving both unless save is False."""
+    await delete_in_batches(
+        vector_store,
+        hashes,
+        namespace=namespace,
+        batch_size=DELETE_BATCH_SIZE,
+        concurrency=UPSERT_CONCURRENCY,
+        max_retries=UPSERT_MAX_RETRIES,
+        on_batch=lambda batch: known_chunks.remove_many(namespace, batch),
+    )
+    lexical_index.remove(hashes, namespace=namespace)
+    if save:
+        # Writing the files can take seconds on a large store, keep it off the event loop
+        await asyncio.to_thread(vector_store.save)
+        await asyncio.to_thread(lexical_index.save)
+
+def invalidate_answers(games):
+    """
+    Drop cached answers grounded in the documents of these games. General
+    chunks serve every game, and questions asked without a game ("") search
+    the documents of every game.
+    """
+    if GENERAL_GAME in games:
+        answer_cache.invalidate_docs()
+    else:
+        for game in [*games, ""]:
+            answer_cache.invalidate_docs(game)
+
+def on_server_loop(callback, *args):
+    """Run callback on the server's event loop, which owns state such as the answer cache."""
+    try:
+        running = asyncio.get_running_loop()
+    except RuntimeError:
+        running = None
+    if server_loop is None or server_loop is running:
+        callback(*args)
+    else:
+        server_loop.call_soon_threadsafe(callback, *args)
+
+async def ingest_stream(blocks, file_name, file_type, game_name=None, file_hash=None, job=None, chunker=iter_chunk_batches):
+    """
+    Ingest a stream of text blocks (PDF pages, file blocks, a whole text),
+    tagging every chunk with its game. Returns the number of chunks in the file.
+    Progress is reported on the job, if one is given. chunker turns the blocks
+    into batches of chunks; iter_record_batches takes JSON or CSV records.
+
+    Re-uploading a changed file diffs its chunks against the previous version
+    in the manifest: only added chunks are embedded and upserted, and chunks
+    the edit removed are deleted in batches.
+
+    Splitting, embedding and upserting run as concurrent stages connected by
+    bounded queues: embedding starts with the first batch of chunks, and only
+    a few batches are held in memory whatever the size of the file.
+    """
+    game = game_key(game_name)
+    # An identical file for the same game that was fully ingested before needs no work
+    if file_hash is not None and manifest.is_ingested("game_docs", file_name, game, file_hash):
+        print(f"⚠️ {file_name} ({game}) is unchanged since it was last ingested.")
+        chunk_count = manifest.chunk_count("game_docs", file_name, game)
+        if job is not None:
+            job.update(chunks_split=chunk_count, chunks_done=chunk_count, chunks_total=chunk_count)
+        return chunk_count
+
+    # The file's chunks are recorded before they are written, so a partly ingested file can still be deleted.
+    # A re-upload starts a new generation: chunks the previous version had are moved to it, the rest are new
+    generation, previous_complete = manifest.start_file("game_docs", file_name, game, file_type)
+    chunk_batches = asyncio.Queue(maxsize=INGEST_QUEUE_BATCHES)
+    vector_batches = asyncio.Queue(maxsize=INGEST_QUEUE_BATCHES)
+    seen = set()
+    counts = {"chunks": 0, "new": 0, "unchanged": 0}
+
+    def chunk_metadata(text):
+        return {
+            "source_text": text, 
+            "file_name": file_name,
+            "file_type": file_type,
+            "game": game
+        }
+
+    def report(**fields):
+        if job is not None:
+            job.update(**fields)
+
+    def progress(**increments):
+        if job is not None:
+            job.advance(**increments)
+
+    async def split():
+        # Extraction and tokenizing are CPU bound, so every batch is produced in a worker thread
+        report(stage="splitting")
+        batches = chunker(blocks, INGEST_BATCH_CHUNKS)
+        while (texts := await asyncio.to_thread(next, batches, None)) is not None:
+            await chunk_batches.put(texts)
+        report(stage="embedding")
+        for _ in range(INGEST_EMBED_CONCURRENCY):
+            await chunk_batches.put(None)
+
+    async def embed():
+        while (texts := await chunk_batches.get()) is not None:
+            chunks = {}
+            for text in texts:
+                content_hash = chunk_hash(text, game)
+                if content_hash not in seen:
+                    seen.add(content_hash)
+                    chunks[content_hash] = text
+            if not chunks:
+                continue
+            counts["chunks"] += len(chunks)
+            progress(chunks_split=len(chunks))
+            added = manifest.add_chunks("game_docs", file_name, game, list(chunks), generation)
+
+            # Chunks the fully ingested previous version already had are indexed and stored: skip them.
+            # After an incomplete ingestion they may not be, so every chunk is checked as before
+            if previous_complete:
+                counts["unchanged"] += len(chunks) - len(added)
+                progress(chunks_done=len(chunks) - len(added))
+                chunks = {content_hash: chunks[content_hash] for content_hash in added}
+                if not chunks:
+                    continue
+
+            # Keyword-index the chunks, so re-uploading also indexes chunks stored before
+            lexical_index.add(
+                [{"id": content_hash, "text": text, "metadata": chunk_metadata(text)} for content_hash, text in chunks.items()],
+                namespace="game_docs",
+                game_name=game,
+            )
+
+            # Only embed chunks that are not already in the vector store
+            existing = await find_existing_hashes(vector_store, list(chunks), namespace="game_docs")
+            new_chunks = {content_hash: text for content_hash, text in chunks.items() if content_hash not in existing}
+            progress(chunks_done=len(chunks) - len(new_chunks))
+            if not new_chunks:
+                continue
+            embeddings_objects = await get_embeddings(list(new_chunks.values()))
+            if embeddings_objects is None:
+                raise EmbeddingError(f"Failed to generate embeddings for {file_name}")
+            counts["new"] += len(new_chunks)
+            # float32 arrays take a fraction of the memory of lists of floats while batches wait in the queue
+            await vector_batches.put([
+                {"id": content_hash, "values": np.asarray(embedding["embedding"], dtype=np.float32), "metadata": chunk_metadata(text)}
+                for (content_hash, text), embedding in zip(new_chunks.items(), embeddings_objects)
+            ])
+
+    async def embed_all():
+        # Several embedding requests in flight, each worker taking the next batch of chunks
+        await run_stages(*(embed() for _ in range(INGEST_EMBED_CONCURRENCY)))
+        report(stage="upserting", chunks_total=counts["chunks"])
+        await vector_batches.put(None)
+
+    async def upsert():
+        # Upsert in size-limited batches, several in flight at once
+        while (vectors := await vector_batches.get()) is not None:
+            await upsert_in_batches(
+                vector_store,
+                vectors,
+                namespace="game_docs",
+                max_bytes=UPSERT_BATCH_MAX_BYTES,
+                max_vectors=UPSERT_BATCH_MAX_VECTORS,
+                concurrency=UPSERT_CONCURRENCY,
+                max_retries=UPSERT_MAX_RETRIES,
+                on_batch=written,
+            )
+
+    def written(batch):
+        # Remember written chunks per batch so a retry after a failure skips them
+        known_chunks.add_many("game_docs", [record["id"] for record in batch])
+        progress(chunks_done=len(batch))
+
+    stale = []
+    try:
+        await run_stages(split(), embed_all(), upsert())
+        if counts["chunks"]:
+            # Delete the chunks the edit removed, unless another file still uses them
+            stale, orphans = manifest.stale_chunks("game_docs", file_name, game, generation)
+            if stale:
+                report(stage="removing")
+                await delete_chunks(orphans, save=False)
+                manifest.remove_stale_chunks("game_docs", file_name, game, generation)
+                # Cached answers may have been grounded in the removed chunks
+                on_server_loop(invalidate_answers, [game])
+    finally:
+        report(stage="saving")
+        lexical_index.save()
+        vector_store.save()
+
+    if counts["chunks"] == 0:
+        # Nothing extracted: keep the previous version, if any, rather than deleting it
+        if generation == 1:
+            manifest.remove_files("game_docs", [{"file_name": file_name, "game": game}])
+        return 0
+    print(
+        f"✅ {file_name} ({game}): {counts['chunks']} chunks, {counts['unchanged']} unchanged, "
+        f"{counts['new']} new chunks inserted into the vector store, {len(stale)} removed."
+    )
+    if file_hash is not None:
+        manifest.mark_ingested("game_docs", file_name, game, file_hash)
+    return counts["chunks"]
+
+# Ingest content that is already in memory, such as an imported web page
+async def process_data_content(file_content, file_name, file_type, temp_file_path, game_name=None, job=None):
+    """Process file content, tagging every chunk with its game. Returns the number of chunks."""
+    try:
+        file_hash = generate_content_hash(f"{game_key(game_name)}\n{file_content}")
+        return await ingest_stream([file_content], file_name, file_type, game_name, file_hash, job)
     finally:
         # Clean up resources
         if temp_file_path is not None and os.path.exists(temp_file_path):
             os.remove(temp_file_path)
 
 
+# Imported pages are tracked one by one, under their normalised URL
+def url_file_name(url: str) -> str:
+    """Manifest name of an imported page: its URL with the scheme and host lowercased and any fragment dropped"""
+    parts = urlparse(url.strip())
+    return urlunparse((parts.scheme.lower(), parts.netloc.lower(), parts.path or "/", parts.params, parts.query, ""))
+
+def find_url_files(name: str, game: Optional[str] = None) -> list:
+    """Manifest entries of an imported page given its URL, or of every page of a site given its domain"""
+    parts = urlparse(name.strip())
+    if parts.scheme and parts.netloc:
+        return manifest.find_files("game_docs", url_file_name(name), game)
+    domain = name.strip().lower().rstrip("/")
+    files = [file for scheme in ("http", "https")
+             for file in manifest.find_files_under("game_docs", f"{scheme}://{domain}/", game)]
+    # Sites imported before pages were tracked one by one are recorded under their domain
+    return files + manifest.find_files("game_docs", f"{domain}_url", game)
+
 # Function to generate a hash for the content
 def generate_content_hash(text: str):
     """Generate a hash for the given content."""
     return hashlib.md5(text.encode('utf-8')).hexdigest()
 
-# Function to check if the hashed vector already exists in Pinecone
-def check_if_exists(index, content_hash):
-    # Try fetching the vector by the content hash as the vector ID
-    response = index.fetch([content_hash], namespace="game_docs")
-    
-    # Check if the vector exists
-    return content_hash in response.vectors if response and response.vectors else False
+# Function to find which chunk hashes are already stored
+async def find_existing_hashes(store, hashes, namespace="game_docs"):
+    """
+    Return the subset of hashes already in the vector store.
+
+    Hashes in the local known-chunk set are trusted without a round-trip. The
+    rest are checked with concurrent batched fetches and remembered when found.
+    """
+    existing = known_chunks.contains_many(namespace, hashes)
+    unknown = [content_hash for content_hash in hashes if content_hash not in existing]
+    batches = [unknown[i:i + EXISTENCE_FETCH_BATCH] for i in range(0, len(unknown), EXISTENCE_FETCH_BATCH)]
+    fetched = await asyncio.gather(*(store.afetch(batch, namespace=namespace) for batch in batches))
+    found = {vector_id for records in fetched for vector_id in records}
+    if found:
+        known_chunks.add_many(namespace, found)
+    return existing | found
 
 
 # Decision system prompt
@@ -253,86 +943,221 @@ Answer:
 def format_search_results(results):
     return "\n\n".join(doc["body"] for doc in results)
 
-def expand_query(question: str) -> list:
+async def expand_query(question: str) -> list:
     """Generate 3 search variations for better retrieval"""
     prompt = f"""Generate 3 search variations for: {question}
     Focus on game-specific terms and common misunderstandings.
     Return as bullet points:"""
     
-    response = completion(
+    response = await acompletion(
         model="gpt-4-turbo",
         messages=[{"role": "user", "content": prompt}],
         temperature=0.7
     )
     return [line[2:] for line in response.choices[0].message.content.split("\n") if line.startswith("-")]
 
-def cot_analysis(question: str, context: str) -> str:
-    """Chain-of-Thought reasoning about the question"""
-    prompt = f"""Analyze this gaming question step-by-step:
-    1. Identify key game elements
-    2. List required mechanics
-    3. Match with context
-    4. Identify knowledge gaps
-    
-    Question: {question}
-    Context: {context}
-    """
-    return completion(
-        model="gpt-4-turbo",
-        messages=[{"role": "system", "content": prompt}],
-        temperature=0.3
-    ).choices[0].message.content
-
-def determine_complexity(question: str, context: str) -> bool:
-    """Determine if a question is complex enough to warrant CoT reasoning"""
-    # Simple heuristics approach
-    complexity_indicators = [
-        len(question.split()) > 12,  # Longer questions tend to be more complex
-        "?" in question and "," in question,  # Questions with multiple clauses
-        any(word in question.lower() for word in ["compare", "difference", "better", "versus", "vs", "strategy", "build", "optimize"]),
-        len(context.split()) > 500  # Large context might need better reasoning
-    ]
-    
-    # If multiple indicators are true, it's likely complex
-    return sum(complexity_indicators) >= 2
-
-def validate_response(response: str, context: str) -> bool:
-    """Check if response is context-supported"""
-    prompt = f"""Verify if this answer is fully supported by context (1=yes/0=no):
-    Context: {context}
-    Response: {response}"""
-    return completion(
-        model="gpt-4-turbo",
-        messages=[{"role": "system", "content": prompt}],
-        temperature=0
-    ).choices[0].message.content.strip() == "1"    
+# Validates answers off the request path
+response_auditor = ResponseAuditor(
+    os.path.join(DATA_DIR, "validation_log.jsonl"),
+    batch_size=int(os.getenv("VALIDATION_BATCH_SIZE", "5")),
+    batch_wait=float(os.getenv("VALIDATION_BATCH_WAIT", "2.0")),
+)
+
+def search_games(game_name: Optional[str]) -> Optional[list]:
+    """Games a search is restricted to: the given game plus general data, or every game when none is given."""
+    if not game_name:
+        return None
+    return list(dict.fromkeys([game_key(game_name), GENERAL_GAME]))
 
-def search(query_text: str, namespaces: list, top_k: int = 3):
+async def search(query_text: str, namespaces: list, top_k: int = RETRIEVAL_TOP_K, game_name: Optional[str] = None):
     """Search with query_text"""
     # Generate embedding for the provided query text
-    query_embedding = get_embeddings([query_text])[0]["embedding"]
-    all_results = []
-    for namespace in namespaces:
-        results = index.query(vector=query_embedding, top_k=top_k, include_metadata=True, namespace=namespace)
-        all_results.extend(results["matches"])
-    return {"matches": all_results}
+    query_embedding = await embed_text(query_text)
+    return await search_by_vector(query_embedding, namespaces, top_k, game_name)
+
+async def search_by_vector(query_embedding: list, namespaces: list, top_k: int = RETRIEVAL_TOP_K, game_name: Optional[str] = None):
+    """Search with an already computed query embedding, querying every namespace concurrently"""
+    games = search_games(game_name)
+    results = await asyncio.gather(*(
+        vector_store.aquery(query_embedding, top_k, namespace, games) for namespace in namespaces
+    ))
+    results = [{"matches": matches} for matches in results]
+    return merge_search_results(*results, limit=top_k * len(namespaces))
+
+async def multi_query_search(queries: list, namespaces: list, top_k: int = RETRIEVAL_TOP_K, game_name: Optional[str] = None):
+    """Embed every query in one batched request and search them concurrently, returning one result per query"""
+    embeddings = await get_embeddings(queries, priority=True)
+    if embeddings is None:
+        raise EmbeddingError("Failed to generate query embeddings")
+    return list(await asyncio.gather(*(
+        search_by_vector(embedding["embedding"], namespaces, top_k, game_name) for embedding in embeddings
+    )))
+
+async def lexical_search(query_text: str, query_embedding: list, namespaces: list, game_name: Optional[str] = None, top_k: int = RETRIEVAL_TOP_K):
+    """
+    Keyword search with BM25 over every namespace.
+
+    BM25 scores are not comparable with cosine similarities, so each hit is
+    re-scored with the similarity of its stored vector to the query. The BM25
+    score is kept as "lexical_score". Hits missing from the vector store, or
+    less similar than RETRIEVAL_MIN_SCORE like vector matches, are dropped.
+    """
+    # In a worker thread: scoring is pure Python, and the index lock may be held by an ingestion job
+    searched = await asyncio.gather(*(
+        asyncio.to_thread(lexical_index.search, query_text, namespace, top_k, game_name) for namespace in namespaces
+    ))
+    results = {namespace: matches for namespace, matches in zip(namespaces, searched) if matches}
+    if not results:
+        return {"matches": []}
+
+    # One fetch per namespace for the stored vectors of the hits
+    fetched = await asyncio.gather(*(
+        vector_store.afetch([match["id"] for match in matches], namespace) for namespace, matches in results.items()
+    ))
+    records = {vector_id: record for found in fetched for vector_id, record in found.items()}
+
+    query = np.asarray(query_embedding, dtype=np.float32)
+    query /= np.linalg.norm(query) or 1.0
+    rescored = []
+    for match in (match for matches in results.values() for match in matches):
+        record = records.get(match["id"])
+        if record is None:
+            continue
+        values = np.asarray(record["values"], dtype=np.float32)
+        score = float(values @ query / (np.linalg.norm(values) or 1.0))
+        if score < RETRIEVAL_MIN_SCORE:
+            continue
+        rescored.append({
+            "id": match["id"],
+            "score": score,
+            "lexical_score": match["score"],
+            "metadata": match["metadata"],
+        })
+    rescored.sort(key=lambda match: match["lexical_score"], reverse=True)
+    return {"matches": rescored}
 
 def needs_expansion(question: str) -> bool:
     """Simple check if query expansion is needed"""
     # Only expand queries that are short or lack specific game terms
     return len(question.split()) <= 5 or "?" in question and len(question) < 40
 
+def merge_search_results(*search_results, limit: Optional[int] = None, min_score: float = RETRIEVAL_MIN_SCORE):
+    """
+    Merge several search results by score.
+
+    Matches below min_score are dropped, and matches with the same ID or the
+    same source text are collapsed into the best scoring one.
+    """
+    merged = sorted(
+        (match for results in search_results for match in results["matches"]),
+        key=lambda match: match["score"],
+        reverse=True,
+    )
+    seen = set()
+    kept = []
+    for match in merged:
+        if match["score"] < min_score:
+            break
+        key = match_key(match)
+        if key in seen:
+            continue
+        seen.add(key)
+        kept.append(match)
+    return {"matches": kept[:limit] if limit else kept}
+
+def match_key(match):
+    """Identify a match by its normalised source text, or by its ID if it has none."""
+    source_text = (match["metadata"] or {}).get("source_text", "")
+    return " ".join(source_text.lower().split()) or match["id"]
+
+def reciprocal_rank_fusion(search_results: list, k: int = 60, limit: Optional[int] = None):
+    """
+    Fuse the ranked results of several queries with reciprocal rank fusion.
+
+    Each match scores sum(1 / (k + rank)) over the result lists it appears in,
+    so chunks that rank well for several query variants rise to the top. The
+    similarity score of the best occurrence is kept on each match.
+    """
+    fused_scores = {}
+    best_matches = {}
+    for results in search_results:
+        for rank, match in enumerate(results["matches"], start=1):
+            key = match_key(match)
+            fused_scores[key] = fused_scores.get(key, 0.0) + 1.0 / (k + rank)
+            if key not in best_matches or match["score"] > best_matches[key]["score"]:
+                best_matches[key] = match
+    ranked = sorted(fused_scores, key=fused_scores.get, reverse=True)
+    fused = [best_matches[key] for key in ranked]
+    return {"matches": fused[:limit] if limit else fused}
+
 def format_docs(search_results):
-    """Format Pinecone search results into readable context."""
+    """Format vector store search results into readable context."""
     if not search_results["matches"]:
         return ""
     
     return "\n\n".join([match["metadata"]["source_text"] for match in search_results["matches"]])
 
 
+def score_relevance(question: str, context: str, matches: list, game_name: Optional[str] = None, k1: float = 0.5) -> dict:
+    """
+    Score locally how likely the retrieved context is to answer the question.
+
+    Combines three features, weighted by the RELEVANCE_WEIGHT_* settings,
+    into a score between 0 and 1:
+    - similarity: the best retrieval score, rescaled between RELEVANCE_SIM_LOW and RELEVANCE_SIM_HIGH
+    - overlap: BM25-style saturated term frequency of the question's terms in the context
+    - game: how many of the game name's terms appear in the context
+
+    The verdict is "1" at or above RELEVANCE_ACCEPT, "0" at or below
+    RELEVANCE_REJECT, and None in between, where the LLM decides.
+    """
+    game_terms = set(tokenize(game_name or ""))
+    question_terms = set(tokenize(question)) - game_terms
+    # Count context terms once instead of searching the context per keyword
+    context_counts = {}
+    for token in tokenize(context):
+        context_counts[token] = context_counts.get(token, 0) + 1
+
+    best_score = max((match["score"] for match in matches), default=0.0)
+    similarity = min(1.0, max(0.0, (best_score - RELEVANCE_SIM_LOW) / (RELEVANCE_SIM_HIGH - RELEVANCE_SIM_LOW)))
+    saturated = [
+        context_counts.get(term, 0) * (k1 + 1) / (context_counts.get(term, 0) + k1) / (k1 + 1)
+        for term in question_terms
+    ]
+    overlap = sum(saturated) / len(saturated) if saturated else 0.0
+    game = sum(1 for term in game_terms if term in context_counts) / len(game_terms) if game_terms else 0.5
+
+    score = RELEVANCE_WEIGHT_SIMILARITY * similarity + RELEVANCE_WEIGHT_OVERLAP * overlap + RELEVANCE_WEIGHT_GAME * game
+    verdict = "1" if score >= RELEVANCE_ACCEPT else "0" if score <= RELEVANCE_REJECT else None
+    return {
+        "best_similarity": best_score,
+        "similarity": similarity,
+        "overlap": overlap,
+        "game": game,
+        "score": score,
+        "verdict": verdict,
+    }
+
+def log_relevance_decision(question: str, relevance: Optional[dict], decision: str, source: str):
+    """Append a relevance decision to the log used to tune the thresholds."""
+    os.makedirs(os.path.dirname(RELEVANCE_LOG_PATH) or ".", exist_ok=True)
+    with open(RELEVANCE_LOG_PATH, "a", encoding="utf-8") as log:
+        log.write(json.dumps({
+            "timestamp": datetime.datetime.now().isoformat(),
+            "question": question,
+            "relevance": relevance,
+            "decision": decision,
+            "source": source,
+        }) + "\n")
+
 # Decision system to decide if context can answer the question
-def decision_system(context, question):
-    """Decision system to decide if context can answer the question."""
+async def decision_system(context, question, relevance=None):
+    """
+    Decision system to decide if context can answer the question.
+
+    relevance is the output of score_relevance. A confident local verdict is
+    used directly and only the uncertain band is escalated to the LLM.
+    """
     # Input validation
     if not context or not isinstance(context, str) or context.isspace():
         print("❌ No valid context found. Returning 0.")
@@ -342,24 +1167,25 @@ def decision_system(context, question):
         print("❌ No valid question found. Returning 0.")
         return "0"
     
-    # Check for exact keyword matches first (simple heuristic)
-    question_keywords = set(question.lower().split())
-    
-    # Count keyword matches in context
-    matches = sum(1 for word in question_keywords if word in context.lower())
-    keyword_match_ratio = matches / len(question_keywords) if question_keywords else 0
-    
-    # If strong keyword match, use the context without calling the LLM
-    if keyword_match_ratio > 0.5 and len(question_keywords) >= 2:
-        print(f"✅ Strong keyword match ({keyword_match_ratio:.2f}). Using context without LLM check.")
-        return "1"
+    # Use the local relevance gate when it is confident
+    if relevance is not None and relevance["verdict"] is not None:
+        print(f"✅ Local relevance gate returned {relevance['verdict']} (score {relevance['score']:.2f}).")
+        # Appending to the log is blocking file I/O, kept off the event loop
+        await asyncio.to_thread(log_relevance_decision, question, relevance, relevance["verdict"], "local")
+        return relevance["verdict"]
     
+    decision = await llm_decision(context, question)
+    await asyncio.to_thread(log_relevance_decision, question, relevance, decision, "llm")
+    return decision
+
+async def llm_decision(context, question):
+    """Ask the LLM whether the context can answer the question."""
     try:
         # Format the prompt with the context and question
         decision_prompt = decision_system_prompt.format(context=context, question=question)
         
         # Query the LLM with decision prompt
-        decision_response = completion(
+        decision_response = await acompletion(
             model="gpt-4o-mini",
             messages=[{"content": decision_prompt, "role": "system"}],
             max_tokens=3,  # Small number to avoid longer responses
@@ -388,245 +1214,436 @@ def decision_system(context, question):
         return "0"
     
     
-# Function to store question and response in Pinecone
-def qa_storage(question: str, response: str, index, namespace="games_queries"):
-    """Store the question and response pair in Pinecone index."""
-    # Generate embeddings for the question and response
-    question_embedding = get_embeddings([question])[0]["embedding"]
-    response_embedding = get_embeddings([response])[0]["embedding"]
-    
-    # Create a unique ID for this entry
-    unique_id = str(uuid.uuid4())
-    
-    # Create records for the question and response
-    records = [
-        {"id": f"{unique_id}_question", "values": question_embedding, "metadata": {"question": question, "type": "question"}},
-        {"id": f"{unique_id}_response", "values": response_embedding, "metadata": {"response": response, "type": "response"}}
-    ]
-    
-    # Upsert the records into Pinecone
-    index.upsert(vectors=records, namespace=namespace)
-    print("✅ Question and Response successfully stored in Pinecone.")
-
-def rag_pipeline(question, game_name=None):
+async def rag_pipeline(question, game_name=None, on_event=None):
     """Complete RAG pipeline implementation that integrates with game detection"""
     # If game_name is provided, append it to the question
     if game_name:
         question = f"{question} in {game_name}"
         
     print(question)
-    return response_generation(question)
 
+    # Serve repeated questions straight from the semantic cache
+    lookup_start = time.perf_counter()
+    question_embedding = await embed_text(question)
+    cached = answer_cache.lookup(question_embedding, game_name)
+    if cached is not None:
+        print(f"⚡ Answer cache hit ({cached.similarity:.3f}) for: {cached.question}")
+        if on_event is not None:
+            await on_event("token", {"token": cached.answer})
+            await on_event("timings", {"cache_lookup": time.perf_counter() - lookup_start})
+        return cached.answer
+
+    response_text, context, grounding = await response_generation(question, on_event, question_embedding, game_name)
+    if response_text:
+        def cache_answer():
+            answer_cache.store(question_embedding, question, response_text, grounding, game_name)
+
+        # Validation runs after the answer has been returned
+        if CACHE_VALIDATED_ONLY:
+            response_auditor.submit(question, response_text, context, grounding, on_valid=cache_answer)
+        else:
+            cache_answer()
+            response_auditor.submit(question, response_text, context, grounding)
+    return response_text
+
+
+class StageGraph:
+    """
+    Runs async pipeline stages as a dependency graph.
+
+    Every stage starts as soon as the stages it depends on have finished, so
+    independent work overlaps. Stages whose output ends up unused can be
+    cancelled, and anything still pending once the target stage completes is
+    cancelled automatically.
+    """
+
+    def __init__(self):
+        self.stages = {}
+        self.tasks = {}
+        self.timings = {}
+
+    def add_stage(self, name, func, deps=()):
+        """Register a stage; func receives the results of deps as keyword arguments."""
+        self.stages[name] = (func, tuple(deps))
 
-# Modify your response_generation function with minimal changes
-def response_generation(question):
+    async def _run_stage(self, name):
+        func, deps = self.stages[name]
+        inputs = {dep: await self.tasks[dep] for dep in deps}
+        start = time.perf_counter()
+        try:
+            return await func(**inputs)
+        finally:
+            self.timings[name] = time.perf_counter() - start
+
+    async def result(self, name):
+        """Wait for a stage and return its result."""
+        return await self.tasks[name]
+
+    def cancel(self, name):
+        """Cancel a stage whose output is no longer needed."""
+        task = self.tasks.get(name)
+        if task is not None and not task.done():
+            task.cancel()
+            print(f"⏹️ Cancelled unused stage: {name}")
+
+    async def run(self, target):
+        """Start every stage and return the result of the target stage."""
+        self.tasks = {name: asyncio.create_task(self._run_stage(name)) for name in self.stages}
+        try:
+            return await self.tasks[target]
+        finally:
+            pending = [task for task in self.tasks.values() if not task.done()]
+            for task in pending:
+                task.cancel()
+            # Collect cancelled/failed stages so their errors are not reported as unhandled
+            await asyncio.gather(*self.tasks.values(), return_exceptions=True)
+
+
+async def response_generation(question, on_event=None, question_embedding=None, game_name=None):
+    """
+    Answer a question through the staged RAG pipeline.
+
+    Returns the response text, the context it was generated from and its
+    grounding: "docs" when it was answered from the vector store, "web" when
+    it fell back to web search.
+
+    If on_event is given it is awaited with (event, data) for stage changes
+    ("stage"), each generated token ("token") and the final stage timings
+    ("timings"), and the answer is streamed from the LLM.
+    """
     # Define the namespaces
     namespaces = ["game_docs", "game_queries"]
-    
-    # Conditionally apply query expansion
-    if needs_expansion(question):
-        expanded_queries = [question] + expand_query(question)
-        query_text = " ".join(expanded_queries)
-        print("Using expanded query")
-    else:
-        query_text = question
-        print("Using original query without expansion")
-    
-    # Use the query_text for searching
-    search_results = search(query_text, namespaces)
-    context = format_docs(search_results)
-    
-    print("Context: ", context)  # Print context to inspect it
-    
-    # First, use the decision system to decide if the context is relevant
-    decision = decision_system(context, question)
-    
-    if decision == "1":  # If the context can answer the question
-        print("Context can answer the question")
-
-        response = completion(
-            model="gpt-3.5-turbo",
-            messages=[
-                {"content": system_prompt.format(context=context), "role": "system"},
-                {"content": user_prompt.format(question=question), "role": "user"}
-            ],
-            max_tokens=500
-        )
-        response_text = response.choices[0].message.content
-    else:  # If context is not relevant, search online
-        print("Context is NOT relevant. Searching online...")
-        results = DDGS().text(question, max_results=5)
-        
-        # Log the search results for debugging
-        print("DuckDuckGo Search Results:")
-        for result in results:
-            print(f"Title: {result.get('title')}")
-            print(f"Body: {result.get('body')}")
-            print("-----")
-        
-        context = format_search_results(results)
-        print("Found online sources. Generating the response...")
+    graph = StageGraph()
 
-        if determine_complexity(question, context):
-            reasoning = cot_analysis(question, context)
-            print("CoT Reasoning: ", reasoning)
-        
-        response = completion(
-            model="gpt-4-turbo",
-            messages=[
-                {"content": system_prompt.format(context=context), "role": "system"},
-                {"content": user_prompt.format(question=question), "role": "user"}
-            ],
-            max_tokens=500
-        )
-        response_text = response.choices[0].message.content
-
-    # Optionally, validate the response
-    if validate_response(response_text, context):
-        print("✅ Response is validated with context.")
-    
-        # Store the question and the response in Pinecone
-        #qa_storage(question, response_text, index)
-    else:
-        print("⚠️ Response validation failed.")
+    async def notify(event, data):
+        if on_event is not None:
+            await on_event(event, data)
 
-    return response_text
+    async def expand():
+        # Conditionally apply query expansion
+        if needs_expansion(question):
+            print("Using expanded query")
+            return await expand_query(question)
+        print("Using original query without expansion")
+        return []
+
+    async def embed_question():
+        if question_embedding is not None:
+            return question_embedding
+        # Runs while the expansion LLM call is still in flight
+        return await embed_text(question)
+
+    async def retrieve(embed_question):
+        return await search_by_vector(embed_question, namespaces, game_name=game_name)
+
+    async def retrieve_lexical(embed_question):
+        # Exact keyword hits for proper nouns that dense chunks can miss
+        if not HYBRID_SEARCH:
+            return {"matches": []}
+        return await lexical_search(question, embed_question, namespaces, game_name)
+
+    async def retrieve_expanded(expand):
+        # One batched embedding request for all variants, then one query per variant
+        if not expand:
+            return []
+        return await multi_query_search(expand, namespaces, game_name=game_name)
+
+    async def fuse(retrieve, retrieve_lexical, retrieve_expanded):
+        # Fuse the dense and keyword results for the question with each variant's
+        return reciprocal_rank_fusion([retrieve, retrieve_lexical] + retrieve_expanded, limit=RETRIEVAL_TOP_K * len(namespaces))
+
+    async def build_context(fuse):
+        context = format_docs(fuse)
+        print("Context: ", context)  # Print context to inspect it
+        return context
+
+    async def relevance(fuse, build_context):
+        return score_relevance(question, build_context, fuse["matches"], game_name)
+
+    async def decide(build_context, relevance):
+        # Use the decision system to decide if the context is relevant
+        return await decision_system(build_context, question, relevance)
+
+    async def web_search(relevance):
+        # Started speculatively while the decision system is still deciding.
+        # Skip it when the local relevance gate already accepts the context.
+        if relevance["verdict"] == "1":
+            return None
+        # DDGS is synchronous, so run the web search in a worker thread
+        return await asyncio.to_thread(DDGS().text, question, max_results=5)
+
+    async def generate(decide, build_context):
+        if decide == "1":  # If the context can answer the question
+            print("Context can answer the question")
+            graph.cancel("web_search")
+            context = build_context
+            grounding = "docs"
+            model = "gpt-3.5-turbo"
+        else:  # If context is not relevant, use the online results
+            print("Context is NOT relevant. Searching online...")
+            await notify("stage", {"stage": "searching_web"})
+            results = await graph.result("web_search")
+            
+            # Log the search results for debugging
+            print("DuckDuckGo Search Results:")
+            for result in results:
+                print(f"Title: {result.get('title')}")
+                print(f"Body: {result.get('body')}")
+                print("-----")
+            
+            context = format_search_results(results)
+            print("Found online sources. Generating the response...")
+            grounding = "web"
+            model = "gpt-4-turbo"
+
+        await notify("stage", {"stage": "generating"})
+        messages = [
+            {"content": system_prompt.format(context=context), "role": "system"},
+            {"content": user_prompt.format(question=question), "role": "user"}
+        ]
+        if on_event is None:
+            response = await acompletion(model=model, messages=messages, max_tokens=500)
+            return response.choices[0].message.content, context, grounding
+
+        # Stream tokens to the caller as they arrive
+        tokens = []
+        response = await acompletion(model=model, messages=messages, max_tokens=500, stream=True)
+        async for chunk in response:
+            token = chunk.choices[0].delta.content
+            if token:
+                tokens.append(token)
+                await notify("token", {"token": token})
+        return "".join(tokens), context, grounding
+
+    graph.add_stage("expand", expand)
+    graph.add_stage("embed_question", embed_question)
+    graph.add_stage("retrieve", retrieve, deps=["embed_question"])
+    graph.add_stage("retrieve_lexical", retrieve_lexical, deps=["embed_question"])
+    graph.add_stage("retrieve_expanded", retrieve_expanded, deps=["expand"])
+    graph.add_stage("fuse", fuse, deps=["retrieve", "retrieve_lexical", "retrieve_expanded"])
+    graph.add_stage("build_context", build_context, deps=["fuse"])
+    graph.add_stage("relevance", relevance, deps=["fuse", "build_context"])
+    graph.add_stage("decide", decide, deps=["build_context", "relevance"])
+    graph.add_stage("web_search", web_search, deps=["relevance"])
+    graph.add_stage("generate", generate, deps=["decide", "build_context"])
+
+    await notify("stage", {"stage": "retrieving"})
+    response_text, context, grounding = await graph.run("generate")
+    print("Stage timings: " + ", ".join(f"{name}={elapsed:.2f}s" for name, elapsed in graph.timings.items()))
+    await notify("timings", dict(graph.timings))
+    return response_text, context, grounding
 
 
 #API classes and endpoints start
 
 class QuestionRequest(BaseModel):
+    # The overlay sends the detected game as "gameName"
+    model_config = ConfigDict(populate_by_name=True)
+
     text: str
-    game_name: Optional[str] = None
+    game_name: Optional[str] = Field(default=None, alias="gameName")
 
 class QuestionResponse(BaseModel):
     response: str
     elapsed_time: float
 
-class UploadResponse(BaseModel):
+class JobResponse(BaseModel):
     message: str
-    chunks_count: int
+    job_id: str
+    status_url: str
 
 class DeleteDataRequest(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
+    # For type "url", a page's URL deletes that page and a bare domain every page imported from the site
     file_name: str
     type: str
+    # None deletes the file from every game
+    game_name: Optional[str] = Field(default=None, alias="gameName")
 
 class FetchURLcontent(BaseModel):
+    model_config = ConfigDict(populate_by_name=True)
+
     url: str
+    game_name: Optional[str] = Field(default=None, alias="gameName")
 
 
 @app.post("/ask", response_model=QuestionResponse)
 async def ask_question(question: QuestionRequest):
     """Process a question and return the response"""
     start_time = time.time()
-    response_text = rag_pipeline(question.text, question.game_name)
+    response_text = await rag_pipeline(question.text, question.game_name)
     elapsed_time = time.time() - start_time
     converted_time = datetime.timedelta(seconds=elapsed_time)
     print(f"Time: {converted_time}")
     
     return QuestionResponse(response=response_text, elapsed_time=elapsed_time)
 
-@app.post("/upload-data", response_model=UploadResponse)
-async def upload_data(file: UploadFile = File(...), type: str = Form(...)):
-    """Upload a file (PDF, JSON, CSV, Markdown) and process it synchronously before returning"""
-    temp_file_path = f"temp_{file.filename}"
-    
-    try:
-        # Save the uploaded file temporarily
-        with open(temp_file_path, "wb") as buffer:
-            buffer.write(await file.read())
-
-        # Extract content based on file type
-        file_name = file.filename
-        file_content = ""
-
-        if type == "pdf":
-            reader = PdfReader(temp_file_path)
-            for page in reader.pages:
-                file_content += page.extract_text() or ""  # Handle possible None values
-        elif type in ["json", "csv", "markdown"]:
-            with open(temp_file_path, "r", encoding="utf-8") as f:
-                file_content = f.read()
-        else:
-            raise HTTPException(status_code=400, detail=f"Unsupported file type: {type}")
+@app.post("/ask/stream")
+async def ask_question_stream(question: QuestionRequest):
+    """Process a question and stream stage events and answer tokens as server-sent events"""
+    queue = asyncio.Queue()
+    timings = {}
 
-        if not file_content.strip():
-            raise HTTPException(status_code=400, detail=f"No content could be extracted from the {type} file")
-
-        # Process the file content synchronously
-        process_data_content(file_content, file_name, type, temp_file_path)  # No 'await' needed
-
-        # Return a response after processing is complete
-        return UploadResponse(
-            message=f"{type.upper()} file '{file_name}' successfully processed",
-            chunks_count=max(1, len(file_content.split()) // 150)  # Ensure at least 1 chunk
-        )
+    async def on_event(event, data):
+        if event == "timings":
+            timings.update(data)
+        else:
+            await queue.put((event, data))
 
-    except HTTPException as http_ex:
-        raise http_ex  
+    async def run_pipeline():
+        start_time = time.time()
+        try:
+            response_text = await rag_pipeline(question.text, question.game_name, on_event)
+            elapsed_time = time.time() - start_time
+            print(f"Time: {datetime.timedelta(seconds=elapsed_time)}")
+            await queue.put(("done", {"response": response_text, "elapsed_time": elapsed_time, "timings": timings}))
+        except Exception as e:
+            logging.error(f"Streaming Ask Error: {str(e)}", exc_info=True)
+            await queue.put(("error", {"detail": "Unexpected error answering question"}))
+        finally:
+            await queue.put(None)
+
+    async def event_stream():
+        task = asyncio.create_task(run_pipeline())
+        try:
+            while (item := await queue.get()) is not None:
+                event, data = item
+                yield f"event: {event}\ndata: {json.dumps(data)}\n\n"
+        finally:
+            # Stop the pipeline if the client disconnects early
+            task.cancel()
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream")
+
+@app.post("/upload-data", response_model=JobResponse, status_code=202)
+async def upload_data(file: UploadFile = File(...), type: str = Form(...), game_name: Optional[str] = Form(None)):
+    """Upload a file (PDF, JSON, CSV, Markdown) and queue it for ingestion; poll GET /jobs/{id} for progress"""
+    if type not in ["pdf", "json", "csv", "markdown"]:
+        raise HTTPException(status_code=400, detail=f"Unsupported file type: {type}")
+
+    # Unique per upload, since the file waits on disk until a worker picks it up
+    file_name = file.filename
+    temp_file_path = f"temp_{uuid.uuid4().hex}_{os.path.basename(file_name)}"
+    try:
+        # Stream the upload to disk, hashing it on the way, without holding it in memory
+        file_hash = hashlib.md5(f"{game_key(game_name)}\n".encode("utf-8"))
+        with open(temp_file_path, "wb") as buffer:
+            while data := await file.read(UPLOAD_READ_BYTES):
+                buffer.write(data)
+                file_hash.update(data)
     except Exception as e:
-        logging.error(f"File Upload Error: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail="Unexpected error processing file")
-    finally:
         if os.path.exists(temp_file_path):
             os.remove(temp_file_path)
+        logging.error(f"File Upload Error: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail="Unexpected error receiving file")
+
+    async def run(job):
+        try:
+            # Extract content based on file type: page by page, record by record or block by block
+            chunker = iter_chunk_batches
+            if type == "pdf":
+                blocks = iter_pdf_pages(temp_file_path, job=job)
+            elif type in ("json", "csv"):
+                blocks = iter_file_records(temp_file_path, type, job=job)
+                chunker = iter_record_batches
+            else:
+                blocks = iter_text_file(temp_file_path, job=job)
+            chunks_count = await ingest_stream(blocks, file_name, type, game_name, file_hash.hexdigest(), job, chunker)
+            if not chunks_count:
+                raise ValueError(f"No content could be extracted from the {type} file")
+            job.update(message=f"{type.upper()} file '{file_name}' successfully processed ({chunks_count} chunks)")
+        finally:
+            if os.path.exists(temp_file_path):
+                os.remove(temp_file_path)
+
+    job = job_queue.submit(type, file_name, game_name, run)
+    return JobResponse(
+        message=f"{type.upper()} file '{file_name}' queued for processing",
+        job_id=job.id,
+        status_url=f"/jobs/{job.id}",
+    )
 
 
-@app.post("/import-from-url", response_model=UploadResponse)
+@app.post("/import-from-url", response_model=JobResponse, status_code=202)
 async def import_from_url(request: FetchURLcontent):
-    """Import content from a URL and process it synchronously before returning"""
+    """Queue a URL for fetching and ingestion; poll GET /jobs/{id} for progress"""
     url = request.url
 
-    try:
-        # Validate URL format
-        result = urlparse(url)
-        if not all([result.scheme, result.netloc]):
-            raise HTTPException(status_code=400, detail=f"Invalid URL format: {url}")
+    # Validate URL format
+    result = urlparse(url)
+    if not all([result.scheme, result.netloc]):
+        raise HTTPException(status_code=400, detail=f"Invalid URL format: {url}")
 
-        # Fetch content from URL using the existing GET endpoint
-        content = await fetch_url_content(url)  # Ensure fetch_url_content is async
+    # Every page is its own manifest entry, so pages of one site never replace each other
+    file_name = url_file_name(url)
 
+    async def run(job):
+        job.update(stage="fetching")
+        content = await fetch_url_content(url)
         if not content or not content.strip():
-            raise HTTPException(status_code=404, detail=f"Failed to fetch content from URL: {url}")
-
-        # Extract domain as the "filename"
-        domain = result.netloc
-        file_name = f"{domain}_url"
-
-        # Process the URL content synchronously
-        process_data_content(content, file_name, "url", None)
+            raise ValueError(f"Failed to fetch content from URL: {url}")
+        chunks_count = await process_data_content(content, file_name, "url", None, request.game_name, job)
+        job.update(message=f"Game content from '{url}' has been successfully processed ({chunks_count} chunks)")
+
+    job = job_queue.submit("url", url, request.game_name, run)
+    return JobResponse(
+        message=f"Game content from '{url}' queued for processing",
+        job_id=job.id,
+        status_url=f"/jobs/{job.id}",
+    )
 
-        # Return a response after processing is complete
-        return UploadResponse(
-            message=f"Game content from '{url}' has been successfully processed",
-            chunks_count=max(1, len(content.split()) // 150)  # Ensure at least 1 chunk
-        )
 
-    except HTTPException as http_ex:
-        raise http_ex  
-    except Exception as e:
-        logging.error(f"URL Import Error: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail="Unexpected error importing from URL")
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    """Stage, progress and throughput of an ingestion job"""
+    job = job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Unknown job: {job_id}")
+    return job.to_dict()
 
 
 @app.post("/delete-data")
 async def delete_data(request: DeleteDataRequest):
-    """Clear the record of uploaded data"""
-    try:
-        file_name = request.file_name
-        file_type = request.type
-        
-        # Just return a success message to acknowledge deletion
-        return {"message": f"{file_type.upper()} '{file_name}' record cleared successfully."}
+    """Delete an uploaded file, imported page or imported site and every chunk no other file still uses"""
+    file_name = request.file_name
+    file_type = request.type
+    game = None if request.game_name is None else game_key(request.game_name)
 
+    if file_type.lower() == "url":
+        files = find_url_files(file_name, game)
+    else:
+        files = manifest.find_files("game_docs", file_name, game)
+    if not files:
+        raise HTTPException(status_code=404, detail=f"No ingested data found for '{request.file_name}'")
+
+    try:
+        # Only chunks referenced by no other file are deleted
+        orphans = manifest.orphaned_chunks("game_docs", files)
+        await delete_chunks(orphans)
+        manifest.remove_files("game_docs", files)
     except Exception as e:
-        return {"error": str(e)}
+        logging.error(f"Delete Error: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=f"Failed to delete '{request.file_name}': {str(e)}")
+
+    # Cached answers may have been grounded in the deleted chunks
+    games = {file["game"] for file in files}
+    invalidate_answers(games)
+
+    print(f"🗑️ Deleted {file_name} ({', '.join(sorted(games))}): {len(orphans)} chunks removed.")
+    return {
+        "message": f"{file_type.upper()} '{request.file_name}' deleted successfully.",
+        "deleted_chunks": len(orphans),
+        "games": sorted(games),
+        "files": sorted({file["file_name"] for file in files}),
+    }
 
 
 # API endpoint that calls the game detection function
 @app.get("/detect-game")
 async def detect_game():
-    game_name = get_current_game()
+    # Process/window enumeration is blocking, keep it off the event loop
+    game_name = await asyncio.to_thread(get_current_game)
     print(f"Current game: {game_name}")
     if not game_name:
         return {"gameName": ""}
@@ -693,7 +1710,17 @@ async def health_check():
     return {
         "status": "healthy",
         "timestamp": datetime.datetime.now().isoformat(),
-        "version": "1.0.0"
+        "version": "1.0.0",
+        "ready": warmup_status["state"] in ("ready", "skipped"),
+        "warmup": warmup_status,
+        "answer_cache": answer_cache.stats(),
+        "embedding_cache": embedding_cache.stats(),
+        "lexical_index": lexical_index.stats(),
+        "known_chunks": known_chunks.stats(),
+        "embedding_rate_limit": embedding_rate_limiter.stats(),
+        "manifest": manifest.stats(),
+        "ingestion_jobs": job_queue.stats(),
+        "validation": response_auditor.stats()
     }
 
 # Run the server
@@ -0,0 +1,186 @@
+"""
+Concurrency benchmark for the /ask endpoint.
+
+Every upstream the pipeline talks to (OpenAI embeddings, litellm, the vector
+store and DuckDuckGo) is replaced with a mock that simply waits for a fixed latency, so
+the numbers only reflect how well the server overlaps concurrent requests.
+With --stream it also reports time-to-first-token for the streamed pipeline.
+
+Usage:
+    python benchmarks/concurrency_benchmark.py --requests 10
+    python benchmarks/concurrency_benchmark.py --requests 10 --stream
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import re
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+import httpx
+import numpy as np
+
+# Keep mocked embeddings out of the real caches
+os.environ["BACKEND_DATA_DIR"] = tempfile.mkdtemp(prefix="rag_benchmark_")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import backend  # noqa: E402
+import validation  # noqa: E402
+from vector_store import VectorStore  # noqa: E402
+
+
+def fake_embedding(text):
+    """Deterministic pseudo-random unit vector for a text."""
+    seed = int(hashlib.md5(text.encode("utf-8")).hexdigest()[:8], 16)
+    vector = np.random.default_rng(seed).standard_normal(1536)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+def make_completion(text):
+    """Build a litellm-style completion object."""
+    return SimpleNamespace(choices=[SimpleNamespace(message=SimpleNamespace(content=text))])
+
+
+async def fake_stream(text, duration):
+    """Yield litellm-style streaming chunks spread evenly over duration."""
+    words = text.split(" ")
+    for word in words:
+        await asyncio.sleep(duration / len(words))
+        yield SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=word + " "))])
+
+
+def install_mocks(llm_latency, embed_latency, query_latency, web_latency, decision):
+    """Replace every upstream call in the backend with a latency-only mock."""
+
+    async def fake_acompletion(model, messages, stream=False, **kwargs):
+        if stream:
+            # Model latency is mostly generation time, so spread it over the tokens
+            return fake_stream("[Tip] Mocked answer streamed one word at a time.", llm_latency)
+        await asyncio.sleep(llm_latency)
+        prompt = messages[0]["content"]
+        if "EXACTLY ONE CHARACTER" in prompt:
+            return make_completion(decision)
+        if "search variations" in prompt:
+            return make_completion("- variation one\n- variation two\n- variation three")
+        if "Verify if this answer" in prompt:
+            return make_completion("1")
+        if "Verify whether each answer" in prompt:
+            numbers = re.findall(r"^Answer (\d+):", prompt, re.M)
+            return make_completion("\n".join(f"{number}: 1" for number in numbers))
+        return make_completion("[Tip] Mocked answer.")
+
+    class FakeHTTPClient:
+        async def post(self, url, headers=None, content=None, **kwargs):
+            await asyncio.sleep(embed_latency)
+            texts = json.loads(content)["input"]
+            data = [{"embedding": fake_embedding(text), "index": i} for i, text in enumerate(texts)]
+            return SimpleNamespace(status_code=200, json=lambda: {"data": data}, text="")
+
+        async def aclose(self):
+            pass
+
+    # A weak match makes the local relevance gate reject the context
+    match_score = 0.9 if decision == "1" else 0.3
+
+    class FakeVectorStore(VectorStore):
+        # Remote stores block, so the mock blocks too and runs in a worker thread
+        def query(self, vector, top_k, namespace, games=None):
+            time.sleep(query_latency)
+            return [{"id": "doc", "score": match_score, "metadata": {"source_text": "Mocked context about the game."}}]
+
+        def fetch(self, ids, namespace):
+            time.sleep(query_latency)
+            return {}
+
+        def upsert(self, vectors, namespace):
+            time.sleep(query_latency)
+
+        def delete(self, ids, namespace):
+            time.sleep(query_latency)
+
+    class FakeDDGS:
+        def text(self, query, max_results=5):
+            time.sleep(web_latency)
+            return [{"title": "Mocked result", "body": "Mocked web context."}]
+
+    backend.acompletion = fake_acompletion
+    validation.acompletion = fake_acompletion
+    backend._http_client = FakeHTTPClient()
+    backend.vector_store = FakeVectorStore()
+    backend.open_store_records(os.path.join(backend.DATA_DIR, "mocked"))
+    backend.DDGS = FakeDDGS
+
+
+async def ask(client, question):
+    """Send a single question and return its latency in seconds."""
+    start = time.perf_counter()
+    response = await client.post("/ask", json={"text": question})
+    response.raise_for_status()
+    return time.perf_counter() - start
+
+
+async def ask_stream(question):
+    """Run one streamed question and return (time to first token, total latency)."""
+    # httpx's ASGI transport buffers whole responses, so hook the pipeline's events directly
+    start = time.perf_counter()
+    first_token = None
+
+    async def on_event(event, data):
+        nonlocal first_token
+        if event == "token" and first_token is None:
+            first_token = time.perf_counter() - start
+
+    await backend.rag_pipeline(question, on_event=on_event)
+    return first_token, time.perf_counter() - start
+
+
+async def run(num_requests, stream):
+    transport = httpx.ASGITransport(app=backend.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as client:
+        # Every phase asks fresh questions so the answer cache never hits
+        def questions(phase):
+            return [f"How do I beat {phase} boss number {i} without summons?" for i in range(num_requests)]
+
+        # Warm up once so import-time costs are not measured
+        await ask(client, "How do I beat the warm-up boss?")
+
+        sequential = [await ask(client, q) for q in questions("sequential")]
+
+        start = time.perf_counter()
+        concurrent = await asyncio.gather(*(ask(client, q) for q in questions("concurrent")))
+        concurrent_wall = time.perf_counter() - start
+
+    print(f"Requests:                 {num_requests}")
+    print(f"Slowest single request:   {max(sequential):.3f}s")
+    print(f"Sum of sequential runs:   {sum(sequential):.3f}s")
+    print(f"Concurrent wall time:     {concurrent_wall:.3f}s")
+    print(f"Slowest concurrent:       {max(concurrent):.3f}s")
+    print(f"Speed-up vs sequential:   {sum(sequential) / concurrent_wall:.1f}x")
+
+    if stream:
+        streamed = await asyncio.gather(*(ask_stream(q) for q in questions("streamed")))
+        first_tokens = [first for first, _ in streamed]
+        print(f"Mean /ask latency:        {sum(sequential) / len(sequential):.3f}s")
+        print(f"Mean time to first token: {sum(first_tokens) / len(first_tokens):.3f}s")
+        print(f"Mean streamed total:      {sum(total for _, total in streamed) / len(streamed):.3f}s")
+
+    # The app's lifespan is not run here, so stop the background validation as shutdown would
+    await backend.response_auditor.stop()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark concurrent /ask calls against mocked upstreams")
+    parser.add_argument("--requests", type=int, default=10, help="Number of concurrent questions")
+    parser.add_argument("--llm-latency", type=float, default=0.5, help="Seconds per mocked LLM call")
+    parser.add_argument("--embed-latency", type=float, default=0.1, help="Seconds per mocked embedding call")
+    parser.add_argument("--query-latency", type=float, default=0.05, help="Seconds per mocked vector query")
+    parser.add_argument("--web-latency", type=float, default=0.5, help="Seconds per mocked web search")
+    parser.add_argument("--decision", choices=["0", "1"], default="1", help="Whether the mocked context is relevant")
+    parser.add_argument("--stream", action="store_true", help="Also measure time-to-first-token of the streamed pipeline")
+    args = parser.parse_args()
+
+    install_mocks(args.llm_latency, args.embed_latency, args.query_latency, args.web_latency, args.decision)
+    asyncio.run(run(args.requests, args.stream))
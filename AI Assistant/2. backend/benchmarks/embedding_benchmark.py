@@ -0,0 +1,103 @@
+"""
+Embedding throughput benchmark.
+
+Embeds a few thousand synthetic chunks through get_embeddings with the
+embeddings API mocked: every request waits a fixed latency plus a time per
+token, and requests over the per-request token limit are rejected with a
+400, like the real endpoint. The run is repeated for several values of
+EMBEDDING_CONCURRENCY, and optionally under a tokens-per-minute limit, to
+show throughput scaling with the number of batches in flight until the
+rate limiter caps it.
+
+Usage:
+    python benchmarks/embedding_benchmark.py --chunks 4000
+    python benchmarks/embedding_benchmark.py --chunks 4000 --tpm 5000000
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+# Keep mocked embeddings out of the real caches
+os.environ["BACKEND_DATA_DIR"] = tempfile.mkdtemp(prefix="rag_benchmark_")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import backend  # noqa: E402
+from rate_limit import RateLimiter  # noqa: E402
+from synthetic_pdf import WORDS  # noqa: E402
+
+VECTOR = [0.0] * 1536
+
+
+class FakeEmbeddingsAPI:
+    """Latency grows with the tokens in a request; oversized requests are rejected."""
+
+    def __init__(self, base_latency, seconds_per_token, max_request_tokens):
+        self.base_latency = base_latency
+        self.seconds_per_token = seconds_per_token
+        self.max_request_tokens = max_request_tokens
+        self.requests = 0
+        self.in_flight = 0
+        self.peak_in_flight = 0
+
+    async def post(self, url, headers=None, content=None, **kwargs):
+        texts = json.loads(content)["input"]
+        # A cheap estimate, so the mock does not compete with the client for the event loop
+        tokens = sum(len(text) // 4 for text in texts)
+        if tokens > self.max_request_tokens:
+            return SimpleNamespace(status_code=400, text="maximum request size exceeded", headers={})
+        self.requests += 1
+        self.in_flight += 1
+        self.peak_in_flight = max(self.peak_in_flight, self.in_flight)
+        try:
+            await asyncio.sleep(self.base_latency + tokens * self.seconds_per_token)
+        finally:
+            self.in_flight -= 1
+        data = [{"embedding": VECTOR, "index": i} for i in range(len(texts))]
+        return SimpleNamespace(status_code=200, json=lambda: {"data": data}, text="", headers={})
+
+    async def aclose(self):
+        pass
+
+
+def make_chunks(count, seed):
+    # Roughly the size of the splitter's 150-token chunks
+    rng = random.Random(seed)
+    return [f"{seed}-{i} " + " ".join(rng.choice(WORDS) for _ in range(110)) for i in range(count)]
+
+
+async def run(args):
+    print(f"{'concurrency':>11}{'requests':>10}{'peak':>6}{'seconds':>9}{'tokens/s':>11}{'delayed':>9}")
+    for seed, concurrency in enumerate(args.concurrency):
+        api = FakeEmbeddingsAPI(args.latency, args.ms_per_1k_tokens / 1000 / 1000, args.max_request_tokens)
+        backend._http_client = api
+        backend.embedding_rate_limiter = RateLimiter(args.tpm, 0)
+        backend.EMBEDDING_CONCURRENCY = concurrency
+        chunks = make_chunks(args.chunks, seed)
+        tokens = backend.count_tokens(chunks)
+
+        start = time.perf_counter()
+        result = await backend.get_embeddings(chunks)
+        seconds = time.perf_counter() - start
+        assert result is not None and len(result) == len(chunks)
+        delayed = backend.embedding_rate_limiter.stats()["delayed_requests"]
+        print(f"{concurrency:>11}{api.requests:>10}{api.peak_in_flight:>6}{seconds:>9.2f}{tokens / seconds:>11,.0f}{delayed:>9}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure embedding throughput against a mocked API")
+    parser.add_argument("--chunks", type=int, default=4000)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--latency", type=float, default=0.15, help="Fixed seconds per request")
+    parser.add_argument("--ms-per-1k-tokens", type=float, default=10, help="Extra milliseconds per 1,000 tokens")
+    parser.add_argument("--max-request-tokens", type=int, default=300000, help="API limit per request")
+    parser.add_argument("--tpm", type=int, default=0, help="Client-side tokens per minute limit (0 = none)")
+    parser.add_argument("--batch-tokens", type=int, help="Override EMBEDDING_BATCH_MAX_TOKENS")
+    args = parser.parse_args()
+    if args.batch_tokens:
+        backend.EMBEDDING_BATCH_MAX_TOKENS = args.batch_tokens
+    asyncio.run(run(args))
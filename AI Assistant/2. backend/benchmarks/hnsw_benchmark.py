@@ -0,0 +1,99 @@
+"""
+Recall@k vs latency benchmark for the HNSW index against exact search.
+
+Builds a synthetic clustered corpus (chunks of the same page sit close
+together, like real document embeddings), indexes it both in the flat
+NumPy partition and in an HNSW graph, then runs the same queries through
+each. For every ef value it reports recall@k against the exact results and
+the median and p99 query latency. Build time, save size and reload time of
+the graph are reported too.
+
+Usage:
+    python benchmarks/hnsw_benchmark.py --vectors 20000 --ef 16 32 64 128
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from hnsw import HNSWIndex  # noqa: E402
+from vector_store import NamespacePartition  # noqa: E402
+
+
+def clustered_vectors(rng, count, dimension, clusters):
+    """Unit vectors scattered around random cluster centres."""
+    centres = rng.standard_normal((clusters, dimension)).astype(np.float32)
+    vectors = centres[rng.integers(0, clusters, count)]
+    vectors += 0.6 * rng.standard_normal((count, dimension)).astype(np.float32)
+    return NamespacePartition.normalise(vectors)
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def run(args):
+    rng = np.random.default_rng(args.seed)
+    corpus = clustered_vectors(rng, args.vectors, args.dimension, max(1, args.vectors // 20))
+    # Queries are perturbed corpus vectors, like a question close to one chunk
+    picks = rng.integers(0, args.vectors, args.queries)
+    queries = NamespacePartition.normalise(
+        corpus[picks] + 0.3 * rng.standard_normal((args.queries, args.dimension)).astype(np.float32)
+    )
+
+    exact = NamespacePartition(args.dimension)
+    exact.upsert([{"id": str(i), "values": vector} for i, vector in enumerate(corpus)])
+
+    graph = HNSWIndex(args.dimension, M=args.m, ef_construction=args.ef_construction, seed=args.seed)
+    start = time.perf_counter()
+    for vector in corpus:
+        graph.insert(vector)
+    build_time = time.perf_counter() - start
+
+    path = os.path.join(tempfile.mkdtemp(prefix="hnsw_benchmark_"), "index.npz")
+    graph.save(path)
+    start = time.perf_counter()
+    HNSWIndex.load(path)
+    load_time = time.perf_counter() - start
+
+    print(f"Vectors: {args.vectors} x {args.dimension}    M={args.m}  ef_construction={args.ef_construction}")
+    print(f"Build: {build_time:.1f}s ({1000 * build_time / args.vectors:.2f} ms/insert)    "
+          f"Saved: {os.path.getsize(path) / 2**20:.1f} MiB    Reload: {load_time * 1000:.0f} ms")
+
+    truth, exact_latencies = [], []
+    for query in queries:
+        start = time.perf_counter()
+        matches = exact.query(query, args.top_k)
+        exact_latencies.append(time.perf_counter() - start)
+        truth.append({int(match["id"]) for match in matches})
+
+    print(f"{'search':<12}{'recall@' + str(args.top_k):>10}{'median':>12}{'p99':>12}")
+    print(f"{'exact':<12}{1:>10.2%}{np.median(exact_latencies) * 1000:>10.2f}ms"
+          f"{percentile(exact_latencies, 0.99) * 1000:>10.2f}ms")
+    for ef in args.ef:
+        recalls, latencies = [], []
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            found = {node for _, node in graph.search(query, args.top_k, ef=ef)}
+            latencies.append(time.perf_counter() - start)
+            recalls.append(len(found & expected) / len(expected))
+        print(f"{'hnsw ef=' + str(ef):<12}{np.mean(recalls):>10.2%}{np.median(latencies) * 1000:>10.2f}ms"
+              f"{percentile(latencies, 0.99) * 1000:>10.2f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare HNSW and exact vector search")
+    parser.add_argument("--vectors", type=int, default=20000, help="Corpus size")
+    parser.add_argument("--dimension", type=int, default=1536, help="Vector width")
+    parser.add_argument("--queries", type=int, default=200, help="Queries to run")
+    parser.add_argument("--top-k", type=int, default=10, help="Matches per query")
+    parser.add_argument("--m", type=int, default=16, help="HNSW links per node")
+    parser.add_argument("--ef-construction", type=int, default=100, help="HNSW build beam width")
+    parser.add_argument("--ef", type=int, nargs="+", default=[16, 32, 64, 128], help="HNSW search beam widths")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    run(parser.parse_args())
@@ -0,0 +1,99 @@
+"""
+Dense vs hybrid (dense + BM25) retrieval benchmark on the Elden Ring Q&A dataset.
+
+Every answer in elden_ring_q&a.csv is embedded into an in-memory
+LocalVectorStore and keyword-indexed in a LexicalIndex, as process_data_content
+does for uploaded chunks. Each question is then retrieved two ways:
+
+- dense: the vector store alone (the previous behaviour)
+- hybrid: dense and BM25 results fused with reciprocal rank fusion
+
+A question counts as recalled when its own answer is in the top k. The
+similarity of the best match is also reported, since that is what the
+relevance gate sees before falling back to web search.
+Uses the real OpenAI embeddings API, so OPENAI_API_KEY must be set.
+
+Usage:
+    python benchmarks/hybrid_benchmark.py --top-k 3
+"""
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Start from empty caches and indexes
+os.environ["BACKEND_DATA_DIR"] = tempfile.mkdtemp(prefix="rag_benchmark_")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import backend  # noqa: E402
+from lexical_index import LexicalIndex  # noqa: E402
+from vector_store import LocalVectorStore  # noqa: E402
+from multi_query_benchmark import DATASET, load_pairs  # noqa: E402
+
+NAMESPACES = ["answers"]
+
+
+async def dense_retrieval(question, embedding, top_k):
+    return await backend.search_by_vector(embedding, NAMESPACES, top_k)
+
+
+async def hybrid_retrieval(question, embedding, top_k):
+    dense, lexical = await asyncio.gather(
+        backend.search_by_vector(embedding, NAMESPACES, top_k),
+        backend.lexical_search(question, embedding, NAMESPACES, top_k=top_k),
+    )
+    return backend.reciprocal_rank_fusion([dense, lexical], limit=top_k)
+
+
+async def run(top_k):
+    pairs = load_pairs(DATASET)
+    answers = [answer for _, answer in pairs]
+    answer_embeddings = await backend.get_embeddings(answers)
+
+    backend.vector_store = LocalVectorStore()
+    backend.vector_store.upsert([
+        {"id": str(i), "values": embedding["embedding"], "metadata": {"source_text": answer}}
+        for i, (answer, embedding) in enumerate(zip(answers, answer_embeddings))
+    ], "answers")
+    backend.lexical_index = LexicalIndex()
+    backend.lexical_index.add([
+        {"id": str(i), "text": answer, "metadata": {"source_text": answer}} for i, answer in enumerate(answers)
+    ], "answers")
+
+    question_embeddings = await backend.get_embeddings([question for question, _ in pairs])
+    approaches = {"dense": dense_retrieval, "hybrid": hybrid_retrieval}
+    hits = {name: 0 for name in approaches}
+    reciprocal_ranks = {name: [] for name in approaches}
+    best_scores = {name: [] for name in approaches}
+    latencies = {name: [] for name in approaches}
+
+    for i, ((question, _), embedding) in enumerate(zip(pairs, question_embeddings)):
+        for name, retrieve in approaches.items():
+            start = time.perf_counter()
+            results = await retrieve(question, embedding["embedding"], top_k)
+            latencies[name].append(time.perf_counter() - start)
+
+            ranked_ids = [match["id"] for match in results["matches"]]
+            best_scores[name].append(max((match["score"] for match in results["matches"]), default=0.0))
+            if str(i) in ranked_ids:
+                hits[name] += 1
+                reciprocal_ranks[name].append(1.0 / (ranked_ids.index(str(i)) + 1))
+            else:
+                reciprocal_ranks[name].append(0.0)
+
+    print(f"Questions: {len(pairs)}")
+    print(f"{'approach':<10}{'recall@' + str(top_k):>10}{'MRR':>8}{'best sim':>10}{'median':>11}")
+    for name in approaches:
+        print(
+            f"{name:<10}{hits[name] / len(pairs):>10.2%}{statistics.mean(reciprocal_ranks[name]):>8.3f}"
+            f"{statistics.mean(best_scores[name]):>10.3f}{statistics.median(latencies[name]) * 1000:>9.2f}ms"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare dense and hybrid retrieval")
+    parser.add_argument("--top-k", type=int, default=3, help="Matches retrieved per question")
+    args = parser.parse_args()
+    asyncio.run(run(args.top_k))
@@ -0,0 +1,172 @@
+"""
+Ingestion benchmark for process_data_content.
+
+Uploads a synthetic document, re-uploads it in several ways and deletes it, reporting
+wall time, embedding API requests, texts embedded and vector store
+round-trips for each run, and the vectors stored afterwards. The embeddings API and the vector store are mocked
+with fixed per-call latencies, like a remote Pinecone index, so the numbers
+reflect how many round-trips ingestion makes rather than network speed.
+Like Pinecone, the mocked store rejects upserts over 2 MB or 1000 vectors,
+and with --fail-rate it also fails that fraction of upserts transiently.
+
+Runs:
+- first upload: every chunk is new
+- re-upload: the whole file is known, so nothing is split or fetched
+- edited: one section added; known chunks are skipped without a fetch
+- edited in place: a few sections rewritten; only their chunks are embedded
+  and the chunks they replaced are deleted
+- re-upload, cold: the known chunks and the manifest are cleared, so chunk existence is
+  resolved with batched fetches against the vector store
+- delete: the file's chunks are deleted from the manifest in batches
+
+Usage:
+    python benchmarks/ingest_benchmark.py --chunks 2000
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+from types import SimpleNamespace
+
+# Keep mocked embeddings and chunks out of the real caches and indexes
+os.environ["BACKEND_DATA_DIR"] = tempfile.mkdtemp(prefix="rag_benchmark_")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import backend  # noqa: E402
+from vector_store import LocalVectorStore, estimate_record_bytes  # noqa: E402
+from concurrency_benchmark import fake_embedding  # noqa: E402
+
+WORDS = ("tarnished rune erdtree grace boss weapon talisman spirit ash flask dungeon "
+         "catacomb legacy stat build faith dexterity strength arcane bleed frost").split()
+
+
+def synthetic_document(chunks, seed=0):
+    """Plain text of roughly the given number of 150-token chunks."""
+    rng = random.Random(seed)
+    paragraphs = []
+    for i in range(chunks):
+        sentence = " ".join(rng.choice(WORDS) for _ in range(110))
+        paragraphs.append(f"Section {i}. {sentence}.")
+    return "\n\n".join(paragraphs)
+
+
+class Counters:
+    def __init__(self):
+        self.embed_requests = 0
+        self.embedded_texts = 0
+        self.store_calls = 0
+        self.upsert_failures = 0
+        self.deleted_ids = 0
+
+
+def install_mocks(counters, embed_latency, store_latency, fail_rate=0.0):
+    """Mock the embeddings API and a remote vector store, counting every call."""
+
+    class FakeHTTPClient:
+        async def post(self, url, headers=None, content=None, **kwargs):
+            await asyncio.sleep(embed_latency)
+            texts = json.loads(content)["input"]
+            counters.embed_requests += 1
+            counters.embedded_texts += len(texts)
+            data = [{"embedding": fake_embedding(text), "index": i} for i, text in enumerate(texts)]
+            return SimpleNamespace(status_code=200, json=lambda: {"data": data}, text="")
+
+        async def aclose(self):
+            pass
+
+    class RemoteStore(LocalVectorStore):
+        # Every call pays one network round-trip
+        def fetch(self, ids, namespace):
+            time.sleep(store_latency)
+            counters.store_calls += 1
+            return super().fetch(ids, namespace)
+
+        def upsert(self, vectors, namespace):
+            time.sleep(store_latency)
+            counters.store_calls += 1
+            if len(vectors) > 1000 or sum(estimate_record_bytes(record) for record in vectors) > 2_000_000:
+                raise ValueError("Upsert request too large")
+            if random.random() < fail_rate:
+                counters.upsert_failures += 1
+                raise ConnectionError("Mocked transient failure")
+            return super().upsert(vectors, namespace)
+
+        def delete(self, ids, namespace):
+            time.sleep(store_latency)
+            counters.store_calls += 1
+            counters.deleted_ids += len(ids)
+            return super().delete(ids, namespace)
+
+        async def afetch(self, ids, namespace):
+            return await asyncio.to_thread(self.fetch, ids, namespace)
+
+        async def aupsert(self, vectors, namespace):
+            return await asyncio.to_thread(self.upsert, vectors, namespace)
+
+        async def adelete(self, ids, namespace):
+            return await asyncio.to_thread(self.delete, ids, namespace)
+
+    backend._http_client = FakeHTTPClient()
+    backend.vector_store = RemoteStore()
+    backend.open_store_records(os.path.join(backend.DATA_DIR, "remote"))
+
+
+async def timed(counters, name, operation):
+    before = vars(counters).copy()
+    start = time.perf_counter()
+    await operation
+    elapsed = time.perf_counter() - start
+    deltas = {key: value - before[key] for key, value in vars(counters).items()}
+    stored = len(backend.vector_store.locations.get("game_docs", {}))
+    return name, elapsed, deltas, stored
+
+
+def rewrite_sections(content, count, seed=1):
+    """Replace the text of count random sections, as an edit to a wiki export would."""
+    rng = random.Random(seed)
+    paragraphs = content.split("\n\n")
+    for index in rng.sample(range(len(paragraphs) - 1), count):
+        paragraphs[index] = f"Section {index} (revised). " + " ".join(rng.choice(WORDS) for _ in range(110)) + "."
+    return "\n\n".join(paragraphs)
+
+
+def upload(content):
+    return backend.process_data_content(content, "benchmark.md", "markdown", None, "Elden Ring")
+
+
+async def run(args):
+    counters = Counters()
+    install_mocks(counters, args.embed_latency, args.store_latency, args.fail_rate)
+    content = synthetic_document(args.chunks)
+    # Unique text per run so the embedding cache starts cold
+    content += f"\n\n{hashlib.md5(str(time.time()).encode()).hexdigest()}"
+
+    results = [await timed(counters, "first upload", upload(content))]
+    results.append(await timed(counters, "re-upload", upload(content)))
+    content += "\n\nAn extra section about the Dectus Medallion and the Grand Lift of Dectus."
+    results.append(await timed(counters, "edited", upload(content)))
+    content = rewrite_sections(content, args.edit_sections)
+    results.append(await timed(counters, "edited in place", upload(content)))
+    backend.open_store_records(os.path.join(backend.DATA_DIR, "remote"), reset=True)
+    results.append(await timed(counters, "re-upload, cold", upload(content)))
+    request = backend.DeleteDataRequest(file_name="benchmark.md", type="markdown", game_name="Elden Ring")
+    results.append(await timed(counters, "delete", backend.delete_data(request)))
+
+    print(f"\n{'run':<18}{'time':>9}{'embed reqs':>12}{'embedded':>10}{'store calls':>13}{'deleted':>9}{'retried':>9}{'stored':>8}")
+    for name, elapsed, deltas, stored in results:
+        print(f"{name:<18}{elapsed:>8.2f}s{deltas['embed_requests']:>12}{deltas['embedded_texts']:>10}"
+              f"{deltas['store_calls']:>13}{deltas['deleted_ids']:>9}{deltas['upsert_failures']:>9}{stored:>8}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark uploads and unchanged re-uploads")
+    parser.add_argument("--chunks", type=int, default=2000, help="Approximate chunks in the document")
+    parser.add_argument("--embed-latency", type=float, default=0.5, help="Seconds per embeddings request")
+    parser.add_argument("--store-latency", type=float, default=0.05, help="Seconds per vector store call")
+    parser.add_argument("--edit-sections", type=int, default=20, help="Sections rewritten by the in-place edit")
+    parser.add_argument("--fail-rate", type=float, default=0.0, help="Fraction of upserts that fail transiently")
+    asyncio.run(run(parser.parse_args()))
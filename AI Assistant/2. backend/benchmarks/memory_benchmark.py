@@ -0,0 +1,156 @@
+"""
+Peak memory benchmark for ingesting a large PDF.
+
+Generates a synthetic PDF (text plus one image per page, 500 MB by default)
+and ingests it two ways, each in a fresh process:
+
+- whole: the previous upload path, where the PDF is parsed with one reader
+  and every page is appended to a single string before splitting
+- streaming: pages are read with iter_pdf_pages and flow through the
+  split -> embed -> upsert stages of ingest_stream in bounded batches
+
+Peak RSS is sampled from a background thread. The embeddings API and the
+vector store are mocked; the store keeps nothing in process, like a remote
+Pinecone index, so the numbers measure ingestion itself. Also reported is
+how far into the run the first embedding request was sent.
+
+Usage:
+    python benchmarks/memory_benchmark.py --size-mb 500
+    python benchmarks/memory_benchmark.py --pdf guide.pdf
+"""
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+
+import psutil
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from synthetic_pdf import write_synthetic_pdf  # noqa: E402
+from concurrency_benchmark import fake_embedding  # noqa: E402
+
+
+class PeakRSS:
+    """Samples the resident set size of this process until stopped."""
+
+    def __init__(self, interval=0.01):
+        self.process = psutil.Process()
+        self.interval = interval
+        self.baseline = self.process.memory_info().rss
+        self.peak = self.baseline
+        self.running = True
+        self.thread = threading.Thread(target=self.sample, daemon=True)
+        self.thread.start()
+
+    def sample(self):
+        while self.running:
+            self.peak = max(self.peak, self.process.memory_info().rss)
+            time.sleep(self.interval)
+
+    def stop(self):
+        self.running = False
+        self.thread.join()
+        return self.peak
+
+
+def install_mocks(backend, stats, start):
+    from vector_store import VectorStore
+
+    class FakeHTTPClient:
+        async def post(self, url, headers=None, content=None, **kwargs):
+            await asyncio.sleep(0.05)
+            stats.setdefault("first_embedding", time.perf_counter() - start)
+            texts = json.loads(content)["input"]
+            data = [{"embedding": fake_embedding(text), "index": i} for i, text in enumerate(texts)]
+            return SimpleNamespace(status_code=200, json=lambda: {"data": data}, text="")
+
+        async def aclose(self):
+            pass
+
+    class DiscardingStore(VectorStore):
+        # A remote index: nothing is kept in this process
+        def query(self, vector, top_k, namespace, games=None):
+            return []
+
+        def fetch(self, ids, namespace):
+            return {}
+
+        def upsert(self, vectors, namespace):
+            stats["upserted"] = stats.get("upserted", 0) + len(vectors)
+
+        def delete(self, ids, namespace):
+            pass
+
+    backend._http_client = FakeHTTPClient()
+    backend.vector_store = DiscardingStore()
+    backend.open_store_records(os.path.join(backend.DATA_DIR, "discarded"))
+
+
+async def ingest(mode, path):
+    # Fresh caches and indexes for every run
+    os.environ["BACKEND_DATA_DIR"] = tempfile.mkdtemp(prefix="rag_benchmark_")
+    import backend
+    from pypdf import PdfReader
+
+    stats = {}
+    monitor = PeakRSS()
+    start = time.perf_counter()
+    install_mocks(backend, stats, start)
+
+    if mode == "whole":
+        file_content = ""
+        for page in PdfReader(path).pages:
+            file_content += page.extract_text() or ""
+        stats["chunks"] = await backend.process_data_content(file_content, "guide.pdf", "pdf", None)
+    else:
+        stats["chunks"] = await backend.ingest_stream(backend.iter_pdf_pages(path), "guide.pdf", "pdf")
+
+    stats["seconds"] = time.perf_counter() - start
+    peak = monitor.stop()
+    stats["baseline_mb"] = monitor.baseline / 2**20
+    stats["peak_mb"] = peak / 2**20
+    print(json.dumps(stats))
+
+
+def run(args):
+    path = args.pdf
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(prefix="rag_benchmark_"), "guide.pdf")
+        pages = max(1, int(args.size_mb * 1024 / args.image_kb))
+        print(f"Writing a {args.size_mb:.0f} MB PDF with {pages} pages...")
+        write_synthetic_pdf(path, pages, args.image_kb * 1024)
+    size_mb = os.path.getsize(path) / 2**20
+
+    print(f"PDF: {size_mb:.0f} MB")
+    print(f"{'mode':<11}{'chunks':>8}{'time':>9}{'first embed':>13}{'baseline':>10}{'peak RSS':>10}{'growth':>9}")
+    for mode in args.modes:
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), "--child", mode, "--pdf", path],
+            capture_output=True, text=True, check=True,
+        ).stdout
+        stats = json.loads(output.strip().splitlines()[-1])
+        first = stats.get("first_embedding")
+        print(f"{mode:<11}{stats['chunks']:>8}{stats['seconds']:>8.1f}s"
+              f"{(f'{first:.1f}s' if first is not None else '-'):>13}"
+              f"{stats['baseline_mb']:>8.0f}MB{stats['peak_mb']:>8.0f}MB"
+              f"{stats['peak_mb'] - stats['baseline_mb']:>7.0f}MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure peak memory while ingesting a large PDF")
+    parser.add_argument("--pdf", help="Existing PDF to ingest instead of a generated one")
+    parser.add_argument("--size-mb", type=float, default=500, help="Size of the generated PDF")
+    parser.add_argument("--image-kb", type=int, default=200, help="Image bytes per generated page")
+    parser.add_argument("--modes", nargs="+", choices=["whole", "streaming"], default=["whole", "streaming"])
+    parser.add_argument("--child", choices=["whole", "streaming"], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.child:
+        asyncio.run(ingest(args.child, args.pdf))
+    else:
+        run(args)
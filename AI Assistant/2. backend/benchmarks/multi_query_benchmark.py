@@ -0,0 +1,116 @@
+"""
+Multi-query retrieval benchmark on the Elden Ring Q&A dataset.
+
+Every answer in elden_ring_q&a.csv is embedded into an in-memory
+LocalVectorStore and each question is expanded with expand_query.
+Retrieval then runs two ways:
+
+- concatenation: the question and its variants joined into one string and
+  embedded as a single query (the previous behaviour)
+- multi-query: all variants embedded in one batched request, searched
+  separately and fused with reciprocal rank fusion
+
+A question counts as recalled when its own answer is in the top k.
+Uses the real OpenAI APIs, so OPENAI_API_KEY must be set.
+
+Usage:
+    python benchmarks/multi_query_benchmark.py --top-k 3
+"""
+import argparse
+import asyncio
+import csv
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+# Start from an empty embedding cache so both approaches pay for their embeddings
+os.environ["BACKEND_DATA_DIR"] = tempfile.mkdtemp(prefix="rag_benchmark_")
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+import backend  # noqa: E402
+from vector_store import LocalVectorStore  # noqa: E402
+
+DATASET = os.path.join(BACKEND_DIR, "..", "3. datasets", "elden_ring_q&a.csv")
+
+
+def load_pairs(path):
+    """Read (question, answer) pairs, tolerating unquoted commas in the CSV."""
+    pairs = []
+    with open(path, encoding="utf-8") as f:
+        rows = csv.reader(f)
+        next(rows)  # Header
+        for row in rows:
+            # The question ends at the first field ending in "?"
+            end = next((i for i, field in enumerate(row) if field.strip().endswith("?")), 0)
+            question = ",".join(row[:end + 1]).strip()
+            answer = ",".join(field for field in row[end + 1:] if field.strip()).strip()
+            if question and answer:
+                pairs.append((question, answer))
+    return pairs
+
+
+async def concatenated_retrieval(store, question, variants, top_k):
+    """Previous behaviour: embed the question and its variants as one string."""
+    query_text = " ".join([question] + variants)
+    embedding = (await backend.get_embeddings([query_text]))[0]["embedding"]
+    return {"matches": store.query(embedding, top_k, "answers")}
+
+
+async def multi_query_retrieval(store, question, variants, top_k):
+    """New behaviour: batch-embed every variant, search each and fuse with RRF."""
+    embeddings = await backend.get_embeddings([question] + variants)
+    results = [{"matches": store.query(embedding["embedding"], top_k, "answers")} for embedding in embeddings]
+    return backend.reciprocal_rank_fusion(results, limit=top_k)
+
+
+async def run(top_k):
+    pairs = load_pairs(DATASET)
+    answers = [answer for _, answer in pairs]
+    answer_embeddings = await backend.get_embeddings(answers)
+    store = LocalVectorStore()
+    store.upsert([
+        {"id": str(i), "values": embedding["embedding"], "metadata": {"source_text": answer}}
+        for i, (answer, embedding) in enumerate(zip(answers, answer_embeddings))
+    ], "answers")
+
+    approaches = {"concatenation": concatenated_retrieval, "multi-query": multi_query_retrieval}
+    hits = {name: 0 for name in approaches}
+    reciprocal_ranks = {name: [] for name in approaches}
+    latencies = {name: [] for name in approaches}
+    expansion_latencies = []
+
+    for i, (question, _) in enumerate(pairs):
+        start = time.perf_counter()
+        variants = await backend.expand_query(question)
+        expansion_latencies.append(time.perf_counter() - start)
+
+        for name, retrieve in approaches.items():
+            start = time.perf_counter()
+            results = await retrieve(store, question, variants, top_k)
+            latencies[name].append(time.perf_counter() - start)
+
+            ranked_ids = [match["id"] for match in results["matches"]]
+            if str(i) in ranked_ids:
+                hits[name] += 1
+                reciprocal_ranks[name].append(1.0 / (ranked_ids.index(str(i)) + 1))
+            else:
+                reciprocal_ranks[name].append(0.0)
+
+    print(f"Questions: {len(pairs)}    Expansion (shared): median {statistics.median(expansion_latencies):.3f}s")
+    print(f"{'approach':<15}{'recall@' + str(top_k):>10}{'MRR':>8}{'median':>10}{'p95':>10}")
+    for name in approaches:
+        ordered = sorted(latencies[name])
+        p95 = ordered[min(len(ordered) - 1, int(0.95 * len(ordered)))]
+        print(
+            f"{name:<15}{hits[name] / len(pairs):>10.2%}{statistics.mean(reciprocal_ranks[name]):>8.3f}"
+            f"{statistics.median(ordered):>9.3f}s{p95:>9.3f}s"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare concatenated vs multi-query retrieval")
+    parser.add_argument("--top-k", type=int, default=3, help="Matches retrieved per question")
+    args = parser.parse_args()
+    asyncio.run(run(args.top_k))
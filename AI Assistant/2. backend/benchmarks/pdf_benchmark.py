@@ -0,0 +1,76 @@
+"""
+PDF text extraction throughput benchmark.
+
+Generates a synthetic PDF (600 pages by default) and extracts its text:
+
+- baseline: the previous upload path, one reader on the calling thread
+  with every page appended to a single string
+- workers=N: PdfExtractor with N worker processes, pages yielded in order
+  (N=0 extracts in the calling thread, a range of pages at a time)
+
+Reports pages per second for each. Extraction is CPU bound, so throughput
+should grow with the worker count up to the number of cores.
+
+Usage:
+    python benchmarks/pdf_benchmark.py --pages 600 --workers 0 1 2 4 8
+    python benchmarks/pdf_benchmark.py --pdf guide.pdf
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+from pypdf import PdfReader
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from pdf_extract import PdfExtractor, page_count  # noqa: E402
+from synthetic_pdf import write_synthetic_pdf  # noqa: E402
+
+
+def baseline(path):
+    file_content = ""
+    for page in PdfReader(path).pages:
+        file_content += page.extract_text() or ""
+    return len(file_content)
+
+
+def extract(path, workers, pages_per_task):
+    extractor = PdfExtractor(workers, pages_per_task=pages_per_task)
+    try:
+        # Start the workers outside the timed run, as the server keeps them between uploads
+        extractor.start()
+        start = time.perf_counter()
+        characters = sum(len(text) for text in extractor.iter_pages(path))
+        return characters, time.perf_counter() - start
+    finally:
+        extractor.close()
+
+
+def run(args):
+    path = args.pdf
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(prefix="rag_benchmark_"), "guide.pdf")
+        write_synthetic_pdf(path, args.pages, args.image_kb * 1024)
+    pages = page_count(path)
+    print(f"PDF: {pages} pages, {os.path.getsize(path) / 2**20:.1f} MB, {os.cpu_count()} CPUs")
+    print(f"{'run':<12}{'seconds':>9}{'pages/s':>10}{'speedup':>9}")
+
+    start = time.perf_counter()
+    baseline(path)
+    reference = time.perf_counter() - start
+    print(f"{'baseline':<12}{reference:>9.2f}{pages / reference:>10.1f}{1:>8.2f}x")
+
+    for workers in args.workers:
+        _, seconds = extract(path, workers, args.pages_per_task)
+        print(f"{f'workers={workers}':<12}{seconds:>9.2f}{pages / seconds:>10.1f}{reference / seconds:>8.2f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure PDF text extraction throughput")
+    parser.add_argument("--pdf", help="Existing PDF to extract instead of a generated one")
+    parser.add_argument("--pages", type=int, default=600, help="Pages in the generated PDF")
+    parser.add_argument("--image-kb", type=int, default=0, help="Image bytes per generated page")
+    parser.add_argument("--workers", type=int, nargs="+", default=[0, 1, 2, 4])
+    parser.add_argument("--pages-per-task", type=int, default=16)
+    run(parser.parse_args())
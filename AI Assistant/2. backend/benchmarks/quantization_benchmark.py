@@ -0,0 +1,113 @@
+"""
+Memory vs recall benchmark for quantized vector storage.
+
+Indexes a synthetic corpus in the exact float32 partition and in
+int8 and product-quantized partitions (full vectors in a memory-mapped file
+for re-ranking), then runs the same queries through each. Reports resident
+bytes per vector, the reduction against float32 rows and against parsed
+JSON lists of floats, recall@k against exact search and query latency for
+each re-rank factor.
+
+Real embeddings have most of their variance in a few hundred directions,
+which is what PQ relies on. The default low-rank corpus mimics that; the
+clustered corpus from the HNSW benchmark is mostly isotropic noise and is
+the worst case for PQ.
+
+Usage:
+    python benchmarks/quantization_benchmark.py --vectors 50000 --rerank 1 5 10 50
+    python benchmarks/quantization_benchmark.py --corpus clustered
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from vector_store import NamespacePartition, QuantizedPartition  # noqa: E402
+from hnsw_benchmark import clustered_vectors, percentile  # noqa: E402
+
+
+def low_rank_vectors(rng, count, dimension, rank=96):
+    """Unit vectors from a decaying low-rank spectrum plus a little noise."""
+    latent = rng.standard_normal((count, rank)).astype(np.float32) * np.linspace(1, 0.1, rank, dtype=np.float32)
+    projection = rng.standard_normal((rank, dimension)).astype(np.float32)
+    noise = 0.05 * rng.standard_normal((count, dimension)).astype(np.float32)
+    return NamespacePartition.normalise(latent @ projection + noise)
+
+
+def python_list_bytes(dimension):
+    """Approximate size of one embedding parsed from JSON into a list of floats."""
+    return sys.getsizeof([0.0] * dimension) + dimension * sys.getsizeof(0.0)
+
+
+def evaluate(partition, queries, truth, top_k):
+    recalls, latencies = [], []
+    for query, expected in zip(queries, truth):
+        start = time.perf_counter()
+        found = {match["id"] for match in partition.query(query, top_k)}
+        latencies.append(time.perf_counter() - start)
+        recalls.append(len(found & expected) / len(expected))
+    return np.mean(recalls), np.median(latencies), percentile(latencies, 0.99)
+
+
+def run(args):
+    rng = np.random.default_rng(args.seed)
+    if args.corpus == "clustered":
+        corpus = clustered_vectors(rng, args.vectors, args.dimension, max(1, args.vectors // 20))
+        noise = 0.3
+    else:
+        corpus = low_rank_vectors(rng, args.vectors, args.dimension)
+        noise = 0.02
+    picks = rng.integers(0, args.vectors, args.queries)
+    queries = NamespacePartition.normalise(
+        corpus[picks] + noise * rng.standard_normal((args.queries, args.dimension)).astype(np.float32)
+    )
+    records = [{"id": str(i), "values": vector} for i, vector in enumerate(corpus)]
+
+    exact = NamespacePartition(args.dimension)
+    exact.upsert(records)
+    truth = [{match["id"] for match in exact.query(query, args.top_k)} for query in queries]
+
+    directory = tempfile.mkdtemp(prefix="quantization_benchmark_")
+    float32_bytes = 4 * args.dimension
+    list_bytes = python_list_bytes(args.dimension)
+    print(f"Vectors: {args.vectors} x {args.dimension} ({args.corpus})    Parsed JSON list: {list_bytes / 1024:.1f} KB/vector")
+    print(f"{'storage':<18}{'bytes/vec':>10}{'vs f32':>8}{'vs list':>9}"
+          f"{'recall@' + str(args.top_k):>11}{'median':>11}{'p99':>11}")
+
+    recall, median, p99 = evaluate(exact, queries, truth, args.top_k)
+    print(f"{'float32 exact':<18}{float32_bytes:>10}{1:>7.0f}x{list_bytes / float32_bytes:>8.0f}x"
+          f"{recall:>11.2%}{median * 1000:>9.2f}ms{p99 * 1000:>9.2f}ms")
+
+    for method in ("int8", "pq"):
+        partition = QuantizedPartition(
+            args.dimension, method=method, path=os.path.join(directory, f"{method}.f32"),
+            pq_subspaces=args.pq_subspaces, pq_train_size=min(args.vectors, 4096),
+        )
+        start = time.perf_counter()
+        partition.upsert(records)
+        build_time = time.perf_counter() - start
+        per_vector = partition.memory_bytes() / args.vectors
+        for rerank in args.rerank:
+            partition.rerank = rerank
+            recall, median, p99 = evaluate(partition, queries, truth, args.top_k)
+            name = f"{method} rerank={rerank}"
+            print(f"{name:<18}{per_vector:>10.0f}{float32_bytes / per_vector:>7.0f}x{list_bytes / per_vector:>8.0f}x"
+                  f"{recall:>11.2%}{median * 1000:>9.2f}ms{p99 * 1000:>9.2f}ms")
+        print(f"{'':<18}(encoded in {build_time:.1f}s)")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare quantized and float32 vector storage")
+    parser.add_argument("--vectors", type=int, default=50000, help="Corpus size")
+    parser.add_argument("--dimension", type=int, default=1536, help="Vector width")
+    parser.add_argument("--corpus", choices=["low-rank", "clustered"], default="low-rank", help="Synthetic corpus shape")
+    parser.add_argument("--queries", type=int, default=200, help="Queries to run")
+    parser.add_argument("--top-k", type=int, default=10, help="Matches per query")
+    parser.add_argument("--pq-subspaces", type=int, default=96, help="PQ subspaces (bytes per vector)")
+    parser.add_argument("--rerank", type=int, nargs="+", default=[1, 5, 10, 50], help="Shortlist size as a multiple of top-k")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed")
+    run(parser.parse_args())
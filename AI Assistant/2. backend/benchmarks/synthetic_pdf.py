@@ -0,0 +1,93 @@
+"""
+Synthetic PDF generator for the ingestion benchmarks.
+
+Writes a PDF page by page, so files far larger than memory can be produced.
+Every page has a few paragraphs of text and, optionally, an uncompressed
+image of the given size drawn on it, which is what makes real game guides
+and manuals hundreds of megabytes.
+
+Usage:
+    python benchmarks/synthetic_pdf.py guide.pdf --size-mb 500
+"""
+import argparse
+import os
+import random
+
+WORDS = ("tarnished rune erdtree grace boss weapon talisman spirit ash flask dungeon catacomb "
+         "legacy stat build faith dexterity strength arcane bleed frost poise stance parry").split()
+
+
+def page_text(rng, paragraphs=6, words=60):
+    return [" ".join(rng.choice(WORDS) for _ in range(words)) + "." for _ in range(paragraphs)]
+
+
+def content_stream(lines, image):
+    """Page drawing operators: the image (if any) and one text line per paragraph."""
+    ops = ["q 400 0 0 300 100 450 cm /Im0 Do Q"] if image else []
+    ops.append("BT /F1 9 Tf 40 420 Td 11 TL")
+    for line in lines:
+        escaped = line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+        ops.append(f"({escaped}) Tj T*")
+    ops.append("ET")
+    return "\n".join(ops).encode("latin-1")
+
+
+def write_synthetic_pdf(path, pages, image_bytes=0, seed=0):
+    """Write a PDF with the given number of pages; returns the file size in bytes."""
+    rng = random.Random(seed)
+    offsets = {}
+    # Object numbers: 1 catalog, 2 pages, 3 font, then (page, content, image) per page
+    page_ids = [4 + 3 * i for i in range(pages)]
+
+    with open(path, "wb") as f:
+        def write_object(number, body, stream=None):
+            offsets[number] = f.tell()
+            f.write(f"{number} 0 obj\n".encode())
+            if stream is None:
+                f.write(body + b"\nendobj\n")
+            else:
+                f.write(body + b"\nstream\n" + stream + b"\nendstream\nendobj\n")
+
+        f.write(b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n")
+        write_object(1, b"<< /Type /Catalog /Pages 2 0 R >>")
+        kids = " ".join(f"{page_id} 0 R" for page_id in page_ids)
+        write_object(2, f"<< /Type /Pages /Kids [{kids}] /Count {pages} >>".encode())
+        write_object(3, b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+        side = int((image_bytes // 3) ** 0.5) if image_bytes else 0
+        for page_id in page_ids:
+            content_id, image_id = page_id + 1, page_id + 2
+            xobject = f"/XObject << /Im0 {image_id} 0 R >>" if side else ""
+            write_object(page_id, (
+                f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+                f"/Resources << /Font << /F1 3 0 R >> {xobject} >> /Contents {content_id} 0 R >>"
+            ).encode())
+            stream = content_stream(page_text(rng), side)
+            write_object(content_id, f"<< /Length {len(stream)} >>".encode(), stream)
+            if side:
+                pixels = os.urandom(side * side * 3)
+                write_object(image_id, (
+                    f"<< /Type /XObject /Subtype /Image /Width {side} /Height {side} "
+                    f"/ColorSpace /DeviceRGB /BitsPerComponent 8 /Length {len(pixels)} >>"
+                ).encode(), pixels)
+            else:
+                write_object(image_id, b"null")
+
+        xref = f.tell()
+        count = max(offsets) + 1
+        f.write(f"xref\n0 {count}\n0000000000 65535 f \n".encode())
+        for number in range(1, count):
+            f.write(f"{offsets[number]:010d} 00000 n \n".encode())
+        f.write(f"trailer\n<< /Size {count} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode())
+        return f.tell()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Write a large synthetic PDF")
+    parser.add_argument("path", help="Output file")
+    parser.add_argument("--size-mb", type=float, default=500, help="Approximate file size")
+    parser.add_argument("--image-kb", type=int, default=200, help="Image bytes per page")
+    args = parser.parse_args()
+    page_count = max(1, int(args.size_mb * 1024 / max(args.image_kb, 4)))
+    size = write_synthetic_pdf(args.path, page_count, args.image_kb * 1024)
+    print(f"Wrote {page_count} pages, {size / 2**20:.0f} MB to {args.path}")
@@ -0,0 +1,337 @@
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Optional
+import hashlib
+import itertools
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from vector_store import game_key
+
+
+@dataclass
+class CachedAnswer:
+    """A cached answer and the question embedding it was stored under."""
+    question: str
+    answer: str
+    grounding: str  # "docs" when answered from the vector store, "web" for the web fallback
+    vector: np.ndarray
+    expires_at: float
+    similarity: float = 1.0
+
+
+class SemanticAnswerCache:
+    """
+    In-memory semantic cache of generated answers.
+
+    Entries are partitioned per game so a question about one game never hits
+    an answer for another. A lookup returns the most similar unexpired entry
+    in the game's partition if its cosine similarity reaches the threshold.
+    When the cache is full the least recently used entry is evicted.
+    """
+
+    def __init__(self, threshold: float = 0.95, doc_ttl: float = 86400, web_ttl: float = 3600, max_entries: int = 1000):
+        self.threshold = threshold
+        self.ttls = {"docs": doc_ttl, "web": web_ttl}
+        self.max_entries = max_entries
+        self.entries = OrderedDict()  # entry id -> (partition, CachedAnswer), in LRU order
+        self.partitions = {}  # partition -> list of entry ids
+        self._matrices = {}  # partition -> stacked vectors, rebuilt after changes
+        self._ids = itertools.count()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @staticmethod
+    def partition_for(game_name: Optional[str]) -> str:
+        """The game's key in the vector store, or "" for questions asked without a game."""
+        return game_key(game_name) if game_name and game_name.strip() else ""
+
+    @staticmethod
+    def _normalise(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _remove(self, entry_id):
+        partition, _ = self.entries.pop(entry_id)
+        self.partitions[partition].remove(entry_id)
+        if not self.partitions[partition]:
+            del self.partitions[partition]
+        self._matrices.pop(partition, None)
+
+    def _purge_expired(self, partition: str):
+        now = time.time()
+        expired = [entry_id for entry_id in self.partitions.get(partition, [])
+                   if self.entries[entry_id][1].expires_at <= now]
+        for entry_id in expired:
+            self._remove(entry_id)
+
+    def lookup(self, embedding, game_name: Optional[str] = None) -> Optional[CachedAnswer]:
+        """Return the closest cached answer for this game, or None on a miss."""
+        partition = self.partition_for(game_name)
+        self._purge_expired(partition)
+        entry_ids = self.partitions.get(partition)
+        if not entry_ids:
+            self.misses += 1
+            return None
+
+        if partition not in self._matrices:
+            self._matrices[partition] = np.stack([self.entries[entry_id][1].vector for entry_id in entry_ids])
+        similarities = self._matrices[partition] @ self._normalise(embedding)
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            self.misses += 1
+            return None
+
+        entry_id = entry_ids[best]
+        self.entries.move_to_end(entry_id)
+        self.hits += 1
+        entry = self.entries[entry_id][1]
+        entry.similarity = float(similarities[best])
+        return entry
+
+    def store(self, embedding, question: str, answer: str, grounding: str, game_name: Optional[str] = None):
+        """Cache an answer; grounding ("docs" or "web") selects its TTL."""
+        partition = self.partition_for(game_name)
+        entry = CachedAnswer(
+            question=question,
+            answer=answer,
+            grounding=grounding,
+            vector=self._normalise(embedding),
+            expires_at=time.time() + self.ttls[grounding],
+        )
+        entry_id = next(self._ids)
+        self.entries[entry_id] = (partition, entry)
+        self.partitions.setdefault(partition, []).append(entry_id)
+        self._matrices.pop(partition, None)
+
+        # Evict least recently used entries once over capacity
+        while len(self.entries) > self.max_entries:
+            self._remove(next(iter(self.entries)))
+            self.evictions += 1
+
+    def invalidate_docs(self, game_name: Optional[str] = None) -> int:
+        """Drop answers grounded in documents for one game, or for every game when game_name is None."""
+        partition = None if game_name is None else self.partition_for(game_name)
+        stale = [entry_id for entry_id, (entry_partition, entry) in self.entries.items()
+                 if entry.grounding == "docs" and partition in (None, entry_partition)]
+        for entry_id in stale:
+            self._remove(entry_id)
+        return len(stale)
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size."""
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self.entries),
+            "partitions": len(self.partitions),
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+        }
+
+
+class EmbeddingCache:
+    """
+    Persistent, content-addressed cache of embeddings.
+
+    Vectors are stored in a memory-mapped float32 file, one row per slot, and a
+    SQLite table maps (model, content hash) to its slot. The most recently used
+    vectors are also kept in an in-memory LRU so warm lookups never touch disk.
+    Once max_entries slots are in use, the least recently used rows are reused.
+    """
+
+    GROWTH_ROWS = 4096
+
+    def __init__(self, directory: str, dimension: int = 1536, max_entries: int = 100000, memory_entries: int = 2048):
+        os.makedirs(directory, exist_ok=True)
+        self.dimension = dimension
+        self.max_entries = max_entries
+        self.memory_entries = memory_entries
+        self.memory = OrderedDict()  # (model, hash) -> (float32 vector, last used time)
+        self.lock = threading.Lock()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+        self.db = sqlite3.connect(os.path.join(directory, "embeddings.sqlite3"), check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            "model TEXT NOT NULL, hash TEXT NOT NULL, slot INTEGER NOT NULL, last_used REAL NOT NULL, "
+            "PRIMARY KEY (model, hash))"
+        )
+        self.db.execute("CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings (last_used)")
+        self.db.commit()
+
+        self.vectors_path = os.path.join(directory, f"embeddings_{dimension}.f32")
+        if not os.path.exists(self.vectors_path):
+            open(self.vectors_path, "wb").close()
+        self.vectors = None
+        self.capacity = 0
+        self._map(os.path.getsize(self.vectors_path) // (4 * dimension))
+        self.next_slot = self.db.execute("SELECT COALESCE(MAX(slot) + 1, 0) FROM embeddings").fetchone()[0]
+
+    def _map(self, rows: int):
+        """(Re)map the vector file with room for the given number of rows."""
+        if self.vectors is not None:
+            self.vectors.flush()
+            self.vectors = None
+        with open(self.vectors_path, "r+b") as f:
+            f.truncate(rows * 4 * self.dimension)
+        self.capacity = rows
+        if rows:
+            self.vectors = np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(rows, self.dimension))
+
+    @staticmethod
+    def content_hash(text: str) -> str:
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _remember(self, key, vector: np.ndarray, now: float):
+        self.memory[key] = (vector, now)
+        self.memory.move_to_end(key)
+        while len(self.memory) > self.memory_entries:
+            evicted, (_, last_used) = self.memory.popitem(last=False)
+            # Write the recency back so vectors that were hot in memory are not evicted from disk
+            self.db.execute("UPDATE embeddings SET last_used = ? WHERE model = ? AND hash = ?", (last_used, *evicted))
+
+    def get_many(self, model: str, texts: list) -> list:
+        """Return a cached vector (list of floats) for each text, or None where missing."""
+        results = [None] * len(texts)
+        with self.lock:
+            now = time.time()
+            disk_lookups = {}
+            for i, text in enumerate(texts):
+                key = (model, self.content_hash(text))
+                cached = self.memory.get(key)
+                if cached is not None:
+                    self.memory[key] = (cached[0], now)
+                    self.memory.move_to_end(key)
+                    self.memory_hits += 1
+                    results[i] = cached[0].tolist()
+                else:
+                    disk_lookups.setdefault(key, []).append(i)
+
+            for key, positions in disk_lookups.items():
+                row = self.db.execute("SELECT slot FROM embeddings WHERE model = ? AND hash = ?", key).fetchone()
+                if row is None:
+                    self.misses += len(positions)
+                    continue
+                self.db.execute("UPDATE embeddings SET last_used = ? WHERE model = ? AND hash = ?", (now, *key))
+                vector = np.array(self.vectors[row[0]])
+                self._remember(key, vector, now)
+                self.disk_hits += len(positions)
+                for i in positions:
+                    results[i] = vector.tolist()
+            self.db.commit()
+        return results
+
+    def _allocate_slot(self) -> int:
+        if self.next_slot < self.max_entries:
+            slot = self.next_slot
+            self.next_slot += 1
+            if slot >= self.capacity:
+                self._map(min(self.max_entries, self.capacity + self.GROWTH_ROWS))
+            return slot
+        # Full: reuse the least recently used slot
+        model, content_hash, slot = self.db.execute(
+            "SELECT model, hash, slot FROM embeddings ORDER BY last_used, rowid LIMIT 1"
+        ).fetchone()
+        self.db.execute("DELETE FROM embeddings WHERE model = ? AND hash = ?", (model, content_hash))
+        self.memory.pop((model, content_hash), None)
+        return slot
+
+    def put_many(self, model: str, texts: list, vectors: list):
+        """Store the vectors for the given texts."""
+        with self.lock:
+            now = time.time()
+            for text, values in zip(texts, vectors):
+                if len(values) != self.dimension:
+                    continue  # Only one vector width is stored per cache file
+                key = (model, self.content_hash(text))
+                vector = np.asarray(values, dtype=np.float32)
+                row = self.db.execute("SELECT slot FROM embeddings WHERE model = ? AND hash = ?", key).fetchone()
+                slot = row[0] if row else self._allocate_slot()
+                self.vectors[slot] = vector
+                self.db.execute(
+                    "INSERT OR REPLACE INTO embeddings (model, hash, slot, last_used) VALUES (?, ?, ?, ?)",
+                    (*key, slot, now),
+                )
+                self._remember(key, vector, now)
+            self.vectors.flush()
+            self.db.commit()
+
+    def stats(self) -> dict:
+        """Hit/miss counters and current size."""
+        with self.lock:
+            entries = self.db.execute("SELECT COUNT(*) FROM embeddings").fetchone()[0]
+        return {
+            "entries": entries,
+            "memory_entries": len(self.memory),
+            "memory_hits": self.memory_hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+        }
+
+
+class KnownChunkSet:
+    """
+    Persistent set of chunk hashes known to be stored in the vector store.
+
+    Lets ingestion skip chunks it has already stored without a vector store
+    round-trip. Hashes are kept per namespace in a SQLite table.
+    """
+
+    # SQLite limits the number of parameters per statement
+    QUERY_BATCH = 500
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute(
+            "CREATE TABLE IF NOT EXISTS known_chunks ("
+            "namespace TEXT NOT NULL, hash TEXT NOT NULL, PRIMARY KEY (namespace, hash)) WITHOUT ROWID"
+        )
+        self.db.commit()
+
+    def contains_many(self, namespace: str, hashes: list) -> set:
+        """Return the subset of hashes that are known."""
+        hashes = list(hashes)
+        known = set()
+        with self.lock:
+            for start in range(0, len(hashes), self.QUERY_BATCH):
+                batch = hashes[start:start + self.QUERY_BATCH]
+                rows = self.db.execute(
+                    f"SELECT hash FROM known_chunks WHERE namespace = ? AND hash IN ({','.join('?' * len(batch))})",
+                    (namespace, *batch),
+                )
+                known.update(row[0] for row in rows)
+        return known
+
+    def add_many(self, namespace: str, hashes):
+        with self.lock:
+            self.db.executemany(
+                "INSERT OR IGNORE INTO known_chunks (namespace, hash) VALUES (?, ?)",
+                ((namespace, content_hash) for content_hash in hashes),
+            )
+            self.db.commit()
+
+    def remove_many(self, namespace: str, hashes):
+        with self.lock:
+            self.db.executemany(
+                "DELETE FROM known_chunks WHERE namespace = ? AND hash = ?",
+                ((namespace, content_hash) for content_hash in hashes),
+            )
+            self.db.commit()
+
+    def stats(self) -> dict:
+        with self.lock:
+            return dict(self.db.execute("SELECT namespace, COUNT(*) FROM known_chunks GROUP BY namespace").fetchall())
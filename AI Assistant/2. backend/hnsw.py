@@ -0,0 +1,247 @@
+from typing import Optional
+import heapq
+import math
+import os
+
+import numpy as np
+
+
+class HNSWIndex:
+    """
+    Hierarchical Navigable Small World graph for approximate cosine search.
+
+    Vectors are normalised on insert and stored as float32 rows, so similarity
+    is a dot product. Each node gets a random top level; level 0 links are kept
+    in a fixed-width int32 matrix (up to 2*M neighbours, -1 padded) and the
+    sparser upper levels in dicts. Deletes only tombstone a node: it stays in
+    the graph for navigation but is never returned.
+
+    M controls the graph degree, ef_construction the beam width used while
+    linking new nodes and ef_search the beam width at query time. Larger values
+    trade speed for recall.
+    """
+
+    def __init__(self, dimension: int, M: int = 16, ef_construction: int = 100, ef_search: int = 64, seed: Optional[int] = None):
+        self.dimension = dimension
+        self.M = M
+        self.max_degree0 = 2 * M
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+        self.level_multiplier = 1 / math.log(M)
+        self.rng = np.random.default_rng(seed)
+
+        self.count = 0
+        self.vectors = np.zeros((0, dimension), dtype=np.float32)
+        self.levels = np.zeros(0, dtype=np.int8)
+        self.deleted = np.zeros(0, dtype=bool)
+        self.layer0 = np.full((0, self.max_degree0), -1, dtype=np.int32)
+        self.upper = []  # upper[level - 1]: node -> list of neighbours on that level
+        self.entry_point = -1
+        self.max_level = -1
+        self.tombstones = 0
+
+    @property
+    def live_count(self) -> int:
+        return self.count - self.tombstones
+
+    def _reserve(self, rows: int):
+        if rows <= len(self.vectors):
+            return
+        capacity = max(rows, 2 * len(self.vectors), 64)
+        grow = capacity - len(self.vectors)
+        self.vectors = np.concatenate([self.vectors, np.zeros((grow, self.dimension), dtype=np.float32)])
+        self.levels = np.concatenate([self.levels, np.zeros(grow, dtype=np.int8)])
+        self.deleted = np.concatenate([self.deleted, np.zeros(grow, dtype=bool)])
+        self.layer0 = np.concatenate([self.layer0, np.full((grow, self.max_degree0), -1, dtype=np.int32)])
+
+    def _neighbours(self, node: int, level: int) -> list:
+        if level == 0:
+            row = self.layer0[node]
+            return row[row >= 0].tolist()
+        return self.upper[level - 1].get(node, [])
+
+    def _set_neighbours(self, node: int, level: int, neighbours: list):
+        if level == 0:
+            self.layer0[node] = -1
+            self.layer0[node, :len(neighbours)] = neighbours
+        else:
+            self.upper[level - 1][node] = list(neighbours)
+
+    def _search_layer(self, query: np.ndarray, entry_points: list, ef: int, level: int) -> list:
+        """Beam search on one level; returns up to ef (similarity, node) pairs, best first."""
+        visited = set(entry_points)
+        similarities = (self.vectors[entry_points] @ query).tolist()
+        candidates = [(-similarity, node) for similarity, node in zip(similarities, entry_points)]
+        results = [(similarity, node) for similarity, node in zip(similarities, entry_points)]
+        heapq.heapify(candidates)
+        heapq.heapify(results)
+        while len(results) > ef:
+            heapq.heappop(results)
+
+        while candidates:
+            negative, node = heapq.heappop(candidates)
+            if -negative < results[0][0] and len(results) >= ef:
+                break
+            neighbours = [n for n in self._neighbours(node, level) if n not in visited]
+            if not neighbours:
+                continue
+            visited.update(neighbours)
+            for similarity, neighbour in zip((self.vectors[neighbours] @ query).tolist(), neighbours):
+                if len(results) < ef or similarity > results[0][0]:
+                    heapq.heappush(candidates, (-similarity, neighbour))
+                    heapq.heappush(results, (similarity, neighbour))
+                    if len(results) > ef:
+                        heapq.heappop(results)
+        return sorted(results, reverse=True)
+
+    def _select_neighbours(self, candidates: list, limit: int) -> list:
+        """
+        Pick up to limit neighbours from (similarity, node) pairs sorted best first.
+
+        A candidate is skipped when it is closer to an already selected neighbour
+        than to the node itself, which keeps links spread across directions. Any
+        remaining room is filled with the skipped candidates.
+        """
+        selected, skipped = [], []
+        for similarity, node in candidates:
+            if len(selected) >= limit:
+                break
+            if selected and float((self.vectors[selected] @ self.vectors[node]).max()) > similarity:
+                skipped.append(node)
+            else:
+                selected.append(node)
+        return selected + skipped[:limit - len(selected)]
+
+    def _connect(self, node: int, new_node: int, level: int):
+        """Add a back link from node to new_node, pruning node's links if it is full."""
+        neighbours = self._neighbours(node, level)
+        max_degree = self.max_degree0 if level == 0 else self.M
+        if len(neighbours) < max_degree:
+            neighbours.append(new_node)
+        else:
+            neighbours = neighbours + [new_node]
+            similarities = self.vectors[neighbours] @ self.vectors[node]
+            order = np.argsort(-similarities)
+            neighbours = self._select_neighbours(
+                [(float(similarities[i]), neighbours[i]) for i in order], max_degree
+            )
+        self._set_neighbours(node, level, neighbours)
+
+    def _descend(self, query: np.ndarray, to_level: int) -> list:
+        """Greedy walk from the entry point down to just above to_level."""
+        entry_points = [self.entry_point]
+        for level in range(self.max_level, to_level, -1):
+            entry_points = [self._search_layer(query, entry_points, 1, level)[0][1]]
+        return entry_points
+
+    def insert(self, vector) -> int:
+        """Add a vector to the graph and return its node number."""
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        if norm:
+            vector = vector / norm
+
+        node = self.count
+        self._reserve(node + 1)
+        self.vectors[node] = vector
+        level = int(-math.log(1.0 - self.rng.random()) * self.level_multiplier)
+        self.levels[node] = level
+        self.count += 1
+        while len(self.upper) < level:
+            self.upper.append({})
+        for upper_level in range(1, level + 1):
+            self.upper[upper_level - 1][node] = []
+
+        if self.entry_point < 0:
+            self.entry_point, self.max_level = node, level
+            return node
+
+        entry_points = self._descend(vector, level)
+        for current in range(min(level, self.max_level), -1, -1):
+            candidates = self._search_layer(vector, entry_points, self.ef_construction, current)
+            neighbours = self._select_neighbours(candidates, self.M)
+            self._set_neighbours(node, current, neighbours)
+            for neighbour in neighbours:
+                self._connect(neighbour, node, current)
+            entry_points = [candidate for _, candidate in candidates]
+
+        if level > self.max_level:
+            self.entry_point, self.max_level = node, level
+        return node
+
+    def delete(self, node: int):
+        """Tombstone a node so it is no longer returned by searches."""
+        if not self.deleted[node]:
+            self.deleted[node] = True
+            self.tombstones += 1
+
+    def search(self, query, k: int, ef: Optional[int] = None) -> list:
+        """Return up to k (similarity, node) pairs for live nodes, best first."""
+        if self.live_count <= 0 or k <= 0:
+            return []
+        query = np.asarray(query, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm:
+            query = query / norm
+
+        ef = max(ef or self.ef_search, k)
+        entry_points = self._descend(query, 0)
+        while True:
+            results = self._search_layer(query, entry_points, ef, 0)
+            live = [(similarity, node) for similarity, node in results if not self.deleted[node]]
+            # Tombstones take up beam slots, so widen the beam until k live nodes are found
+            if len(live) >= k or ef >= self.count:
+                return live[:k]
+            ef *= 2
+
+    def save(self, path: str):
+        """Write the graph to a single .npz file, replacing any previous one atomically."""
+        self.write_arrays(path, self.arrays())
+
+    def arrays(self) -> dict:
+        """Copy of the graph as the arrays save() writes, independent of later inserts and deletes."""
+        arrays = {
+            "params": np.array([self.dimension, self.M, self.ef_construction, self.ef_search,
+                                self.count, self.entry_point, self.max_level], dtype=np.int64),
+            "vectors": self.vectors[:self.count].copy(),
+            "levels": self.levels[:self.count].copy(),
+            "deleted": self.deleted[:self.count].copy(),
+            "layer0": self.layer0[:self.count].copy(),
+        }
+        for level, links in enumerate(self.upper, start=1):
+            nodes = np.fromiter(links.keys(), dtype=np.int32, count=len(links))
+            edges = np.full((len(links), self.M), -1, dtype=np.int32)
+            for row, neighbours in enumerate(links.values()):
+                edges[row, :len(neighbours)] = neighbours
+            arrays[f"upper{level}_nodes"] = nodes
+            arrays[f"upper{level}_edges"] = edges
+        return arrays
+
+    @staticmethod
+    def write_arrays(path: str, arrays: dict):
+        with open(f"{path}.tmp", "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(f"{path}.tmp", path)
+
+    @classmethod
+    def load(cls, path: str, ef_search: Optional[int] = None) -> "HNSWIndex":
+        """Load a graph saved with save(), without rebuilding any links."""
+        with np.load(path) as data:
+            dimension, M, ef_construction, saved_ef_search, count, entry_point, max_level = data["params"].tolist()
+            index = cls(dimension, M=M, ef_construction=ef_construction, ef_search=ef_search or saved_ef_search)
+            index.count = count
+            index.vectors = data["vectors"]
+            index.levels = data["levels"]
+            index.deleted = data["deleted"]
+            index.layer0 = data["layer0"]
+            index.entry_point, index.max_level = entry_point, max_level
+            index.tombstones = int(index.deleted.sum())
+            level = 1
+            while f"upper{level}_nodes" in data:
+                nodes = data[f"upper{level}_nodes"].tolist()
+                edges = data[f"upper{level}_edges"]
+                index.upper.append({
+                    node: row[row >= 0].tolist() for node, row in zip(nodes, edges)
+                })
+                level += 1
+        return index
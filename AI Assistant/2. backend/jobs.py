@@ -0,0 +1,153 @@
+from collections import OrderedDict
+from typing import Optional
+import asyncio
+import queue
+import threading
+import time
+import uuid
+
+
+class IngestionJob:
+    """
+    Progress of one ingestion job.
+
+    The worker running the job updates it while the API thread reads it, so
+    every access goes through a lock. source_done/source_total count pages or
+    bytes read (see units); chunks_total is known once splitting has finished.
+    """
+
+    def __init__(self, kind: str, name: str, game: Optional[str]):
+        self.id = uuid.uuid4().hex
+        self.kind = kind
+        self.name = name
+        self.game = game
+        self.state = "queued"  # queued, running, done or failed
+        self.stage = "queued"
+        self.units = None
+        self.source_done = 0
+        self.source_total = None
+        self.chunks_split = 0
+        self.chunks_done = 0
+        self.chunks_total = None
+        self.error = None
+        self.message = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.lock = threading.Lock()
+
+    def update(self, **fields):
+        with self.lock:
+            for name, value in fields.items():
+                setattr(self, name, value)
+
+    def advance(self, **increments):
+        """Add to counters such as chunks_done or source_done."""
+        with self.lock:
+            for name, value in increments.items():
+                setattr(self, name, getattr(self, name) + value)
+
+    def to_dict(self) -> dict:
+        with self.lock:
+            end = self.finished_at or time.time()
+            elapsed = end - self.started_at if self.started_at else 0.0
+            return {
+                "id": self.id,
+                "kind": self.kind,
+                "name": self.name,
+                "game": self.game,
+                "state": self.state,
+                "stage": self.stage,
+                "units": self.units,
+                "source_done": self.source_done,
+                "source_total": self.source_total,
+                "chunks_split": self.chunks_split,
+                "chunks_done": self.chunks_done,
+                "chunks_total": self.chunks_total,
+                "elapsed_seconds": round(elapsed, 3),
+                "chunks_per_second": round(self.chunks_done / elapsed, 2) if elapsed else 0.0,
+                "error": self.error,
+                "message": self.message,
+                "created_at": self.created_at,
+                "finished_at": self.finished_at,
+            }
+
+
+class JobQueue:
+    """
+    Runs ingestion jobs on dedicated worker threads.
+
+    Every worker has its own event loop, so chunking, embedding and upserting
+    never queue behind (or hold up) the request handlers on the server's loop.
+    on_worker_start/on_worker_stop are coroutine functions run on each
+    worker's loop, for per-loop resources such as HTTP clients. The most
+    recent max_jobs jobs are kept for status lookups.
+    """
+
+    def __init__(self, workers: int = 1, max_jobs: int = 200, on_worker_start=None, on_worker_stop=None):
+        self.workers = workers
+        self.max_jobs = max_jobs
+        self.on_worker_start = on_worker_start
+        self.on_worker_stop = on_worker_stop
+        self.jobs = OrderedDict()  # job id -> IngestionJob, oldest first
+        self.pending = queue.Queue()
+        self.threads = []
+        self.lock = threading.Lock()
+
+    def start(self):
+        for number in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f"ingestion-worker-{number}", daemon=True)
+            thread.start()
+            self.threads.append(thread)
+
+    def stop(self, timeout: float = 5.0):
+        """Ask the workers to exit once their current job finishes; queued jobs are dropped."""
+        for _ in self.threads:
+            self.pending.put(None)
+        for thread in self.threads:
+            thread.join(timeout)
+        self.threads = []
+
+    def submit(self, kind: str, name: str, game: Optional[str], run) -> IngestionJob:
+        """Queue run(job), a coroutine function, and return the job."""
+        job = IngestionJob(kind, name, game)
+        with self.lock:
+            self.jobs[job.id] = job
+            # Forget the oldest finished jobs
+            for old_id in [job_id for job_id, old in self.jobs.items() if old.finished_at][:max(0, len(self.jobs) - self.max_jobs)]:
+                del self.jobs[old_id]
+        self.pending.put((job, run))
+        return job
+
+    def get(self, job_id: str) -> Optional[IngestionJob]:
+        with self.lock:
+            return self.jobs.get(job_id)
+
+    def stats(self) -> dict:
+        with self.lock:
+            states = [job.state for job in self.jobs.values()]
+        return {
+            "workers": len(self.threads),
+            **{state: states.count(state) for state in ("queued", "running", "done", "failed")},
+        }
+
+    def _work(self):
+        loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(loop)
+        if self.on_worker_start is not None:
+            loop.run_until_complete(self.on_worker_start())
+        try:
+            while (item := self.pending.get()) is not None:
+                job, run = item
+                job.update(state="running", stage="starting", started_at=time.time())
+                try:
+                    loop.run_until_complete(run(job))
+                except Exception as e:
+                    job.update(state="failed", stage="failed", error=str(e) or type(e).__name__, finished_at=time.time())
+                    print(f"❌ Ingestion job {job.id} ({job.name}) failed: {e}")
+                else:
+                    job.update(state="done", stage="done", finished_at=time.time())
+        finally:
+            if self.on_worker_stop is not None:
+                loop.run_until_complete(self.on_worker_stop())
+            loop.close()
@@ -0,0 +1,184 @@
+from typing import Optional
+import json
+import math
+import os
+import re
+import threading
+
+from vector_store import GENERAL_GAME, game_key
+
+# Words that carry no signal for lexical matching or relevance scoring
+STOPWORDS = frozenset("""
+a an and are as at be by can do does for from how i in is it its me my of on or the this to what where which who why will with you your
+""".split())
+
+
+def tokenize(text: str) -> list:
+    """Lowercase word tokens without stopwords."""
+    return [token for token in re.findall(r"[a-z0-9]+", text.lower()) if token not in STOPWORDS]
+
+
+class BM25Partition:
+    """Inverted index and BM25 statistics for the chunks of one namespace and game."""
+
+    def __init__(self):
+        self.docs = {}  # doc id -> {"terms": {term: count}, "length": int, "metadata": dict}
+        self.postings = {}  # term -> {doc id: count}
+        self.total_length = 0
+
+    def add(self, doc_id: str, text: str, metadata: dict):
+        if doc_id in self.docs:
+            self.remove(doc_id)
+        terms = {}
+        for token in tokenize(text):
+            terms[token] = terms.get(token, 0) + 1
+        self._insert(doc_id, {"terms": terms, "length": sum(terms.values()), "metadata": metadata})
+
+    def _insert(self, doc_id: str, doc: dict):
+        self.docs[doc_id] = doc
+        self.total_length += doc["length"]
+        for term, count in doc["terms"].items():
+            self.postings.setdefault(term, {})[doc_id] = count
+
+    def remove(self, doc_id: str):
+        doc = self.docs.pop(doc_id, None)
+        if doc is None:
+            return
+        self.total_length -= doc["length"]
+        for term in doc["terms"]:
+            postings = self.postings[term]
+            postings.pop(doc_id, None)
+            if not postings:
+                del self.postings[term]
+
+    def search(self, terms: list, top_k: int, k1: float = 1.2, b: float = 0.75) -> list:
+        """Return up to top_k (score, doc id) pairs, best first."""
+        if not self.docs:
+            return []
+        average_length = self.total_length / len(self.docs) or 1.0
+        scores = {}
+        for term in set(terms):
+            postings = self.postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (len(self.docs) - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, count in postings.items():
+                length = self.docs[doc_id]["length"]
+                weight = count * (k1 + 1) / (count + k1 * (1 - b + b * length / average_length))
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * weight
+        ranked = sorted(scores.items(), key=lambda item: item[1], reverse=True)[:top_k]
+        return [(score, doc_id) for doc_id, score in ranked]
+
+
+class LexicalIndex:
+    """
+    BM25 keyword index over ingested chunks, kept alongside the vector store.
+
+    Chunks are partitioned by namespace and game, with chunks that have no
+    game in a shared "general" partition searched for every game. Each
+    namespace is persisted as one JSON file in the index directory.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        self.directory = directory
+        self.namespaces = {}  # namespace -> game -> BM25Partition
+        self.dirty = set()
+        self.lock = threading.Lock()
+        self.save_lock = threading.Lock()  # one save at a time, as two would write the same files
+        if directory:
+            self.load()
+
+    def add(self, documents: list, namespace: str, game_name: Optional[str] = None, replace: bool = False):
+        """
+        Index documents ({"id", "text", "metadata"}).
+
+        IDs are content hashes, so documents already indexed are skipped unless
+        replace is set. Returns the number of documents indexed.
+        """
+        with self.lock:
+            partition = self.namespaces.setdefault(namespace, {}).setdefault(game_key(game_name), BM25Partition())
+            added = 0
+            for document in documents:
+                if replace or document["id"] not in partition.docs:
+                    partition.add(document["id"], document["text"], document.get("metadata") or {})
+                    added += 1
+            if added:
+                self.dirty.add(namespace)
+            return added
+
+    def remove(self, ids: list, namespace: str):
+        """Remove documents by ID from every game partition of the namespace."""
+        with self.lock:
+            for partition in self.namespaces.get(namespace, {}).values():
+                for doc_id in ids:
+                    partition.remove(doc_id)
+            self.dirty.add(namespace)
+
+    def search(self, query: str, namespace: str, top_k: int, game_name: Optional[str] = None) -> list:
+        """
+        Return up to top_k matches ({"id", "score", "metadata"}) for the query
+        in the game's partition and the general one, best BM25 score first.
+        """
+        terms = tokenize(query)
+        games = {game_key(game_name), GENERAL_GAME}
+        with self.lock:
+            partitions = self.namespaces.get(namespace, {})
+            results = [
+                (score, doc_id, partitions[game].docs[doc_id]["metadata"])
+                for game in games if game in partitions
+                for score, doc_id in partitions[game].search(terms, top_k)
+            ]
+        results.sort(key=lambda result: result[0], reverse=True)
+        return [{"id": doc_id, "score": score, "metadata": metadata} for score, doc_id, metadata in results[:top_k]]
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                namespace: sum(len(partition.docs) for partition in games.values())
+                for namespace, games in self.namespaces.items()
+            }
+
+    def load(self):
+        """Load every namespace saved in the index directory."""
+        if not os.path.isdir(self.directory):
+            return
+        for file_name in os.listdir(self.directory):
+            if not file_name.endswith(".json"):
+                continue
+            with open(os.path.join(self.directory, file_name), encoding="utf-8") as f:
+                saved = json.load(f)
+            games = self.namespaces.setdefault(file_name[:-len(".json")], {})
+            for game, docs in saved.items():
+                partition = games.setdefault(game_key(game), BM25Partition())
+                for doc_id, doc in docs.items():
+                    partition._insert(doc_id, doc)
+
+    def save(self):
+        """
+        Write changed namespaces to disk, replacing the previous files
+        atomically. The lock is only held to copy the document tables of the
+        changed namespaces, so searches are not held up while they are written.
+        """
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        with self.save_lock:
+            with self.lock:
+                # Documents are never modified in place, so shallow copies of the tables are enough
+                changed = [
+                    (namespace, {game: dict(partition.docs) for game, partition in self.namespaces[namespace].items()})
+                    for namespace in self.dirty
+                ]
+                self.dirty.clear()
+            try:
+                while changed:
+                    namespace, docs = changed[-1]
+                    path = os.path.join(self.directory, f"{namespace}.json")
+                    with open(f"{path}.tmp", "w", encoding="utf-8") as f:
+                        json.dump(docs, f)
+                    os.replace(f"{path}.tmp", path)
+                    changed.pop()
+            finally:
+                # Namespaces that could not be written are saved next time
+                with self.lock:
+                    self.dirty.update(namespace for namespace, _ in changed)
@@ -0,0 +1,221 @@
+from typing import Optional
+import os
+import sqlite3
+import threading
+import time
+
+
+class ChunkManifest:
+    """
+    Persistent record of which chunks every ingested file contributed.
+
+    Each file (namespace, file name, game) maps to the hashes of its chunks,
+    which are also the vector IDs. Chunks shared by several files are
+    reference counted, so deleting a file only removes the chunks no other
+    file still uses. Every lookup goes through a primary key, so the cost of
+    planning or applying a deletion is proportional to the chunks of the
+    deleted files.
+
+    Every ingestion of a file is a new generation. Chunks the new version
+    still contains are moved to it, so after a re-upload the chunks left in
+    older generations are exactly the ones the edit removed.
+    """
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.lock = threading.Lock()
+        self.db = sqlite3.connect(path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                namespace TEXT NOT NULL, file_name TEXT NOT NULL, game TEXT NOT NULL,
+                file_type TEXT, file_hash TEXT, updated_at REAL NOT NULL,
+                PRIMARY KEY (namespace, file_name, game)
+            );
+            CREATE TABLE IF NOT EXISTS file_chunks (
+                namespace TEXT NOT NULL, file_name TEXT NOT NULL, game TEXT NOT NULL, hash TEXT NOT NULL,
+                PRIMARY KEY (namespace, file_name, game, hash)
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS chunks (
+                namespace TEXT NOT NULL, hash TEXT NOT NULL, refs INTEGER NOT NULL,
+                PRIMARY KEY (namespace, hash)
+            ) WITHOUT ROWID;
+        """)
+        # Databases created before generations were tracked start at generation 0
+        for table in ("files", "file_chunks"):
+            columns = [row[1] for row in self.db.execute(f"PRAGMA table_info({table})")]
+            if "generation" not in columns:
+                self.db.execute(f"ALTER TABLE {table} ADD COLUMN generation INTEGER NOT NULL DEFAULT 0")
+        self.db.commit()
+
+    def start_file(self, namespace: str, file_name: str, game: str, file_type: str) -> tuple:
+        """
+        Record a file as being ingested, starting a new generation of its
+        chunks. It counts as not fully ingested until mark_ingested is
+        called, so chunks can be tracked before they are written.
+        Returns (generation, whether the previous version was fully ingested).
+        """
+        key = (namespace, file_name, game)
+        with self.lock, self.db:
+            row = self.db.execute(
+                "SELECT generation, file_hash FROM files WHERE namespace = ? AND file_name = ? AND game = ?", key
+            ).fetchone()
+            generation = 1 if row is None else row[0] + 1
+            self.db.execute(
+                "INSERT OR REPLACE INTO files (namespace, file_name, game, file_type, file_hash, updated_at, generation) "
+                "VALUES (?, ?, ?, ?, NULL, ?, ?)",
+                (*key, file_type, time.time(), generation),
+            )
+        return generation, row is not None and row[1] is not None
+
+    def add_chunks(self, namespace: str, file_name: str, game: str, hashes: list, generation: int) -> list:
+        """
+        Add chunks to a file's current generation, counting a reference for
+        each chunk new to the file. Returns the hashes new to the file;
+        chunks it already had are only moved to the current generation.
+        """
+        added = []
+        with self.lock, self.db:
+            for content_hash in dict.fromkeys(hashes):
+                key = (namespace, file_name, game, content_hash)
+                if self.db.execute(
+                    "INSERT OR IGNORE INTO file_chunks (namespace, file_name, game, hash, generation) VALUES (?, ?, ?, ?, ?)",
+                    (*key, generation),
+                ).rowcount:
+                    self.db.execute(
+                        "INSERT INTO chunks (namespace, hash, refs) VALUES (?, ?, 1) "
+                        "ON CONFLICT (namespace, hash) DO UPDATE SET refs = refs + 1",
+                        (namespace, content_hash),
+                    )
+                    added.append(content_hash)
+                else:
+                    self.db.execute(
+                        "UPDATE file_chunks SET generation = ? WHERE namespace = ? AND file_name = ? AND game = ? AND hash = ?",
+                        (generation, *key),
+                    )
+        return added
+
+    def stale_chunks(self, namespace: str, file_name: str, game: str, generation: int) -> tuple:
+        """
+        Chunks of earlier generations of a file, which its current version no
+        longer contains. Returns (stale hashes, those no other file references).
+        """
+        with self.lock:
+            stale = [row[0] for row in self.db.execute(
+                "SELECT hash FROM file_chunks WHERE namespace = ? AND file_name = ? AND game = ? AND generation < ?",
+                (namespace, file_name, game, generation),
+            )]
+            orphans = [
+                content_hash for content_hash in stale
+                if (self.db.execute(
+                    "SELECT refs FROM chunks WHERE namespace = ? AND hash = ?", (namespace, content_hash)
+                ).fetchone() or (0,))[0] <= 1
+            ]
+        return stale, orphans
+
+    def remove_stale_chunks(self, namespace: str, file_name: str, game: str, generation: int):
+        """Drop a file's chunks from earlier generations, releasing their references."""
+        key = (namespace, file_name, game, generation)
+        with self.lock, self.db:
+            hashes = [row[0] for row in self.db.execute(
+                "SELECT hash FROM file_chunks WHERE namespace = ? AND file_name = ? AND game = ? AND generation < ?", key
+            )]
+            self._release(namespace, hashes)
+            self.db.execute(
+                "DELETE FROM file_chunks WHERE namespace = ? AND file_name = ? AND game = ? AND generation < ?", key
+            )
+
+    def _release(self, namespace: str, hashes: list):
+        self.db.executemany(
+            "UPDATE chunks SET refs = refs - 1 WHERE namespace = ? AND hash = ?",
+            ((namespace, content_hash) for content_hash in hashes),
+        )
+        self.db.executemany(
+            "DELETE FROM chunks WHERE namespace = ? AND hash = ? AND refs <= 0",
+            ((namespace, content_hash) for content_hash in hashes),
+        )
+
+    def mark_ingested(self, namespace: str, file_name: str, game: str, file_hash: str):
+        """Remember the hash of the file content whose chunks are now all stored."""
+        with self.lock, self.db:
+            self.db.execute(
+                "UPDATE files SET file_hash = ?, updated_at = ? WHERE namespace = ? AND file_name = ? AND game = ?",
+                (file_hash, time.time(), namespace, file_name, game),
+            )
+
+    def is_ingested(self, namespace: str, file_name: str, game: str, file_hash: str) -> bool:
+        """Whether this exact file content was fully ingested under this name and game."""
+        with self.lock:
+            row = self.db.execute(
+                "SELECT file_hash FROM files WHERE namespace = ? AND file_name = ? AND game = ?",
+                (namespace, file_name, game),
+            ).fetchone()
+        return row is not None and row[0] == file_hash
+
+    def chunk_count(self, namespace: str, file_name: str, game: str) -> int:
+        with self.lock:
+            return self.db.execute(
+                "SELECT COUNT(*) FROM file_chunks WHERE namespace = ? AND file_name = ? AND game = ?",
+                (namespace, file_name, game),
+            ).fetchone()[0]
+
+    def find_files(self, namespace: str, file_name: str, game: Optional[str] = None) -> list:
+        """Return the manifest entries for a file name, in one game or in every game."""
+        query = "SELECT file_name, game, file_type FROM files WHERE namespace = ? AND file_name = ?"
+        params = [namespace, file_name]
+        if game is not None:
+            query += " AND game = ?"
+            params.append(game)
+        with self.lock:
+            rows = self.db.execute(query, params).fetchall()
+        return [dict(zip(("file_name", "game", "file_type"), row)) for row in rows]
+
+    def find_files_under(self, namespace: str, prefix: str, game: Optional[str] = None) -> list:
+        """Return the manifest entries whose file name starts with prefix, such as every page of a site."""
+        # A range over the primary key: every name from prefix up to the next name that does not start with it
+        query = "SELECT file_name, game, file_type FROM files WHERE namespace = ? AND file_name >= ? AND file_name < ?"
+        params = [namespace, prefix, prefix[:-1] + chr(ord(prefix[-1]) + 1)]
+        if game is not None:
+            query += " AND game = ?"
+            params.append(game)
+        with self.lock:
+            rows = self.db.execute(query, params).fetchall()
+        return [dict(zip(("file_name", "game", "file_type"), row)) for row in rows]
+
+    def orphaned_chunks(self, namespace: str, files: list) -> list:
+        """Hashes that no file other than the given ones references."""
+        removed_refs = {}
+        with self.lock:
+            for file in files:
+                rows = self.db.execute(
+                    "SELECT hash FROM file_chunks WHERE namespace = ? AND file_name = ? AND game = ?",
+                    (namespace, file["file_name"], file["game"]),
+                )
+                for (content_hash,) in rows:
+                    removed_refs[content_hash] = removed_refs.get(content_hash, 0) + 1
+            orphans = []
+            for content_hash, count in removed_refs.items():
+                row = self.db.execute(
+                    "SELECT refs FROM chunks WHERE namespace = ? AND hash = ?", (namespace, content_hash)
+                ).fetchone()
+                if row is None or row[0] <= count:
+                    orphans.append(content_hash)
+        return orphans
+
+    def remove_files(self, namespace: str, files: list):
+        """Drop files from the manifest, releasing their chunk references."""
+        with self.lock, self.db:
+            for file in files:
+                key = (namespace, file["file_name"], file["game"])
+                hashes = [row[0] for row in self.db.execute(
+                    "SELECT hash FROM file_chunks WHERE namespace = ? AND file_name = ? AND game = ?", key
+                )]
+                self._release(namespace, hashes)
+                self.db.execute("DELETE FROM file_chunks WHERE namespace = ? AND file_name = ? AND game = ?", key)
+                self.db.execute("DELETE FROM files WHERE namespace = ? AND file_name = ? AND game = ?", key)
+
+    def stats(self) -> dict:
+        with self.lock:
+            files = self.db.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+            chunks = self.db.execute("SELECT COUNT(*) FROM chunks").fetchone()[0]
+        return {"files": files, "chunks": chunks}
@@ -0,0 +1,213 @@
+from concurrent.futures import ThreadPoolExecutor
+from collections import deque
+from typing import Optional
+import os
+import pickle
+import queue
+import subprocess
+import sys
+import threading
+
+from pypdf import PdfReader
+
+
+def page_count(path: str) -> int:
+    with open(path, "rb") as f:
+        return len(PdfReader(f).pages)
+
+
+# Reader kept between ranges of the same file by this process (or thread, when extracting in-process)
+_state = threading.local()
+
+
+def _reader(path: str) -> PdfReader:
+    """
+    Open a reader for the file, reusing the previous one if it is the same
+    file: every new reader has to load the whole page tree before it can
+    return any page. Reading a different file closes the previous one.
+    """
+    stat = os.stat(path)
+    key = (path, stat.st_size, stat.st_mtime_ns)
+    if getattr(_state, "key", None) != key:
+        release_reader()
+        # A file handle, not a path: given a path, pypdf reads the whole file into memory
+        _state.file = open(path, "rb")
+        _state.reader = PdfReader(_state.file)
+        _state.key = key
+    return _state.reader
+
+
+def release_reader():
+    """Close the reader kept by this process or thread, if any."""
+    if getattr(_state, "file", None) is not None:
+        _state.file.close()
+    _state.key = _state.file = _state.reader = None
+
+
+def extract_page_range(path: str, start: int, end: int) -> list:
+    """Text of pages start to end - 1, one string per page."""
+    reader = _reader(path)
+    try:
+        return [(reader.pages[number].extract_text() or "") + "\n" for number in range(start, end)]
+    finally:
+        # The reader caches every object it parses, images included; only the page tree is worth keeping
+        reader.resolved_objects.clear()
+
+
+class _WorkerProcess:
+    """A child Python process running this module's worker loop."""
+
+    def __init__(self):
+        # Run as a script, not through multiprocessing, so the child never imports the server module
+        self.process = subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+        )
+
+    def extract(self, path: str, start: int, end: int) -> list:
+        try:
+            pickle.dump((path, start, end), self.process.stdin)
+            self.process.stdin.flush()
+            ok, result = pickle.load(self.process.stdout)
+        except (EOFError, OSError, pickle.UnpicklingError) as e:
+            raise WorkerDied(f"PDF worker exited unexpectedly ({type(e).__name__})") from None
+        if not ok:
+            raise ValueError(f"Failed to extract pages {start + 1}-{end}: {result}")
+        return result
+
+    def close(self):
+        try:
+            self.process.stdin.close()
+            self.process.wait(timeout=5)
+        except (OSError, subprocess.TimeoutExpired):
+            self.process.kill()
+
+
+class WorkerDied(RuntimeError):
+    """Raised when a PDF worker process exits in the middle of a task."""
+
+
+class PdfExtractor:
+    """
+    Extracts PDF text across a pool of worker processes.
+
+    pypdf is pure Python and CPU bound, so in-process extraction runs on one
+    core and holds the GIL away from the request handlers. Here each worker
+    extracts a range of pages_per_task pages; iter_pages keeps a few ranges
+    per worker queued and yields the pages in document order as they
+    complete. With workers=0 pages are extracted in the calling thread.
+
+    Workers are plain child processes running this file, started on first
+    use: nothing is forked from the threaded server, and the server module
+    and its caches are never imported into them. A worker that dies is
+    replaced. A worker keeps its reader open until it is given another file.
+    """
+
+    def __init__(self, workers: int, pages_per_task: int = 16, tasks_per_worker: int = 2):
+        self.workers = workers
+        self.pages_per_task = pages_per_task
+        self.tasks_per_worker = tasks_per_worker
+        self.executor = None
+        self.idle = queue.Queue()
+        self.processes = []
+        self.lock = threading.Lock()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # One thread per worker process, each waiting on its process's reply
+        with self.lock:
+            if self.executor is None:
+                self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="pdf-extract")
+            return self.executor
+
+    def start(self):
+        """Start every worker now rather than on first use."""
+        while len(self.processes) < self.workers:
+            worker = _WorkerProcess()
+            with self.lock:
+                self.processes.append(worker)
+            self.idle.put(worker)
+
+    def _extract(self, path: str, start: int, end: int) -> list:
+        try:
+            worker = self.idle.get_nowait()
+        except queue.Empty:
+            worker = _WorkerProcess()
+            with self.lock:
+                self.processes.append(worker)
+        try:
+            return worker.extract(path, start, end)
+        except WorkerDied:
+            with self.lock:
+                self.processes.remove(worker)
+            worker.close()
+            worker = None
+            raise
+        finally:
+            if worker is not None:
+                self.idle.put(worker)
+
+    def iter_pages(self, path: str, on_pages=None, total_pages: Optional[int] = None):
+        """
+        Yield the text of every page in order. on_pages(count) is called as
+        pages are yielded; total_pages avoids opening the file to count them.
+        """
+        total = page_count(path) if total_pages is None else total_pages
+        ranges = deque((start, min(start + self.pages_per_task, total)) for start in range(0, total, self.pages_per_task))
+
+        if self.workers <= 0:
+            try:
+                for start, end in ranges:
+                    yield from extract_page_range(path, start, end)
+                    if on_pages is not None:
+                        on_pages(end - start)
+            finally:
+                release_reader()
+            return
+
+        executor = self._get_executor()
+        pending = deque()
+        try:
+            while ranges or pending:
+                # Only a few ranges ahead, so extracted text waiting to be chunked stays bounded
+                while ranges and len(pending) < self.workers * self.tasks_per_worker:
+                    pending.append(executor.submit(self._extract, path, *ranges.popleft()))
+                texts = pending.popleft().result()
+                yield from texts
+                if on_pages is not None:
+                    on_pages(len(texts))
+        finally:
+            # The consumer stopped early or failed: drop work that has not started
+            for future in pending:
+                future.cancel()
+
+    def close(self):
+        with self.lock:
+            executor, self.executor = self.executor, None
+            processes, self.processes = self.processes, []
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        for worker in processes:
+            worker.close()
+
+
+def _serve():
+    """Worker loop: read (path, start, end) requests from stdin, write (ok, texts or error) to stdout."""
+    requests, replies = sys.stdin.buffer, sys.stdout.buffer
+    # Anything printed while extracting must not end up in the reply stream
+    sys.stdout = sys.stderr
+    while True:
+        try:
+            path, start, end = pickle.load(requests)
+        except EOFError:
+            return
+        try:
+            reply = (True, extract_page_range(path, start, end))
+        except Exception as e:
+            reply = (False, f"{type(e).__name__}: {e}")
+        pickle.dump(reply, replies)
+        replies.flush()
+
+
+if __name__ == "__main__":
+    _serve()
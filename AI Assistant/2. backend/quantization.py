@@ -0,0 +1,170 @@
+from typing import Optional
+import os
+
+import numpy as np
+
+# Rows scored per step when scanning compressed codes, which bounds the
+# float32 temporaries a query allocates
+SCAN_BLOCK_ROWS = 2048
+
+
+class ScalarQuantizer:
+    """
+    int8 scalar quantization with one float32 scale per vector.
+
+    Each vector is divided by its largest absolute component and scaled to
+    [-127, 127], so a 1536-d vector takes 1540 bytes instead of 6144.
+    """
+
+    trained = True
+
+    def fields(self, dimension: int) -> dict:
+        return {"codes": ((dimension,), np.int8), "scales": ((), np.float32)}
+
+    def encode(self, vectors: np.ndarray) -> dict:
+        scales = np.abs(vectors).max(axis=1) / 127
+        scales[scales == 0] = 1.0
+        codes = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+        return {"codes": codes, "scales": scales.astype(np.float32)}
+
+    def score(self, arrays: dict, query: np.ndarray) -> np.ndarray:
+        codes, scales = arrays["codes"], arrays["scales"]
+        scores = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), SCAN_BLOCK_ROWS):
+            end = start + SCAN_BLOCK_ROWS
+            scores[start:end] = (codes[start:end].astype(np.float32) @ query) * scales[start:end]
+        return scores
+
+    def state(self) -> dict:
+        return {}
+
+    def load_state(self, arrays):
+        pass
+
+
+class ProductQuantizer:
+    """
+    Product quantization: the vector is split into equal subspaces and each
+    subspace is replaced by the index of its nearest of 256 centroids.
+
+    With 96 subspaces a 1536-d vector takes 96 bytes. Scoring uses a per-query
+    lookup table of centroid dot products, so codes are never decoded. The
+    codebooks have to be trained with k-means before anything can be encoded.
+    """
+
+    CENTROIDS = 256
+
+    def __init__(self, dimension: int, subspaces: int = 96, iterations: int = 15, seed: Optional[int] = 0):
+        if dimension % subspaces:
+            raise ValueError(f"PQ subspaces ({subspaces}) must divide the vector dimension ({dimension})")
+        self.dimension = dimension
+        self.subspaces = subspaces
+        self.width = dimension // subspaces
+        self.iterations = iterations
+        self.rng = np.random.default_rng(seed)
+        self.codebooks = None  # (subspaces, centroids, width)
+
+    @property
+    def trained(self) -> bool:
+        return self.codebooks is not None
+
+    def fields(self, dimension: int) -> dict:
+        return {"codes": ((self.subspaces,), np.uint8)}
+
+    def _split(self, vectors: np.ndarray) -> np.ndarray:
+        return vectors.reshape(len(vectors), self.subspaces, self.width)
+
+    @staticmethod
+    def _nearest(points: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+        distances = (centroids ** 2).sum(axis=1) - 2 * points @ centroids.T
+        return distances.argmin(axis=1)
+
+    def train(self, vectors: np.ndarray):
+        """Fit the codebooks with k-means on a sample of vectors."""
+        vectors = np.asarray(vectors, dtype=np.float32)
+        sample_size = min(len(vectors), 40 * self.CENTROIDS)
+        sample = self._split(vectors[self.rng.choice(len(vectors), sample_size, replace=False)])
+        centroids = min(self.CENTROIDS, sample_size)
+        codebooks = np.zeros((self.subspaces, self.CENTROIDS, self.width), dtype=np.float32)
+        for subspace in range(self.subspaces):
+            points = sample[:, subspace]
+            centres = points[self.rng.choice(len(points), centroids, replace=False)].copy()
+            for _ in range(self.iterations):
+                assignment = self._nearest(points, centres)
+                counts = np.bincount(assignment, minlength=centroids)
+                sums = np.zeros_like(centres)
+                np.add.at(sums, assignment, points)
+                filled = counts > 0
+                centres[filled] = sums[filled] / counts[filled, None]
+            codebooks[subspace, :centroids] = centres
+            # Pad small samples with copies so every code stays valid
+            codebooks[subspace, centroids:] = centres[0]
+        self.codebooks = codebooks
+
+    def encode(self, vectors: np.ndarray) -> dict:
+        split = self._split(np.asarray(vectors, dtype=np.float32))
+        codes = np.empty((len(split), self.subspaces), dtype=np.uint8)
+        for subspace in range(self.subspaces):
+            codes[:, subspace] = self._nearest(split[:, subspace], self.codebooks[subspace])
+        return {"codes": codes}
+
+    def score(self, arrays: dict, query: np.ndarray) -> np.ndarray:
+        # table[s, c] is the dot product of query subspace s with centroid c
+        table = np.einsum("scw,sw->sc", self.codebooks, query.reshape(self.subspaces, self.width))
+        codes = arrays["codes"]
+        scores = np.empty(len(codes), dtype=np.float32)
+        offsets = np.arange(self.subspaces) * self.CENTROIDS
+        flat_table = table.ravel()
+        for start in range(0, len(codes), SCAN_BLOCK_ROWS):
+            block = codes[start:start + SCAN_BLOCK_ROWS].astype(np.intp) + offsets
+            scores[start:start + len(block)] = flat_table[block].sum(axis=1)
+        return scores
+
+    def state(self) -> dict:
+        return {"codebooks": self.codebooks} if self.trained else {}
+
+    def load_state(self, arrays):
+        if "codebooks" in arrays:
+            self.codebooks = arrays["codebooks"]
+
+
+class VectorFile:
+    """
+    Full-precision float32 vectors in a memory-mapped file, one row per record.
+
+    Only the rows that are read are paged in, so the full vectors cost disk
+    rather than resident memory. Without a path the rows are kept in memory.
+    """
+
+    GROWTH_ROWS = 4096
+
+    def __init__(self, path: Optional[str], dimension: int):
+        self.path = path
+        self.dimension = dimension
+        self.vectors = np.zeros((0, dimension), dtype=np.float32)
+        if path:
+            if not os.path.exists(path):
+                open(path, "wb").close()
+            self._map(os.path.getsize(path) // (4 * dimension))
+
+    def _map(self, rows: int):
+        if not self.path:
+            grown = np.zeros((rows, self.dimension), dtype=np.float32)
+            grown[:len(self.vectors)] = self.vectors
+            self.vectors = grown
+            return
+        if isinstance(self.vectors, np.memmap):
+            self.vectors.flush()
+        self.vectors = np.zeros((0, self.dimension), dtype=np.float32)
+        with open(self.path, "r+b") as f:
+            f.truncate(rows * 4 * self.dimension)
+        if rows:
+            self.vectors = np.memmap(self.path, dtype=np.float32, mode="r+", shape=(rows, self.dimension))
+
+    def reserve(self, rows: int):
+        if rows > len(self.vectors):
+            self._map(max(rows, len(self.vectors) + self.GROWTH_ROWS))
+
+    def flush(self):
+        if isinstance(self.vectors, np.memmap):
+            self.vectors.flush()
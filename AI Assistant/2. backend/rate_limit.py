@@ -0,0 +1,68 @@
+import asyncio
+import threading
+import time
+
+
+class RateLimiter:
+    """
+    Token bucket limiting both tokens and requests per minute.
+
+    Callers reserve capacity before sending a request and sleep until it is
+    available, so bursts queue up instead of being rejected with 429s.
+    Reservations can push a bucket below zero; later callers then wait for
+    it to refill, which keeps requests in arrival order. The buckets are
+    guarded by a lock, so one limiter can be shared across threads and event
+    loops. A limit of 0 disables that bucket.
+
+    With a priority_share, that share of every limit is set aside for
+    priority requests in buckets of their own, so they never queue behind
+    bulk reservations; bulk requests get the rest.
+    """
+
+    def __init__(self, tokens_per_minute: int, requests_per_minute: int, priority_share: float = 0.0):
+        limits = {"tokens": tokens_per_minute, "requests": requests_per_minute}
+        shares = {"bulk": 1.0 - priority_share, "priority": priority_share} if priority_share > 0 else {"bulk": 1.0}
+        # At least 1 per minute, so a small share never turns a limit into no limit
+        self.capacity = {
+            lane: {kind: max(1, round(limit * share)) if limit > 0 else 0 for kind, limit in limits.items()}
+            for lane, share in shares.items()
+        }
+        self.available = {lane: {kind: float(limit) for kind, limit in capacity.items()} for lane, capacity in self.capacity.items()}
+        self.updated = dict.fromkeys(self.capacity, time.monotonic())
+        self.lock = threading.Lock()
+        self.delayed = dict.fromkeys(self.capacity, 0)
+        self.waited = 0.0
+
+    def reserve(self, tokens: int, priority: bool = False) -> float:
+        """Take the capacity for one request; return the seconds to wait before sending it."""
+        lane = "priority" if priority and "priority" in self.capacity else "bulk"
+        with self.lock:
+            now = time.monotonic()
+            elapsed, self.updated[lane] = now - self.updated[lane], now
+            available = self.available[lane]
+            wait = 0.0
+            for kind, amount in (("tokens", tokens), ("requests", 1)):
+                limit = self.capacity[lane][kind]
+                if limit <= 0:
+                    continue
+                # A request larger than the whole bucket waits for at most one full refill
+                available[kind] = min(limit, available[kind] + elapsed * limit / 60) - min(amount, limit)
+                if available[kind] < 0:
+                    wait = max(wait, -available[kind] * 60 / limit)
+            if wait:
+                self.delayed[lane] += 1
+                self.waited += wait
+            return wait
+
+    async def acquire(self, tokens: int, priority: bool = False):
+        wait = self.reserve(tokens, priority)
+        if wait:
+            await asyncio.sleep(wait)
+
+    def stats(self) -> dict:
+        with self.lock:
+            return {
+                "delayed_requests": sum(self.delayed.values()),
+                "delayed_priority_requests": self.delayed.get("priority", 0),
+                "seconds_waited": round(self.waited, 3),
+            }
@@ -0,0 +1,198 @@
+from typing import Optional
+import csv
+import io
+import json
+
+# Records are yielded as (label, text): label locates the record in the file
+# (a JSON key path, or None), text is its fields, one "name: value" per line.
+
+
+class _JsonStream:
+    """Reads a JSON document from a text file a block at a time."""
+
+    def __init__(self, f, block_chars: int = 1 << 16):
+        self.f = f
+        self.block_chars = block_chars
+        self.buffer = ""
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self, min_chars: int) -> bool:
+        """Read more of the file, dropping what has been consumed; False at end of file."""
+        if self.eof:
+            return False
+        block = self.f.read(max(self.block_chars, min_chars))
+        self.buffer = self.buffer[self.pos:] + block
+        self.pos = 0
+        self.eof = not block
+        return bool(block)
+
+    def peek(self) -> str:
+        """Next non-whitespace character, without consuming it ('' at end of file)."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in " \t\r\n":
+                self.pos += 1
+            if self.pos < len(self.buffer) or not self._fill(0):
+                return self.buffer[self.pos:self.pos + 1]
+
+    def expect(self, characters: str) -> str:
+        character = self.peek()
+        if not character or character not in characters:
+            raise ValueError(f"Invalid JSON: expected {' or '.join(characters)}, found {character or 'end of file'!r}")
+        self.pos += 1
+        return character
+
+    def value(self):
+        """Parse the next complete value, reading more of the file until it is all buffered."""
+        self.peek()
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as e:
+                # A value cut off by the end of the buffer fails too: read on (doubling) and retry
+                if not self._fill(2 * (len(self.buffer) - self.pos)):
+                    raise ValueError(f"Invalid JSON: {e.msg}") from None
+                continue
+            # A number ending exactly at the buffer boundary may continue in the next block
+            if end == len(self.buffer) and not self.eof and not isinstance(value, (dict, list, str)):
+                if self._fill(0):
+                    continue
+            self.pos = end
+            return value
+
+
+def _key_path(path: str, key) -> str:
+    if isinstance(key, int):
+        return f"{path}[{key}]"
+    return f"{path}.{key}" if path else str(key)
+
+
+def _collapse(text: str) -> str:
+    """Collapse runs of whitespace, newlines included, so every field stays on one line."""
+    return " ".join(text.split())
+
+
+def _scalar(value) -> str:
+    return _collapse(value) if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+
+
+def _fields(value, prefix: str = ""):
+    """Flatten a parsed value into "name: value" lines."""
+    if isinstance(value, dict):
+        for key, item in value.items():
+            yield from _fields(item, _key_path(prefix, key))
+    elif isinstance(value, list) and any(isinstance(item, (dict, list)) for item in value):
+        for index, item in enumerate(value):
+            yield from _fields(item, _key_path(prefix, index))
+    elif isinstance(value, list):
+        yield f"{prefix}: {', '.join(_scalar(item) for item in value)}" if prefix else ", ".join(map(_scalar, value))
+    else:
+        yield f"{prefix}: {_scalar(value)}" if prefix else _scalar(value)
+
+
+def _record(path: str, value):
+    return path or None, "\n".join(_fields(value))
+
+
+def _walk(stream: _JsonStream, path: str):
+    """
+    Yield the records of the value at the stream position. Objects are walked
+    member by member, grouping their scalar members into one record; every
+    element of an array is a record of its own, parsed whole.
+    """
+    character = stream.peek()
+    if character == "{":
+        stream.expect("{")
+        scalars = {}
+        if stream.peek() == "}":
+            stream.expect("}")
+            return
+        while True:
+            key = stream.value()
+            if not isinstance(key, str):
+                raise ValueError("Invalid JSON: object keys must be strings")
+            stream.expect(":")
+            if stream.peek() in "{[":
+                if scalars:
+                    yield _record(path, scalars)
+                    scalars = {}
+                yield from _walk(stream, _key_path(path, key))
+            else:
+                scalars[key] = stream.value()
+            if stream.expect(",}") == "}":
+                break
+        if scalars:
+            yield _record(path, scalars)
+    elif character == "[":
+        stream.expect("[")
+        scalars = []
+        if stream.peek() == "]":
+            stream.expect("]")
+            return
+        index = 0
+        while True:
+            item = stream.value()
+            if isinstance(item, (dict, list)):
+                yield _record(_key_path(path, index), item)
+            else:
+                scalars.append(item)
+            index += 1
+            if stream.expect(",]") == "]":
+                break
+        if scalars:
+            yield _record(path, scalars)
+    else:
+        yield _record(path, stream.value())
+
+
+def iter_json_records(path: str, on_progress=None):
+    """
+    Yield (key path, text) records from a JSON file without loading it whole:
+    one per array element, plus one per object for its scalar members.
+    Several top-level values (JSON Lines) are read one after another.
+    on_progress(bytes_read) is called as the file is read.
+    """
+    with open(path, "rb") as raw:
+        f = io.TextIOWrapper(raw, encoding="utf-8-sig")
+        stream = _JsonStream(f)
+        while stream.peek():
+            for record in _walk(stream, ""):
+                if record[1]:
+                    yield record
+                if on_progress is not None:
+                    on_progress(raw.tell())
+
+
+def iter_csv_records(path: str, on_progress=None):
+    """
+    Yield one (None, text) record per CSV row, each field prefixed with its
+    column header. Fields beyond the named columns, as left by unquoted
+    commas, are joined back onto the last named column.
+    on_progress(bytes_read) is called as the file is read.
+    """
+    with open(path, "rb") as raw:
+        rows = csv.reader(io.TextIOWrapper(raw, encoding="utf-8-sig", newline=""))
+        header = next(rows, None)
+        if header is None:
+            return
+        names = [_collapse(name) for name in header]
+        while names and not names[-1]:
+            names.pop()
+        for row in rows:
+            if len(row) > len(names) > 0:
+                extra = [field for field in row[len(names) - 1:] if field.strip()]
+                row = row[:len(names) - 1] + [",".join(extra)]
+            fields = [
+                f"{name or f'Column {number}'}: {_collapse(value)}"
+                for number, (name, value) in enumerate(zip(names, row), start=1)
+                if value.strip()
+            ]
+            if fields:
+                yield None, "\n".join(fields)
+            if on_progress is not None:
+                on_progress(raw.tell())
+
+
+def render_record(label: Optional[str], text: str) -> str:
+    return f"{label}\n{text}" if label else text
@@ -0,0 +1,20 @@
+import os
+import sys
+import tempfile
+
+import pytest
+
+# The backend keeps its caches and indexes under BACKEND_DATA_DIR from import time on
+os.environ["BACKEND_DATA_DIR"] = tempfile.mkdtemp(prefix="rag_tests_")
+os.environ["VECTOR_BACKEND"] = "local"
+os.environ["WARM_UP"] = "false"
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def backend():
+    """The backend module, for tests that need its optional dependencies installed."""
+    pytest.importorskip("crawl4ai")
+    pytest.importorskip("pygetwindow")
+    import backend
+    return backend
@@ -0,0 +1,15 @@
+from caching import SemanticAnswerCache
+from vector_store import game_key
+
+
+def test_answer_partitions_use_the_vector_store_game_key():
+    cache = SemanticAnswerCache()
+    cache.store([1.0, 0.0], "Where is Malenia?", "In the Haligtree.", "docs", game_name=" Elden  Ring ")
+    cache.store([1.0, 0.0], "Where is Malenia?", "In the Haligtree.", "docs")
+    assert cache.lookup([1.0, 0.0], "ELDEN RING") is not None
+
+    # Ingestion invalidates with the key its records were stored under
+    assert cache.invalidate_docs(game_key("Elden Ring")) == 1
+    assert cache.lookup([1.0, 0.0], "Elden Ring") is None
+    # Questions asked without a game keep their own partition
+    assert cache.lookup([1.0, 0.0]) is not None
@@ -0,0 +1,54 @@
+import asyncio
+import time
+
+from rate_limit import RateLimiter
+
+
+def test_bulk_reservations_queue_in_order():
+    limiter = RateLimiter(tokens_per_minute=6000, requests_per_minute=0)
+    waits = [limiter.reserve(3000) for _ in range(4)]
+    # The first two fit the bucket, each later one waits another 30 seconds of refill
+    assert waits[:2] == [0.0, 0.0]
+    assert 29 < waits[2] < 31 and 59 < waits[3] < 61
+
+
+def test_priority_requests_skip_the_bulk_queue():
+    limiter = RateLimiter(tokens_per_minute=60000, requests_per_minute=600, priority_share=0.1)
+    # An upload reserving far more than the bulk share can cover
+    bulk_waits = [limiter.reserve(20000) for _ in range(5)]
+    assert bulk_waits[-1] > 30
+
+    # A question's embedding goes straight out of the share set aside for it
+    assert limiter.reserve(30, priority=True) == 0.0
+    stats = limiter.stats()
+    assert stats["delayed_requests"] == 3 and stats["delayed_priority_requests"] == 0
+
+
+def test_priority_requests_share_the_bucket_without_a_share():
+    limiter = RateLimiter(tokens_per_minute=60000, requests_per_minute=0)
+    for _ in range(5):
+        limiter.reserve(20000)
+    assert limiter.reserve(30, priority=True) > 30
+
+
+def test_priority_share_is_itself_limited():
+    limiter = RateLimiter(tokens_per_minute=60000, requests_per_minute=0, priority_share=0.1)
+    # The priority lane holds 6,000 tokens a minute
+    assert limiter.reserve(6000, priority=True) == 0.0
+    assert 2.9 < limiter.reserve(300, priority=True) < 3.1
+
+
+def test_priority_acquire_does_not_wait_behind_bulk():
+    limiter = RateLimiter(tokens_per_minute=60000, requests_per_minute=0, priority_share=0.1)
+
+    async def run():
+        bulk = [asyncio.create_task(limiter.acquire(27000)) for _ in range(3)]
+        start = time.perf_counter()
+        await limiter.acquire(50, priority=True)
+        elapsed = time.perf_counter() - start
+        for task in bulk:
+            task.cancel()
+        await asyncio.gather(*bulk, return_exceptions=True)
+        return elapsed
+
+    assert asyncio.run(run()) < 0.5
@@ -0,0 +1,22 @@
+import asyncio
+
+from lexical_index import LexicalIndex
+from vector_store import LocalVectorStore
+
+
+def test_lexical_hits_below_the_similarity_floor_are_dropped(backend, monkeypatch):
+    store = LocalVectorStore(dimension=3)
+    store.upsert([
+        {"id": "on-topic", "values": [1.0, 0.1, 0.0], "metadata": {}},
+        {"id": "off-topic", "values": [0.0, 0.0, 1.0], "metadata": {}},
+    ], "game_docs")
+    index = LexicalIndex()
+    index.add([
+        {"id": "on-topic", "text": "Malenia is fought at the Haligtree", "metadata": {}},
+        {"id": "off-topic", "text": "Malenia figurines ship in two weeks", "metadata": {}},
+    ], "game_docs")
+    monkeypatch.setattr(backend, "vector_store", store)
+    monkeypatch.setattr(backend, "lexical_index", index)
+
+    result = asyncio.run(backend.lexical_search("malenia", [1.0, 0.0, 0.0], ["game_docs"]))
+    assert [match["id"] for match in result["matches"]] == ["on-topic"]
@@ -0,0 +1,72 @@
+import asyncio
+import hashlib
+
+import httpx
+import numpy as np
+
+PAGES = {
+    "https://wiki.example.com/bosses/malenia": "Malenia, Blade of Miquella, waits at the bottom of the Haligtree. " * 40,
+    "https://wiki.example.com/items/dectus-medallion": "The Dectus Medallion opens the Grand Lift of Dectus. " * 40,
+}
+
+
+def fake_embedding(text):
+    vector = np.random.default_rng(int(hashlib.md5(text.encode()).hexdigest()[:8], 16)).standard_normal(1536)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+def install_fakes(backend, monkeypatch):
+    async def fetch_url_content(url):
+        return PAGES[url]
+
+    async def request_embeddings(texts, model="text-embedding-3-small", api_key=None, tokens=None, priority=False):
+        return [{"embedding": fake_embedding(text), "index": i} for i, text in enumerate(texts)]
+
+    monkeypatch.setattr(backend, "fetch_url_content", fetch_url_content)
+    monkeypatch.setattr(backend, "request_embeddings", request_embeddings)
+
+
+async def import_url(client, url):
+    response = await client.post("/import-from-url", json={"url": url, "gameName": "Elden Ring"})
+    assert response.status_code == 202
+    while True:
+        job = (await client.get(response.json()["status_url"])).json()
+        if job["state"] in ("done", "failed"):
+            assert job["state"] == "done", job["error"]
+            return
+        await asyncio.sleep(0.05)
+
+
+def stored_ids(backend):
+    return set(backend.vector_store.locations.get("game_docs", {}))
+
+
+def test_pages_from_one_site_are_kept_and_deleted_separately(backend, monkeypatch):
+    install_fakes(backend, monkeypatch)
+    first, second = PAGES
+
+    async def run():
+        async with backend.lifespan(backend.app):
+            transport = httpx.ASGITransport(app=backend.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                await import_url(client, first)
+                first_ids = stored_ids(backend)
+                assert first_ids
+
+                # A second page of the same site adds to the first instead of replacing it
+                await import_url(client, second)
+                second_ids = stored_ids(backend) - first_ids
+                assert second_ids and first_ids <= stored_ids(backend)
+
+                response = await client.post("/delete-data", json={"file_name": first, "type": "url", "gameName": "Elden Ring"})
+                assert response.status_code == 200
+                assert response.json()["files"] == [first]
+                assert stored_ids(backend) == second_ids
+
+                # A bare domain deletes whatever is left of the site
+                response = await client.post("/delete-data", json={"file_name": "wiki.example.com", "type": "url"})
+                assert response.status_code == 200
+                assert response.json()["files"] == [second]
+                assert not stored_ids(backend)
+
+    asyncio.run(run())
@@ -0,0 +1,22 @@
+import numpy as np
+
+from vector_store import LocalVectorStore
+
+
+def test_quantized_store_reloads_vectors_in_line_with_saved_ids(tmp_path):
+    rng = np.random.default_rng(0)
+    vectors = rng.standard_normal((50, 32)).astype(np.float32)
+    store = LocalVectorStore(str(tmp_path), dimension=32, quantization="int8")
+    store.upsert([{"id": f"doc-{i}", "values": vector.tolist(), "metadata": {}} for i, vector in enumerate(vectors)], "game_docs")
+    store.save()
+
+    # Deletes after the save move rows around the live vector file, which then
+    # reaches the disk before the process stops without saving again
+    store.delete([f"doc-{i}" for i in range(10)], "game_docs")
+    for partition in store.namespaces["game_docs"].values():
+        partition.full.flush()
+
+    reloaded = LocalVectorStore(str(tmp_path), dimension=32, quantization="int8")
+    for i, vector in enumerate(vectors):
+        match = reloaded.query(vector.tolist(), 1, "game_docs")[0]
+        assert match["id"] == f"doc-{i}" and match["score"] > 0.999
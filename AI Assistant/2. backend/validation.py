@@ -0,0 +1,150 @@
+from litellm import acompletion
+import asyncio
+import datetime
+import json
+import os
+import re
+import time
+
+
+async def validate_response(response: str, context: str) -> bool:
+    """Check if response is context-supported"""
+    prompt = f"""Verify if this answer is fully supported by context (1=yes/0=no):
+    Context: {context}
+    Response: {response}"""
+    validation = await acompletion(
+        model="gpt-4-turbo",
+        messages=[{"role": "system", "content": prompt}],
+        temperature=0
+    )
+    return validation.choices[0].message.content.strip() == "1"
+
+
+batch_validation_prompt = """Verify whether each answer below is fully supported by its context.
+Reply with exactly one line per answer in the form "<number>: 1" if it is supported or "<number>: 0" if it is not.
+
+{items}"""
+
+
+class ResponseAuditor:
+    """
+    Validates answers in the background, after they have been returned.
+
+    Answers are queued and validated in batches with one LLM call per batch.
+    Each verdict is appended to a JSONL log together with the question, answer
+    and context so it can be analysed later. An optional on_valid callback runs
+    for answers that pass, which lets cache admission wait for validation.
+    """
+
+    def __init__(self, log_path: str, batch_size: int = 5, batch_wait: float = 2.0):
+        self.log_path = log_path
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self.queue = None
+        self.worker = None
+        self.validated = 0
+        self.failed = 0
+
+    def submit(self, question, answer, context, grounding, on_valid=None):
+        """Queue an answer for validation, starting the worker on first use."""
+        if self.worker is None:
+            self.queue = asyncio.Queue()
+            self.worker = asyncio.create_task(self._run())
+        self.queue.put_nowait({
+            "question": question,
+            "answer": answer,
+            "context": context,
+            "grounding": grounding,
+            "on_valid": on_valid,
+        })
+
+    async def _next_batch(self):
+        batch = [await self.queue.get()]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), remaining))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = await self._next_batch()
+            try:
+                try:
+                    verdicts = await self.validate_batch(batch)
+                except Exception as e:
+                    print(f"⚠️ Error validating responses: {e}")
+                    verdicts = [None] * len(batch)
+                self.record(batch, verdicts)
+            except Exception as e:
+                # Keep the worker alive: stop() waits for every queued answer to be marked done
+                print(f"⚠️ Error recording validation results: {e}")
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def validate_batch(self, batch):
+        """Validate a batch of answers, falling back to one call per answer if the reply is malformed."""
+        if len(batch) == 1:
+            return [await validate_response(batch[0]["answer"], batch[0]["context"])]
+
+        items = "\n\n".join(
+            f"Answer {number}:\nContext: {item['context']}\nResponse: {item['answer']}"
+            for number, item in enumerate(batch, start=1)
+        )
+        validation = await acompletion(
+            model="gpt-4-turbo",
+            messages=[{"role": "system", "content": batch_validation_prompt.format(items=items)}],
+            temperature=0
+        )
+        replies = dict(re.findall(r"(\d+)\s*:\s*([01])", validation.choices[0].message.content))
+        if len(replies) < len(batch):
+            print("⚠️ Malformed batch validation reply. Validating individually.")
+            return list(await asyncio.gather(*(validate_response(item["answer"], item["context"]) for item in batch)))
+        return [replies.get(str(number)) == "1" for number in range(1, len(batch) + 1)]
+
+    def record(self, batch, verdicts):
+        """Log each verdict and run the on_valid callback for validated answers."""
+        os.makedirs(os.path.dirname(self.log_path) or ".", exist_ok=True)
+        with open(self.log_path, "a", encoding="utf-8") as log:
+            for item, verdict in zip(batch, verdicts):
+                if verdict:
+                    self.validated += 1
+                    print("✅ Response is validated with context.")
+                    if item["on_valid"] is not None:
+                        try:
+                            item["on_valid"]()
+                        except Exception as e:
+                            print(f"⚠️ Error running validation callback: {e}")
+                elif verdict is not None:
+                    self.failed += 1
+                    print("⚠️ Response validation failed.")
+                log.write(json.dumps({
+                    "timestamp": datetime.datetime.now().isoformat(),
+                    "question": item["question"],
+                    "answer": item["answer"],
+                    "context": item["context"],
+                    "grounding": item["grounding"],
+                    "validated": verdict,
+                }) + "\n")
+
+    async def stop(self):
+        """Finish any queued validations, then stop the worker."""
+        if self.worker is None:
+            return
+        await self.queue.join()
+        self.worker.cancel()
+        await asyncio.gather(self.worker, return_exceptions=True)
+        self.worker = None
+
+    def stats(self) -> dict:
+        return {
+            "pending": self.queue.qsize() if self.queue else 0,
+            "validated": self.validated,
+            "failed": self.failed,
+        }
@@ -0,0 +1,719 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+import asyncio
+import hashlib
+import json
+import os
+import random
+import re
+import threading
+
+import numpy as np
+
+from hnsw import HNSWIndex
+from quantization import SCAN_BLOCK_ROWS, ProductQuantizer, ScalarQuantizer, VectorFile
+
+# Game of records uploaded without one; searched for every game
+GENERAL_GAME = "general"
+
+
+def game_key(game_name: Optional[str]) -> str:
+    """Normalise a game name into the key stored in record metadata."""
+    return " ".join((game_name or "").lower().split()) or GENERAL_GAME
+
+
+class VectorStore(ABC):
+    """
+    Common interface for the vector databases the backend can use.
+
+    Matches are returned as plain dicts with "id", "score" and "metadata",
+    and fetched records as dicts with "id", "values" and "metadata", whatever
+    the backing store. Records are scoped to a game by the "game" key in
+    their metadata (see game_key). The async variants run the blocking calls
+    in a worker thread unless a store overrides them.
+    """
+
+    @abstractmethod
+    def query(self, vector: list, top_k: int, namespace: str, games: Optional[list] = None) -> list:
+        """Return the top_k most similar records in the namespace, only from the given games if set."""
+
+    @abstractmethod
+    def fetch(self, ids: list, namespace: str) -> dict:
+        """Return the records that exist for the given IDs, keyed by ID."""
+
+    @abstractmethod
+    def upsert(self, vectors: list, namespace: str):
+        """Insert or replace records ({"id", "values", "metadata"}); values may be lists or NumPy arrays."""
+
+    @abstractmethod
+    def delete(self, ids: list, namespace: str):
+        """Delete records by ID."""
+
+    def save(self):
+        """Persist any pending changes; a no-op for remote stores."""
+
+    async def aquery(self, vector: list, top_k: int, namespace: str, games: Optional[list] = None) -> list:
+        return await asyncio.to_thread(self.query, vector, top_k, namespace, games)
+
+    async def afetch(self, ids: list, namespace: str) -> dict:
+        return await asyncio.to_thread(self.fetch, ids, namespace)
+
+    async def aupsert(self, vectors: list, namespace: str):
+        return await asyncio.to_thread(self.upsert, vectors, namespace)
+
+    async def adelete(self, ids: list, namespace: str):
+        return await asyncio.to_thread(self.delete, ids, namespace)
+
+
+class UpsertError(Exception):
+    """Raised when some upsert or delete batches still fail after every retry."""
+
+
+def estimate_record_bytes(record: dict) -> int:
+    """Rough JSON size of an upsert record: about 20 characters per float plus the metadata."""
+    metadata = json.dumps(record.get("metadata") or {})
+    return 20 * len(record["values"]) + len(metadata) + len(record["id"]) + 64
+
+
+def split_upsert_batches(vectors: list, max_bytes: int, max_vectors: int) -> list:
+    """Split records into batches under both the payload size and the vector count limits."""
+    batches, batch, batch_bytes = [], [], 0
+    for record in vectors:
+        size = estimate_record_bytes(record)
+        if batch and (batch_bytes + size > max_bytes or len(batch) >= max_vectors):
+            batches.append(batch)
+            batch, batch_bytes = [], 0
+        batch.append(record)
+        batch_bytes += size
+    if batch:
+        batches.append(batch)
+    return batches
+
+
+async def _run_batches(batches: list, action, label: str, total: int, concurrency: int, max_retries: int, on_batch=None) -> int:
+    """Run action on every batch, several at a time, retrying each with jittered exponential backoff."""
+    semaphore = asyncio.Semaphore(concurrency)
+    done = 0
+
+    async def run(number, batch):
+        nonlocal done
+        async with semaphore:
+            for attempt in range(max_retries + 1):
+                try:
+                    await action(batch)
+                    break
+                except Exception as e:
+                    if attempt == max_retries:
+                        print(f"❌ {label} batch {number}/{len(batches)} failed after {attempt + 1} attempts: {e}")
+                        raise
+                    delay = min(30.0, 0.5 * 2 ** attempt) * random.uniform(0.5, 1.0)
+                    print(f"⚠️ {label} batch {number}/{len(batches)} failed ({e}), retrying in {delay:.1f}s...")
+                    await asyncio.sleep(delay)
+        done += len(batch)
+        print(f"📦 {label} batch {number}/{len(batches)} done ({done}/{total} vectors)")
+        if on_batch is not None:
+            on_batch(batch)
+
+    results = await asyncio.gather(
+        *(run(number, batch) for number, batch in enumerate(batches, start=1)), return_exceptions=True
+    )
+    failures = [result for result in results if isinstance(result, Exception)]
+    if failures:
+        raise UpsertError(f"{len(failures)} of {len(batches)} {label.lower()} batches failed: {failures[0]}")
+    return done
+
+
+async def upsert_in_batches(store: VectorStore, vectors: list, namespace: str, max_bytes: int = 2_000_000,
+                            max_vectors: int = 100, concurrency: int = 4, max_retries: int = 3, on_batch=None) -> int:
+    """
+    Upsert records in size-limited batches, several at a time.
+
+    Each batch is retried with jittered exponential backoff. on_batch is called
+    with the records of every batch once it is written, so callers can track
+    progress even if a later batch fails. Raises UpsertError if any batch
+    still fails after max_retries retries. Returns the number of records written.
+    """
+    return await _run_batches(
+        split_upsert_batches(vectors, max_bytes, max_vectors),
+        lambda batch: store.aupsert(batch, namespace),
+        "Upsert", len(vectors), concurrency, max_retries, on_batch,
+    )
+
+
+async def delete_in_batches(store: VectorStore, ids: list, namespace: str, batch_size: int = 1000,
+                            concurrency: int = 4, max_retries: int = 3, on_batch=None) -> int:
+    """
+    Delete records by ID in batches of at most batch_size (Pinecone's limit
+    is 1000), retried like upserts. on_batch receives the IDs of every batch
+    once deleted. Raises UpsertError if a batch keeps failing.
+    """
+    return await _run_batches(
+        [ids[i:i + batch_size] for i in range(0, len(ids), batch_size)],
+        lambda batch: store.adelete(batch, namespace),
+        "Delete", len(ids), concurrency, max_retries, on_batch,
+    )
+
+
+class PineconeVectorStore(VectorStore):
+    """Vector store backed by a Pinecone index."""
+
+    def __init__(self, index):
+        self.index = index
+
+    @staticmethod
+    def game_filter(games: list) -> dict:
+        """Metadata filter for the given games; records stored before games were tagged count as general."""
+        in_games = {"game": {"$in": list(games)}}
+        if GENERAL_GAME in games:
+            return {"$or": [in_games, {"game": {"$exists": False}}]}
+        return in_games
+
+    def query(self, vector, top_k, namespace, games=None):
+        results = self.index.query(
+            vector=vector, top_k=top_k, include_metadata=True, namespace=namespace,
+            filter=self.game_filter(games) if games is not None else None,
+        )
+        return [
+            {"id": match.id, "score": match.score, "metadata": match.metadata or {}}
+            for match in results.matches
+        ]
+
+    def fetch(self, ids, namespace):
+        response = self.index.fetch(ids, namespace=namespace)
+        if not response or not response.vectors:
+            return {}
+        return {
+            vector_id: {"id": vector_id, "values": record.values, "metadata": record.metadata or {}}
+            for vector_id, record in response.vectors.items()
+        }
+
+    def upsert(self, vectors, namespace):
+        # Values may be NumPy arrays; the client sends plain lists
+        vectors = [
+            {**record, "values": record["values"].tolist()} if isinstance(record["values"], np.ndarray) else record
+            for record in vectors
+        ]
+        self.index.upsert(vectors=vectors, namespace=namespace)
+
+    def delete(self, ids, namespace):
+        self.index.delete(ids=ids, namespace=namespace)
+
+
+class NamespacePartition:
+    """The vectors of one namespace, stored as a contiguous matrix of unit-length float32 rows."""
+
+    def __init__(self, dimension: int):
+        self.dimension = dimension
+        self.matrix = np.zeros((0, dimension), dtype=np.float32)
+        self.count = 0
+        self.ids = []
+        self.metadata = []
+        self.rows = {}  # id -> row
+
+    @staticmethod
+    def normalise(vectors) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def _reserve(self, rows: int):
+        if rows <= len(self.matrix):
+            return
+        capacity = max(rows, 2 * len(self.matrix), 64)
+        grown = np.zeros((capacity, self.dimension), dtype=np.float32)
+        grown[:self.count] = self.matrix[:self.count]
+        self.matrix = grown
+
+    def upsert(self, records: list):
+        if not records:
+            return
+        vectors = self.normalise([record["values"] for record in records])
+        self._reserve(self.count + len(records))
+        for record, vector in zip(records, vectors):
+            row = self.rows.get(record["id"])
+            if row is None:
+                row = self.count
+                self.count += 1
+                self.rows[record["id"]] = row
+                self.ids.append(record["id"])
+                self.metadata.append(None)
+            self.matrix[row] = vector
+            self.metadata[row] = record.get("metadata") or {}
+
+    def delete(self, ids: list):
+        for vector_id in ids:
+            row = self.rows.pop(vector_id, None)
+            if row is None:
+                continue
+            # Move the last row into the gap to keep the matrix contiguous
+            last = self.count - 1
+            if row != last:
+                self.matrix[row] = self.matrix[last]
+                self.ids[row] = self.ids[last]
+                self.metadata[row] = self.metadata[last]
+                self.rows[self.ids[row]] = row
+            self.ids.pop()
+            self.metadata.pop()
+            self.count -= 1
+
+    def query(self, vector, top_k: int) -> list:
+        if self.count == 0 or top_k <= 0:
+            return []
+        scores = self.matrix[:self.count] @ self.normalise(vector)
+        top_k = min(top_k, self.count)
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best])]
+        return [{"id": self.ids[row], "score": float(scores[row]), "metadata": self.metadata[row]} for row in best]
+
+    def fetch(self, ids: list) -> dict:
+        found = {}
+        for vector_id in ids:
+            row = self.rows.get(vector_id)
+            if row is not None:
+                found[vector_id] = {"id": vector_id, "values": self.matrix[row].tolist(), "metadata": self.metadata[row]}
+        return found
+
+    def records(self) -> list:
+        return [{"id": vector_id, "values": self.matrix[row], "metadata": self.metadata[row]}
+                for row, vector_id in enumerate(self.ids)]
+
+    def snapshot(self):
+        """
+        Copy the state to save and return write(base), which writes the
+        matrix next to base and returns the JSON-able part of the state.
+        Only the copy needs the store lock.
+        """
+        matrix = self.matrix[:self.count].copy()
+        state = {"ids": list(self.ids), "metadata": list(self.metadata)}
+
+        def write(base: str) -> dict:
+            with open(f"{base}.npy.tmp", "wb") as f:
+                np.save(f, matrix, allow_pickle=False)
+            os.replace(f"{base}.npy.tmp", f"{base}.npy")
+            return state
+        return write
+
+    def load(self, base: str, state: dict):
+        self.matrix = np.load(f"{base}.npy")
+        self.count = len(state["ids"])
+        self.ids = state["ids"]
+        self.metadata = state["metadata"]
+        self.rows = {vector_id: row for row, vector_id in enumerate(self.ids)}
+
+
+class HNSWPartition:
+    """
+    The vectors of one namespace in an HNSW graph, for approximate search.
+
+    Graph nodes are append-only: a delete tombstones the node and an upsert
+    that changes a vector tombstones the old node and inserts a new one. Once
+    tombstones outnumber live records the graph is rebuilt from the live ones.
+    """
+
+    def __init__(self, dimension: int, M: int = 16, ef_construction: int = 100, ef_search: int = 64):
+        self.dimension = dimension
+        self.params = {"M": M, "ef_construction": ef_construction, "ef_search": ef_search}
+        self.graph = HNSWIndex(dimension, **self.params)
+        self.ids = []  # node -> id, None once tombstoned
+        self.metadata = []
+        self.rows = {}  # id -> live node
+
+    @property
+    def count(self) -> int:
+        return len(self.rows)
+
+    def upsert(self, records: list):
+        for record in records:
+            vector = NamespacePartition.normalise(record["values"])
+            node = self.rows.get(record["id"])
+            if node is not None and np.allclose(self.graph.vectors[node], vector):
+                # Same vector, so only the metadata changes
+                self.metadata[node] = record.get("metadata") or {}
+                continue
+            if node is not None:
+                self._tombstone(node)
+            node = self.graph.insert(vector)
+            self.ids.append(record["id"])
+            self.metadata.append(record.get("metadata") or {})
+            self.rows[record["id"]] = node
+
+    def _tombstone(self, node: int):
+        self.graph.delete(node)
+        self.ids[node] = None
+        self.metadata[node] = None
+
+    def delete(self, ids: list):
+        for vector_id in ids:
+            node = self.rows.pop(vector_id, None)
+            if node is not None:
+                self._tombstone(node)
+        if self.graph.tombstones > max(self.count, 1000):
+            self.rebuild()
+
+    def rebuild(self):
+        """Rebuild the graph from live records, dropping tombstones."""
+        live = self.records()
+        self.graph = HNSWIndex(self.dimension, **self.params)
+        self.ids, self.metadata, self.rows = [], [], {}
+        self.upsert(live)
+
+    def query(self, vector, top_k: int) -> list:
+        return [
+            {"id": self.ids[node], "score": similarity, "metadata": self.metadata[node]}
+            for similarity, node in self.graph.search(vector, top_k)
+        ]
+
+    def fetch(self, ids: list) -> dict:
+        found = {}
+        for vector_id in ids:
+            node = self.rows.get(vector_id)
+            if node is not None:
+                found[vector_id] = {"id": vector_id, "values": self.graph.vectors[node].tolist(), "metadata": self.metadata[node]}
+        return found
+
+    def records(self) -> list:
+        return [{"id": vector_id, "values": self.graph.vectors[node], "metadata": self.metadata[node]}
+                for vector_id, node in self.rows.items()]
+
+    def snapshot(self):
+        arrays = self.graph.arrays()
+        state = {"ids": list(self.ids), "metadata": list(self.metadata)}
+
+        def write(base: str) -> dict:
+            HNSWIndex.write_arrays(f"{base}.hnsw.npz", arrays)
+            return state
+        return write
+
+    def load(self, base: str, state: dict):
+        self.graph = HNSWIndex.load(f"{base}.hnsw.npz", ef_search=self.params["ef_search"])
+        self.ids = state["ids"]
+        self.metadata = state["metadata"]
+        self.rows = {vector_id: node for node, vector_id in enumerate(self.ids) if vector_id is not None}
+
+
+class QuantizedPartition:
+    """
+    The vectors of one namespace as compressed codes, with exact re-ranking.
+
+    Queries score every record over its int8 or product-quantized code, then
+    re-rank a shortlist of rerank * top_k candidates with the full-precision
+    vectors, which live in a memory-mapped file and are only read on demand.
+    A PQ partition needs pq_train_size vectors to train its codebooks and
+    searches the full vectors exactly until then. The memory-mapped file is
+    working storage: a save writes a copy of its rows with the codes, and
+    loading restores them.
+    """
+
+    def __init__(self, dimension: int, method: str = "int8", path: Optional[str] = None,
+                 rerank: int = 10, pq_subspaces: int = 96, pq_train_size: int = 4096):
+        self.dimension = dimension
+        self.quantizer = ScalarQuantizer() if method == "int8" else ProductQuantizer(dimension, pq_subspaces)
+        self.pq_train_size = pq_train_size
+        self.rerank = rerank
+        self.full = VectorFile(path, dimension)
+        self.arrays = {
+            name: np.zeros((0, *shape), dtype=dtype)
+            for name, (shape, dtype) in self.quantizer.fields(dimension).items()
+        }
+        self.count = 0
+        self.ids = []
+        self.metadata = []
+        self.rows = {}  # id -> row
+
+    def _reserve(self, rows: int):
+        self.full.reserve(rows)
+        for name, array in self.arrays.items():
+            if rows > len(array):
+                grown = np.zeros((max(rows, 2 * len(array), 64), *array.shape[1:]), dtype=array.dtype)
+                grown[:self.count] = array[:self.count]
+                self.arrays[name] = grown
+
+    def _encode_rows(self, rows, vectors: np.ndarray):
+        for name, values in self.quantizer.encode(vectors).items():
+            self.arrays[name][rows] = values
+
+    def upsert(self, records: list):
+        if not records:
+            return
+        vectors = NamespacePartition.normalise([record["values"] for record in records])
+        self._reserve(self.count + len(records))
+        rows = []
+        for record in records:
+            row = self.rows.get(record["id"])
+            if row is None:
+                row = self.count
+                self.count += 1
+                self.rows[record["id"]] = row
+                self.ids.append(record["id"])
+                self.metadata.append(None)
+            self.metadata[row] = record.get("metadata") or {}
+            rows.append(row)
+        self.full.vectors[rows] = vectors
+        if self.quantizer.trained:
+            self._encode_rows(rows, vectors)
+        elif self.count >= self.pq_train_size:
+            self.quantizer.train(self.full.vectors[:self.count])
+            for start in range(0, self.count, SCAN_BLOCK_ROWS):
+                end = min(start + SCAN_BLOCK_ROWS, self.count)
+                self._encode_rows(slice(start, end), np.asarray(self.full.vectors[start:end]))
+
+    def delete(self, ids: list):
+        for vector_id in ids:
+            row = self.rows.pop(vector_id, None)
+            if row is None:
+                continue
+            # Move the last row into the gap to keep the arrays contiguous
+            last = self.count - 1
+            if row != last:
+                self.full.vectors[row] = self.full.vectors[last]
+                for array in self.arrays.values():
+                    array[row] = array[last]
+                self.ids[row] = self.ids[last]
+                self.metadata[row] = self.metadata[last]
+                self.rows[self.ids[row]] = row
+            self.ids.pop()
+            self.metadata.pop()
+            self.count -= 1
+
+    def _exact_scores(self, rows, query: np.ndarray) -> np.ndarray:
+        return np.asarray(self.full.vectors[rows]) @ query
+
+    def query(self, vector, top_k: int) -> list:
+        if self.count == 0 or top_k <= 0:
+            return []
+        query = NamespacePartition.normalise(vector)
+        if self.quantizer.trained:
+            approximate = self.quantizer.score({name: array[:self.count] for name, array in self.arrays.items()}, query)
+            shortlist_size = min(self.count, top_k * self.rerank)
+            candidates = np.sort(np.argpartition(-approximate, shortlist_size - 1)[:shortlist_size])
+        else:
+            candidates = np.arange(self.count)
+        scores = self._exact_scores(candidates, query)
+        top_k = min(top_k, len(candidates))
+        best = np.argpartition(-scores, top_k - 1)[:top_k]
+        best = best[np.argsort(-scores[best])]
+        return [
+            {"id": self.ids[candidates[i]], "score": float(scores[i]), "metadata": self.metadata[candidates[i]]}
+            for i in best
+        ]
+
+    def fetch(self, ids: list) -> dict:
+        found = {}
+        for vector_id in ids:
+            row = self.rows.get(vector_id)
+            if row is not None:
+                found[vector_id] = {"id": vector_id, "values": self.full.vectors[row].tolist(), "metadata": self.metadata[row]}
+        return found
+
+    def records(self) -> list:
+        return [{"id": vector_id, "values": np.asarray(self.full.vectors[row]), "metadata": self.metadata[row]}
+                for row, vector_id in enumerate(self.ids)]
+
+    def memory_bytes(self) -> int:
+        """Resident size of the compressed codes."""
+        return sum(array[:self.count].nbytes for array in self.arrays.values())
+
+    def snapshot(self):
+        # Deletes keep moving rows around the live vector file, so its rows are
+        # copied too and saved next to the codes, in line with the saved ids
+        arrays = {name: array[:self.count].copy() for name, array in self.arrays.items()}
+        arrays.update(self.quantizer.state())
+        vectors = np.array(self.full.vectors[:self.count])
+        state = {"ids": list(self.ids), "metadata": list(self.metadata)}
+
+        def write(base: str) -> dict:
+            with open(f"{base}.vectors.npy.tmp", "wb") as f:
+                np.save(f, vectors, allow_pickle=False)
+            os.replace(f"{base}.vectors.npy.tmp", f"{base}.vectors.npy")
+            with open(f"{base}.codes.npz.tmp", "wb") as f:
+                np.savez(f, **arrays)
+            os.replace(f"{base}.codes.npz.tmp", f"{base}.codes.npz")
+            return state
+        return write
+
+    def load(self, base: str, state: dict):
+        with np.load(f"{base}.codes.npz") as data:
+            self.quantizer.load_state(data)
+            for name in self.arrays:
+                self.arrays[name] = data[name]
+        self.count = len(state["ids"])
+        self.ids = state["ids"]
+        self.metadata = state["metadata"]
+        self.rows = {vector_id: row for row, vector_id in enumerate(self.ids)}
+        if os.path.exists(f"{base}.vectors.npy"):
+            # Restore the saved rows over whatever the live file held when the process stopped
+            saved = np.load(f"{base}.vectors.npy", mmap_mode="r")
+            self.full.reserve(self.count)
+            for start in range(0, self.count, SCAN_BLOCK_ROWS):
+                end = min(start + SCAN_BLOCK_ROWS, self.count)
+                self.full.vectors[start:end] = saved[start:end]
+            self.full.flush()
+
+
+class LocalVectorStore(VectorStore):
+    """
+    In-process vector store.
+
+    Every namespace is split into one partition per game (records without a
+    game go to the "general" partition), so a game-scoped query only scans
+    that game's vectors.
+
+    With index="flat" (the default) each partition is a contiguous float32
+    matrix searched exactly with a single matrix-vector product. With
+    index="hnsw" each partition is an HNSW graph instead, which keeps query
+    time roughly flat as the corpus grows at the cost of slower inserts and
+    approximate results. A flat index can also be stored quantized ("int8" or
+    "pq") to cut its memory footprint, with the full vectors kept on disk for
+    re-ranking. The store is persisted to a directory as data files and one
+    JSON file of IDs and metadata per partition.
+
+    Every operation takes the store lock, which ingestion jobs hold while
+    they write, so the async variants always run in a worker thread.
+    """
+
+    def __init__(self, directory: Optional[str] = None, dimension: int = 1536, index: str = "flat",
+                 index_params: Optional[dict] = None, quantization: str = "none", quantization_params: Optional[dict] = None):
+        if index not in ("flat", "hnsw"):
+            raise ValueError(f"Unknown vector index '{index}', expected 'flat' or 'hnsw'")
+        if quantization not in ("none", "int8", "pq"):
+            raise ValueError(f"Unknown vector quantization '{quantization}', expected 'none', 'int8' or 'pq'")
+        if quantization != "none" and index != "flat":
+            raise ValueError("Quantized storage is only supported with the flat index")
+        self.directory = directory
+        self.dimension = dimension
+        self.kind = index if quantization == "none" else quantization
+        self.index_params = index_params or {}
+        self.quantization_params = quantization_params or {}
+        self.namespaces = {}  # namespace -> game -> partition
+        self.locations = {}  # namespace -> id -> game
+        self.dirty = set()  # (namespace, game)
+        self.lock = threading.RLock()
+        self.save_lock = threading.Lock()  # one save at a time, as two would write the same files
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+            self.load()
+
+    @staticmethod
+    def _file_base(namespace: str, game: str) -> str:
+        """File name stem for a partition; the general partition keeps the bare namespace."""
+        if game == GENERAL_GAME:
+            return namespace
+        slug = re.sub(r"[^a-z0-9]+", "-", game).strip("-")[:40]
+        return f"{namespace}.{slug}-{hashlib.md5(game.encode('utf-8')).hexdigest()[:8]}"
+
+    def _new_partition(self, kind: str, file_base: str):
+        if kind == "hnsw":
+            return HNSWPartition(self.dimension, **self.index_params)
+        if kind in ("int8", "pq"):
+            path = os.path.join(self.directory, f"{file_base}.{kind}.f32") if self.directory else None
+            return QuantizedPartition(self.dimension, method=kind, path=path, **self.quantization_params)
+        return NamespacePartition(self.dimension)
+
+    def _partition(self, namespace: str, game: str):
+        games = self.namespaces.setdefault(namespace, {})
+        if game not in games:
+            games[game] = self._new_partition(self.kind, self._file_base(namespace, game))
+        return games[game]
+
+    def _group_by_game(self, ids: list, namespace: str) -> dict:
+        locations = self.locations.get(namespace, {})
+        grouped = {}
+        for vector_id in ids:
+            if vector_id in locations:
+                grouped.setdefault(locations[vector_id], []).append(vector_id)
+        return grouped
+
+    def query(self, vector, top_k, namespace, games=None):
+        with self.lock:
+            partitions = self.namespaces.get(namespace, {})
+            selected = partitions if games is None else [game for game in games if game in partitions]
+            matches = [match for game in selected for match in partitions[game].query(vector, top_k)]
+        matches.sort(key=lambda match: match["score"], reverse=True)
+        return matches[:top_k]
+
+    def fetch(self, ids, namespace):
+        with self.lock:
+            found = {}
+            for game, game_ids in self._group_by_game(ids, namespace).items():
+                found.update(self.namespaces[namespace][game].fetch(game_ids))
+            return found
+
+    def upsert(self, vectors, namespace):
+        with self.lock:
+            locations = self.locations.setdefault(namespace, {})
+            grouped = {}
+            for record in vectors:
+                game = game_key((record.get("metadata") or {}).get("game"))
+                grouped.setdefault(game, []).append(record)
+                previous = locations.get(record["id"])
+                if previous is not None and previous != game:
+                    # The record moved to another game
+                    self.namespaces[namespace][previous].delete([record["id"]])
+                    self.dirty.add((namespace, previous))
+                locations[record["id"]] = game
+            for game, records in grouped.items():
+                self._partition(namespace, game).upsert(records)
+                self.dirty.add((namespace, game))
+
+    def delete(self, ids, namespace):
+        with self.lock:
+            for game, game_ids in self._group_by_game(ids, namespace).items():
+                self.namespaces[namespace][game].delete(game_ids)
+                for vector_id in game_ids:
+                    del self.locations[namespace][vector_id]
+                self.dirty.add((namespace, game))
+
+    def load(self):
+        """Load every partition saved in the store directory."""
+        if not os.path.isdir(self.directory):
+            return
+        for file_name in os.listdir(self.directory):
+            if not file_name.endswith(".json"):
+                continue
+            file_base = file_name[:-len(".json")]
+            base = os.path.join(self.directory, file_base)
+            with open(f"{base}.json", encoding="utf-8") as f:
+                state = json.load(f)
+            namespace = state.get("namespace", file_base)
+            game = state.get("game", GENERAL_GAME)
+            kind = state.get("index", "flat")
+            partition = self._new_partition(kind, file_base)
+            partition.load(base, state)
+            if kind != self.kind:
+                # Saved with another index type: rebuild it as the configured one
+                print(f"🔄 Rebuilding '{namespace}' ({game}) vectors as a {self.kind} index...")
+                records = partition.records()
+                partition = self._new_partition(self.kind, file_base)
+                partition.upsert(records)
+                self.dirty.add((namespace, game))
+            self.namespaces.setdefault(namespace, {})[game] = partition
+            self.locations.setdefault(namespace, {}).update(dict.fromkeys(partition.rows, game))
+
+    def save(self):
+        """
+        Write changed partitions to disk, replacing the previous files
+        atomically. The store lock is only held to copy the changed
+        partitions, so queries are not held up while the files are written.
+        """
+        if not self.directory:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        with self.save_lock:
+            with self.lock:
+                changed = [(namespace, game, self.namespaces[namespace][game].snapshot()) for namespace, game in self.dirty]
+                self.dirty.clear()
+            try:
+                while changed:
+                    namespace, game, write = changed[-1]
+                    base = os.path.join(self.directory, self._file_base(namespace, game))
+                    state = write(base)
+                    state.update({"index": self.kind, "namespace": namespace, "game": game})
+                    with open(f"{base}.json.tmp", "w", encoding="utf-8") as f:
+                        json.dump(state, f)
+                    os.replace(f"{base}.json.tmp", f"{base}.json")
+                    changed.pop()
+            finally:
+                # Partitions that could not be written are saved next time
+                with self.lock:
+                    self.dirty.update((namespace, game) for namespace, game, _ in changed)